@@ -0,0 +1,27 @@
+"""add dialer concurrency limits
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2024-02-01 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Per-user and per-group-call limits on calls kept in flight by the dialer
+    op.add_column('users', sa.Column('max_concurrent_calls', sa.Integer(), nullable=True))
+    op.add_column('group_calls', sa.Column('max_concurrent_calls', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('group_calls', 'max_concurrent_calls')
+    op.drop_column('users', 'max_concurrent_calls')
@@ -0,0 +1,47 @@
+"""add dial queue
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2024-02-05 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Create dial_queue table (one row per lead to dial in a group call)
+    op.create_table('dial_queue',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('group_call_id', sa.Integer(), nullable=False),
+        sa.Column('lead_id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=True),
+        sa.Column('phone_number', sa.String(length=20), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=True),
+        sa.Column('call_id', sa.Integer(), nullable=True),
+        sa.Column('claimed_by', sa.String(length=100), nullable=True),
+        sa.Column('claimed_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['group_call_id'], ['group_calls.id'], ),
+        sa.ForeignKeyConstraint(['lead_id'], ['leads.id'], ),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.ForeignKeyConstraint(['call_id'], ['calls.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('group_call_id', 'lead_id', name='uq_dial_queue_group_call_lead')
+    )
+    op.create_index(op.f('ix_dial_queue_id'), 'dial_queue', ['id'], unique=False)
+    op.create_index('ix_dial_queue_group_call_status', 'dial_queue', ['group_call_id', 'status', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_dial_queue_group_call_status', table_name='dial_queue')
+    op.drop_index(op.f('ix_dial_queue_id'), table_name='dial_queue')
+    op.drop_table('dial_queue')
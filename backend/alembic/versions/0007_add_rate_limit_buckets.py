@@ -0,0 +1,30 @@
+"""add rate limit buckets
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2024-02-08 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0007'
+down_revision = '0006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Token buckets for the cluster-wide Twilio dialing rate limiter
+    op.create_table('rate_limit_buckets',
+        sa.Column('key', sa.String(length=100), nullable=False),
+        sa.Column('tokens', sa.Float(), nullable=False),
+        sa.Column('refilled_at', sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint('key')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('rate_limit_buckets')
@@ -0,0 +1,25 @@
+"""add group call pacing mode
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2024-02-12 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0008'
+down_revision = '0007'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # fixed keeps max_concurrent_calls lines busy; predictive paces from observed answer rates
+    op.add_column('group_calls', sa.Column('pacing_mode', sa.String(length=20), nullable=True, server_default='fixed'))
+
+
+def downgrade() -> None:
+    op.drop_column('group_calls', 'pacing_mode')
@@ -0,0 +1,42 @@
+"""add dial queue retries
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2024-02-15 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0009'
+down_revision = '0008'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Retry bookkeeping on queue entries
+    op.add_column('dial_queue', sa.Column('attempts', sa.Integer(), nullable=True))
+    op.add_column('dial_queue', sa.Column('next_attempt_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True))
+    op.execute("UPDATE dial_queue SET next_attempt_at = created_at, attempts = CASE WHEN status = 'pending' THEN 0 ELSE 1 END")
+
+    # Due entries (fresh and retries) are found through one index instead of a scan
+    op.drop_index('ix_dial_queue_group_call_status', table_name='dial_queue')
+    op.create_index('ix_dial_queue_due', 'dial_queue', ['group_call_id', 'status', 'next_attempt_at'], unique=False)
+
+    # Per-campaign retry policy
+    op.add_column('group_calls', sa.Column('max_attempts', sa.Integer(), nullable=True))
+    op.add_column('group_calls', sa.Column('retry_backoff_seconds', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('group_calls', 'retry_backoff_seconds')
+    op.drop_column('group_calls', 'max_attempts')
+
+    op.drop_index('ix_dial_queue_due', table_name='dial_queue')
+    op.create_index('ix_dial_queue_group_call_status', 'dial_queue', ['group_call_id', 'status', 'id'], unique=False)
+
+    op.drop_column('dial_queue', 'next_attempt_at')
+    op.drop_column('dial_queue', 'attempts')
@@ -0,0 +1,34 @@
+"""add calling windows
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2024-02-20 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0010'
+down_revision = '0009'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Lead time zone bucket; entries queued before this stay unrestricted (NULL)
+    op.add_column('dial_queue', sa.Column('time_zone', sa.String(length=64), nullable=True))
+    op.create_index('ix_dial_queue_zone_due', 'dial_queue', ['group_call_id', 'status', 'time_zone', 'next_attempt_at'], unique=False)
+
+    # Per-campaign calling window in the lead's local time
+    op.add_column('group_calls', sa.Column('calling_window_start_hour', sa.Integer(), nullable=True))
+    op.add_column('group_calls', sa.Column('calling_window_end_hour', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('group_calls', 'calling_window_end_hour')
+    op.drop_column('group_calls', 'calling_window_start_hour')
+
+    op.drop_index('ix_dial_queue_zone_due', table_name='dial_queue')
+    op.drop_column('dial_queue', 'time_zone')
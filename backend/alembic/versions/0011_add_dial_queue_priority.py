@@ -0,0 +1,47 @@
+"""add dial queue priority
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2024-02-22 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0011'
+down_revision = '0010'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Lead priority copied onto queue entries so claims are served by one index
+    op.add_column('dial_queue', sa.Column('priority', sa.Integer(), nullable=True))
+    op.add_column('dial_queue', sa.Column('last_attempt_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True))
+    op.execute(
+        "UPDATE dial_queue SET "
+        "priority = COALESCE((SELECT leads.priority FROM leads WHERE leads.id = dial_queue.lead_id), 3), "
+        "last_attempt_at = COALESCE(claimed_at, created_at)"
+    )
+
+    # Retries not due yet wait as 'scheduled' (ix_dial_queue_due finds them
+    # when they come due), so every pending entry can be claimed in order
+    op.execute("UPDATE dial_queue SET status = 'scheduled' WHERE status = 'pending' AND next_attempt_at > now()")
+
+    # Claim order
+    op.create_index(
+        'ix_dial_queue_priority',
+        'dial_queue',
+        ['group_call_id', 'status', sa.text('priority DESC'), 'last_attempt_at', 'id'],
+        unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_dial_queue_priority', table_name='dial_queue')
+    op.execute("UPDATE dial_queue SET status = 'pending' WHERE status = 'scheduled'")
+
+    op.drop_column('dial_queue', 'last_attempt_at')
+    op.drop_column('dial_queue', 'priority')
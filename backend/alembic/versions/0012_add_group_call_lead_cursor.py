@@ -0,0 +1,33 @@
+"""add group call lead cursor
+
+Revision ID: 0012
+Revises: 0011
+Create Date: 2024-02-25 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0012'
+down_revision = '0011'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Keyset cursor over group members already queued for a group call
+    op.add_column('group_calls', sa.Column('last_lead_id', sa.Integer(), nullable=True))
+    op.execute(
+        "UPDATE group_calls SET last_lead_id = "
+        "(SELECT MAX(dial_queue.lead_id) FROM dial_queue WHERE dial_queue.group_call_id = group_calls.id)"
+    )
+
+    # Page through a group's members in lead_id order
+    op.create_index('ix_lead_groups_group_lead', 'lead_groups', ['group_id', 'lead_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_lead_groups_group_lead', table_name='lead_groups')
+    op.drop_column('group_calls', 'last_lead_id')
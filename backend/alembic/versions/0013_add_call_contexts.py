@@ -0,0 +1,32 @@
+"""add call contexts
+
+Revision ID: 0013
+Revises: 0012
+Create Date: 2024-02-28 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0013'
+down_revision = '0012'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Call context cache shared by every worker, filled when a call is dialed
+    op.create_table('call_contexts',
+        sa.Column('call_sid', sa.String(length=100), nullable=False),
+        sa.Column('data', sa.Text(), nullable=False),
+        sa.Column('expires_at', sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint('call_sid')
+    )
+    op.create_index(op.f('ix_call_contexts_expires_at'), 'call_contexts', ['expires_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_call_contexts_expires_at'), table_name='call_contexts')
+    op.drop_table('call_contexts')
@@ -0,0 +1,37 @@
+"""add call status events
+
+Revision ID: 0014
+Revises: 0013
+Create Date: 2024-03-04 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0014'
+down_revision = '0013'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Applied status callbacks, unique per delivery, so duplicates are ignored
+    op.create_table('call_status_events',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('call_sid', sa.String(length=255), nullable=False),
+        sa.Column('status', sa.String(length=50), nullable=False),
+        sa.Column('sequence_number', sa.Integer(), nullable=False),
+        sa.Column('received_at', sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('call_sid', 'status', 'sequence_number', name='uq_call_status_event')
+    )
+    op.create_index(op.f('ix_call_status_events_id'), 'call_status_events', ['id'], unique=False)
+    op.create_index(op.f('ix_call_status_events_received_at'), 'call_status_events', ['received_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_call_status_events_received_at'), table_name='call_status_events')
+    op.drop_index(op.f('ix_call_status_events_id'), table_name='call_status_events')
+    op.drop_table('call_status_events')
@@ -0,0 +1,52 @@
+"""add lead import jobs
+
+Revision ID: 0015
+Revises: 0014
+Create Date: 2024-03-08 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0015'
+down_revision = '0014'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Background CSV imports, progress committed with each chunk so they can resume
+    op.create_table('lead_import_jobs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('filename', sa.String(length=255), nullable=False),
+        sa.Column('file_path', sa.String(length=500), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=True),
+        sa.Column('rows_processed', sa.Integer(), nullable=True),
+        sa.Column('rows_imported', sa.Integer(), nullable=True),
+        sa.Column('error_count', sa.Integer(), nullable=True),
+        sa.Column('errors', sa.Text(), nullable=True),
+        sa.Column('imported_since', sa.Integer(), nullable=True),
+        sa.Column('processing_seconds', sa.Float(), nullable=True),
+        sa.Column('failure', sa.Text(), nullable=True),
+        sa.Column('claimed_by', sa.String(length=100), nullable=True),
+        sa.Column('heartbeat_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('started_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_lead_import_jobs_id'), 'lead_import_jobs', ['id'], unique=False)
+    op.create_index(op.f('ix_lead_import_jobs_user_id'), 'lead_import_jobs', ['user_id'], unique=False)
+    op.create_index(op.f('ix_lead_import_jobs_status'), 'lead_import_jobs', ['status'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_lead_import_jobs_status'), table_name='lead_import_jobs')
+    op.drop_index(op.f('ix_lead_import_jobs_user_id'), table_name='lead_import_jobs')
+    op.drop_index(op.f('ix_lead_import_jobs_id'), table_name='lead_import_jobs')
+    op.drop_table('lead_import_jobs')
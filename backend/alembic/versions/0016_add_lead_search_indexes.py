@@ -0,0 +1,54 @@
+"""add lead search indexes
+
+Revision ID: 0016
+Revises: 0015
+Create Date: 2024-03-12 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0016'
+down_revision = '0015'
+branch_labels = None
+depends_on = None
+
+# Same expressions as lead_phone_digits / lead_search_text in app.models.models
+PHONE_DIGITS_SQL = (
+    "replace(replace(replace(replace(replace(replace(phone, '+', ''), '-', ''), ' ', ''), '(', ''), ')', ''), '.', '')"
+)
+SEARCH_TEXT_SQL = (
+    "lower(coalesce(name, '') || ' ' || coalesce(company, '') || ' ' || coalesce(email, ''))"
+)
+
+
+def upgrade() -> None:
+    # Expression indexes built CONCURRENTLY, so leads stays writable while they
+    # build; CONCURRENTLY can't run inside the migration's transaction
+    with op.get_context().autocommit_block():
+        # Trigram operator classes for indexed substring search
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+
+        # A user's leads by phone digits (prefix matches use the pattern ops)
+        op.create_index('ix_leads_user_phone_digits', 'leads',
+                        ['user_id', sa.text(f'({PHONE_DIGITS_SQL}) text_pattern_ops')], unique=False,
+                        postgresql_concurrently=True, if_not_exists=True)
+        # Substring search on phone digits, and on name, company and email
+        op.create_index('ix_leads_phone_digits_trgm', 'leads',
+                        [sa.text(f'({PHONE_DIGITS_SQL}) gin_trgm_ops')], unique=False,
+                        postgresql_using='gin', postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_leads_search_text_trgm', 'leads',
+                        [sa.text(f'({SEARCH_TEXT_SQL}) gin_trgm_ops')], unique=False,
+                        postgresql_using='gin', postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_leads_search_text_trgm', table_name='leads',
+                      postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_leads_phone_digits_trgm', table_name='leads',
+                      postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_leads_user_phone_digits', table_name='leads',
+                      postgresql_concurrently=True, if_exists=True)
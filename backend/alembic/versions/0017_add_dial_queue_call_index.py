@@ -0,0 +1,29 @@
+"""add dial queue call index
+
+Revision ID: 0017
+Revises: 0016
+Create Date: 2024-03-15 00:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0017'
+down_revision = '0016'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Entry of a finished call, looked up on every retry decision; built
+    # CONCURRENTLY so running dialers keep claiming while it builds
+    with op.get_context().autocommit_block():
+        op.create_index('ix_dial_queue_call_id', 'dial_queue', ['call_id'], unique=False,
+                        postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_dial_queue_call_id', table_name='dial_queue',
+                      postgresql_concurrently=True, if_exists=True)
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlalchemy.orm import Session
 from typing import List, Dict, Any
 from app.database.database import get_db
@@ -7,6 +7,7 @@ from app.services.lead_service import LeadService
 from app.schemas.schemas import ConversationRequest, ConversationResponse
 import logging
 from starlette.responses import HTMLResponse
+from app.services.twiml_service import streams_twiml_for_call
 
 
 logger = logging.getLogger(__name__)
@@ -16,9 +17,10 @@ router = APIRouter(prefix="/ai", tags=["ai"])
 ai_service = AIService()
 
 @router.post("/")
-async def start_call():
+async def start_call(request: Request):
     logger.info("CALl STARTED")   
-    return HTMLResponse(content=open("templates/streams.xml").read(), media_type="application/xml")
+    form_data = await request.form()
+    return HTMLResponse(content=await streams_twiml_for_call(form_data.get("CallSid")), media_type="application/xml")
 
 
 @router.post("/conversation", response_model=ConversationResponse)
@@ -4,7 +4,7 @@ from sqlalchemy.orm import Session
 from app.database.database import get_db
 from app.core.auth import verify_password, get_password_hash, create_access_token, get_current_user, generate_unique_username
 from app.models.models import User
-from app.schemas.schemas import UserCreate, User as UserSchema, Token, UserLogin
+from app.schemas.schemas import UserCreate, UserUpdate, User as UserSchema, Token, UserLogin
 import logging
 
 logger = logging.getLogger(__name__)
@@ -105,6 +105,51 @@ async def get_current_user_info(current_user: User = Depends(get_current_user)):
     """Get current user information"""
     return current_user
 
+@router.put("/me", response_model=UserSchema)
+async def update_current_user(
+    user_data: UserUpdate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Update current user information"""
+    try:
+        update_data = user_data.dict(exclude_unset=True)
+        
+        if update_data.get('email') and update_data['email'] != current_user.email:
+            if db.query(User).filter(User.email == update_data['email']).first():
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Email already registered"
+                )
+        if update_data.get('username') and update_data['username'] != current_user.username:
+            if db.query(User).filter(User.username == update_data['username']).first():
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Username already taken"
+                )
+        
+        password = update_data.pop('password', None)
+        if password:
+            current_user.hashed_password = get_password_hash(password)
+        for field, value in update_data.items():
+            setattr(current_user, field, value)
+        
+        db.commit()
+        db.refresh(current_user)
+        
+        logger.info(f"User updated: {current_user.email}")
+        return current_user
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error updating user: {str(e)}")
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal server error"
+        )
+
 @router.post("/logout")
 async def logout():
     """Logout user (client should discard token)"""
@@ -6,6 +6,8 @@ from app.core.auth import get_current_active_user
 from app.models.models import User, Call, Lead
 from app.schemas.schemas import Call as CallSchema, CallCreate
 from app.services.twilio_service import TwilioService
+from app.services.call_context_cache import call_context_cache
+from app.services.llm_session_pool import llm_session_pool
 import logging
 
 logger = logging.getLogger(__name__)
@@ -38,9 +40,9 @@ async def start_call(
         if not twilio_service.validate_phone_number(phone_number):
             raise HTTPException(status_code=400, detail="Invalid phone number format")
         
-        # Initiate Twilio call
+        # Initiate Twilio call (may wait for the dialing rate limit, so keep it off the event loop)
         try:
-            call_sid = twilio_service.initiate_call(phone_number, call_data.lead_id)
+            call_sid = await twilio_service.initiate_call_async(phone_number, call_data.lead_id)
             logger.info(f"Twilio call initiated with SID: {call_sid}")
         except Exception as e:
             logger.error(f"Failed to initiate Twilio call: {str(e)}")
@@ -61,6 +63,8 @@ async def start_call(
         db.add(call)
         db.commit()
         db.refresh(call)
+        await call_context_cache.remember_async(call, db, lead=lead)
+        llm_session_pool.prewarm(call_sid)
         
         logger.info(f"Call started for lead {call_data.lead_id} by user {current_user.id}, SID: {call_sid}, Purpose: {call_data.purpose}")
         
@@ -1,18 +1,21 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from typing import List, Optional
+import asyncio
 from app.database.database import get_db
 from app.core.auth import get_current_active_user
 from app.models.models import User, Group, GroupCall, Call, Lead
 from app.schemas.schemas import GroupCall as GroupCallSchema, GroupCallCreate, GroupCallUpdate, GroupCallListResponse
-from app.services.twilio_service import TwilioService
+from app.services.dialer_service import dialer_service
+from app.services.dial_queue_service import DialQueueService
+from app.services.pacing_service import predictive_pacer
+from app.services.calling_window_service import calling_window_service
 import logging
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/group-calls", tags=["group-calls"])
 
-# Initialize Twilio service
-twilio_service = TwilioService()
+PACING_MODES = ["fixed", "predictive"]
 
 @router.post("/", response_model=GroupCallSchema)
 async def create_group_call(
@@ -31,8 +34,13 @@ async def create_group_call(
         if not group:
             raise HTTPException(status_code=404, detail="Group not found")
         
+        if group_call_data.pacing_mode and group_call_data.pacing_mode not in PACING_MODES:
+            raise HTTPException(status_code=400, detail=f"Pacing mode must be one of: {', '.join(PACING_MODES)}")
+        validate_calling_window(group_call_data)
+        
         # Check if group has leads
-        if not group.leads:
+        member_count = DialQueueService(db).count_group_members(group.id)
+        if not member_count:
             raise HTTPException(status_code=400, detail="Group has no leads to call")
         
         # Create the group call
@@ -42,7 +50,13 @@ async def create_group_call(
             purpose=group_call_data.purpose or "general",
             custom_prompt=group_call_data.custom_prompt,
             additional_notes=group_call_data.additional_notes,
-            total_leads=len(group.leads),
+            max_concurrent_calls=group_call_data.max_concurrent_calls,
+            pacing_mode=group_call_data.pacing_mode or "fixed",
+            max_attempts=group_call_data.max_attempts,
+            retry_backoff_seconds=group_call_data.retry_backoff_seconds,
+            calling_window_start_hour=group_call_data.calling_window_start_hour,
+            calling_window_end_hour=group_call_data.calling_window_end_hour,
+            total_leads=member_count,
             status="queued"
         )
         
@@ -138,10 +152,28 @@ async def update_group_call(
             group_call.custom_prompt = group_call_data.custom_prompt
         if group_call_data.additional_notes is not None:
             group_call.additional_notes = group_call_data.additional_notes
+        if group_call_data.max_concurrent_calls is not None:
+            group_call.max_concurrent_calls = group_call_data.max_concurrent_calls
+        if group_call_data.pacing_mode is not None:
+            if group_call_data.pacing_mode not in PACING_MODES:
+                raise HTTPException(status_code=400, detail=f"Pacing mode must be one of: {', '.join(PACING_MODES)}")
+            group_call.pacing_mode = group_call_data.pacing_mode
+        if group_call_data.max_attempts is not None:
+            group_call.max_attempts = group_call_data.max_attempts
+        if group_call_data.retry_backoff_seconds is not None:
+            group_call.retry_backoff_seconds = group_call_data.retry_backoff_seconds
+        validate_calling_window(group_call_data)
+        if group_call_data.calling_window_start_hour is not None:
+            group_call.calling_window_start_hour = group_call_data.calling_window_start_hour
+        if group_call_data.calling_window_end_hour is not None:
+            group_call.calling_window_end_hour = group_call_data.calling_window_end_hour
         
         db.commit()
         db.refresh(group_call)
         
+        # Let a running dialer pick up the new limits right away
+        dialer_service.notify(group_call.id)
+        
         return group_call
         
     except HTTPException:
@@ -169,12 +201,14 @@ async def start_group_call(
         if group_call.status != "queued":
             raise HTTPException(status_code=400, detail="Group call is not in queued status")
         
-        # Update status to in progress
+        # Queue every lead of the group, then mark the group call in progress;
+        # large groups take a while, so the batches are written off the event loop
+        await asyncio.to_thread(DialQueueService(db).enqueue_group_call, group_call)
         group_call.status = "in_progress"
         db.commit()
         
-        # Start the first call in the queue
-        await start_next_call_in_queue(group_call, db)
+        # Hand the queue to the dialer, which keeps the configured number of lines busy
+        dialer_service.start(group_call.id)
         
         logger.info(f"Group call {group_call_id} started by user {current_user.id}")
         return {"message": "Group call started successfully"}
@@ -207,6 +241,9 @@ async def pause_group_call(
         group_call.status = "paused"
         db.commit()
         
+        # Stop placing new calls; calls already in flight finish normally
+        await dialer_service.stop(group_call.id)
+        
         logger.info(f"Group call {group_call_id} paused by user {current_user.id}")
         return {"message": "Group call paused successfully"}
         
@@ -235,11 +272,13 @@ async def resume_group_call(
         if group_call.status != "paused":
             raise HTTPException(status_code=400, detail="Group call is not paused")
         
+        # Pick up leads added to the group while paused
+        await asyncio.to_thread(DialQueueService(db).enqueue_group_call, group_call)
         group_call.status = "in_progress"
         db.commit()
         
-        # Start the next call in the queue
-        await start_next_call_in_queue(group_call, db)
+        # Restart the dialer from the persisted queue
+        dialer_service.start(group_call.id)
         
         logger.info(f"Group call {group_call_id} resumed by user {current_user.id}")
         return {"message": "Group call resumed successfully"}
@@ -274,6 +313,8 @@ async def call_next_lead(
         
         if result:
             return {"message": "Next call initiated successfully"}
+        elif DialQueueService(db).pending_count(group_call.id) > 0:
+            return {"message": "All lines are busy; try again when a call finishes"}
         else:
             return {"message": "No more leads to call in this group"}
         
@@ -283,52 +324,24 @@ async def call_next_lead(
         logger.error(f"Error calling next lead in group call {group_call_id}: {str(e)}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
+def validate_calling_window(group_call_data) -> None:
+    """Reject calling window hours outside 0-23"""
+    for hour in (group_call_data.calling_window_start_hour, group_call_data.calling_window_end_hour):
+        if hour is not None and not 0 <= hour <= 23:
+            raise HTTPException(status_code=400, detail="Calling window hours must be between 0 and 23")
+
 async def start_next_call_in_queue(group_call: GroupCall, db: Session) -> bool:
-    """Start the next call in the group call queue"""
+    """Start the next call in the group call queue, within the group call's line limit"""
     try:
-        # Get the group with leads
-        group = db.query(Group).filter(Group.id == group_call.group_id).first()
-        if not group or not group.leads:
+        call = await dialer_service.dial_manually(group_call.id, db)
+        if call is None:
+            if (group_call.status == "in_progress"
+                    and dialer_service.count_active_calls(group_call.id, db) == 0
+                    and DialQueueService(db).pending_count(group_call.id) == 0):
+                group_call.status = "completed"
+                db.commit()
             return False
         
-        # Check if we've completed all calls
-        if group_call.current_lead_index >= len(group.leads):
-            group_call.status = "completed"
-            db.commit()
-            return False
-        
-        # Get the current lead to call
-        current_lead = group.leads[group_call.current_lead_index]
-        
-        # Create a call record
-        call = Call(
-            lead_id=current_lead.id,
-            user_id=group_call.user_id,
-            phone_number=current_lead.phone,
-            status="initiated",
-            purpose=group_call.purpose,
-            custom_prompt=group_call.custom_prompt,
-            additional_notes=group_call.additional_notes,
-            group_call_id=group_call.id
-        )
-        
-        db.add(call)
-        db.commit()
-        db.refresh(call)
-        
-        # Initiate Twilio call
-        try:
-            call_sid = twilio_service.initiate_call(current_lead.phone, current_lead.id)
-            call.call_sid = call_sid
-            db.commit()
-            
-            logger.info(f"Call initiated for lead {current_lead.id} in group call {group_call.id}")
-            
-        except Exception as e:
-            logger.error(f"Failed to initiate Twilio call: {str(e)}")
-            call.status = "failed"
-            db.commit()
-        
         return True
         
     except Exception as e:
@@ -360,6 +373,14 @@ async def get_queue_status(
             Call.group_call_id == group_call_id,
             Call.status.in_(["completed", "failed"])
         ).count()
+        active_calls = dialer_service.count_active_calls(group_call_id, db)
+        queued_calls = DialQueueService(db).pending_count(group_call_id)
+        # Leads done for good; retries don't count again, so this stays within total_leads
+        finished_leads = DialQueueService(db).finished_count(group_call_id)
+        open_zones = calling_window_service.open_time_zones(group_call)
+        outside_window = 0
+        if open_zones is not None:
+            outside_window = queued_calls - DialQueueService(db).pending_count(group_call_id, open_zones)
         
         return {
             "group_call_id": group_call.id,
@@ -369,8 +390,16 @@ async def get_queue_status(
             "total_leads": group_call.total_leads,
             "total_calls": total_calls,
             "completed_calls": completed_calls,
-            "remaining_calls": group_call.total_leads - group_call.current_lead_index,
-            "progress_percentage": (group_call.current_lead_index / group_call.total_leads * 100) if group_call.total_leads > 0 else 0
+            "active_calls": active_calls,
+            "queued_calls": queued_calls,
+            "outside_calling_window": outside_window,
+            "calling_window": calling_window_service.get_window(group_call) if open_zones is not None else None,
+            "max_concurrent_calls": dialer_service.get_concurrency_limit(group_call, db),
+            "dialer_running": dialer_service.is_running(group_call_id),
+            "pacing_mode": group_call.pacing_mode or "fixed",
+            "pacing": predictive_pacer.get_metrics(group_call.user_id, db) if group_call.pacing_mode == "predictive" else None,
+            "remaining_calls": queued_calls,
+            "progress_percentage": (finished_leads / group_call.total_leads * 100) if group_call.total_leads > 0 else 0
         }
         
     except HTTPException:
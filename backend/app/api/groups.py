@@ -5,6 +5,7 @@ from app.database.database import get_db
 from app.core.auth import get_current_active_user
 from app.models.models import User, Group, Lead, lead_groups
 from app.schemas.schemas import Group as GroupSchema, GroupCreate, GroupUpdate, GroupListResponse
+from app.services.dial_queue_service import DialQueueService
 import logging
 
 logger = logging.getLogger(__name__)
@@ -133,6 +134,8 @@ async def update_group(
         
         # Update leads if specified
         if group_data.lead_ids is not None:
+            old_lead_ids = {lead.id for lead in group.leads}
+            
             # Clear existing leads
             group.leads.clear()
             
@@ -149,6 +152,13 @@ async def update_group(
                 # Add new leads to group
                 for lead in leads:
                     group.leads.append(lead)
+            
+            # Carry membership changes over to running group calls
+            db.flush()
+            new_lead_ids = set(group_data.lead_ids)
+            DialQueueService(db).sync_group_membership(
+                group.id, new_lead_ids - old_lead_ids, old_lead_ids - new_lead_ids
+            )
         
         db.commit()
         db.refresh(group)
@@ -227,6 +237,8 @@ async def add_lead_to_group(
         
         # Add lead to group
         group.leads.append(lead)
+        db.flush()
+        DialQueueService(db).sync_group_membership(group.id, added_lead_ids=[lead.id])
         db.commit()
         
         logger.info(f"Lead {lead_id} added to group '{group.name}' by user {current_user.id}")
@@ -271,6 +283,8 @@ async def remove_lead_from_group(
         
         # Remove lead from group
         group.leads.remove(lead)
+        db.flush()
+        DialQueueService(db).sync_group_membership(group.id, removed_lead_ids=[lead.id])
         db.commit()
         
         logger.info(f"Lead {lead_id} removed from group '{group.name}' by user {current_user.id}")
@@ -44,6 +44,36 @@ async def database_health_check(db: Session = Depends(get_db)):
             "timestamp": datetime.utcnow()
         }
 
+@router.get("/llm-sessions")
+async def llm_sessions_health_check():
+    """Pre-warmed LLM session pool and time-to-first-audio, warm vs cold"""
+    from app.services.llm_session_pool import llm_session_pool
+    return {
+        "status": "healthy",
+        "llm_sessions": llm_session_pool.stats(),
+        "timestamp": datetime.utcnow()
+    }
+
+@router.get("/call-status-ingest")
+async def call_status_ingest_health_check():
+    """Status callbacks waiting to be written and batch flush counters"""
+    from app.services.call_status_ingestor import call_status_ingestor
+    return {
+        "status": "healthy",
+        "call_status_ingest": call_status_ingestor.stats(),
+        "timestamp": datetime.utcnow()
+    }
+
+@router.get("/lead-imports")
+async def lead_imports_health_check():
+    """Background lead import workers in this process and their counters"""
+    from app.services.lead_import_service import lead_import_workers
+    return {
+        "status": "healthy",
+        "lead_imports": lead_import_workers.stats(),
+        "timestamp": datetime.utcnow()
+    }
+
 @router.get("/ai")
 async def ai_health_check():
     """Check AI service health"""
@@ -0,0 +1,93 @@
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Query
+from sqlalchemy.orm import Session
+from typing import List
+from app.database.database import get_db
+from app.core.auth import get_current_active_user
+from app.models.models import User
+from app.services.lead_import_service import LeadImportJobService, lead_import_workers
+from app.services.lead_service import lead_file_format
+from app.schemas.schemas import LeadImportJobResponse
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+router = APIRouter(prefix="/lead-imports", tags=["leads"])
+
+@router.post("/", response_model=LeadImportJobResponse, status_code=202)
+async def create_lead_import(
+    file: UploadFile = File(...),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Queue a CSV, Parquet or Arrow file for background import; poll the returned job for progress"""
+    try:
+        if not lead_file_format(file.filename):
+            raise HTTPException(status_code=400, detail="File must be a CSV, Parquet or Arrow file")
+
+        await file.seek(0)
+        job_service = LeadImportJobService(db)
+        job = await asyncio.to_thread(job_service.create_job, file.file, file.filename, current_user.id)
+        lead_import_workers.notify()
+        return job_service.describe(job)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error queueing lead import: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+@router.get("/", response_model=List[LeadImportJobResponse])
+async def list_lead_imports(
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Recent lead import jobs, newest first"""
+    job_service = LeadImportJobService(db)
+    return [job_service.describe(job) for job in job_service.list_jobs(current_user.id, limit)]
+
+@router.get("/{job_id}", response_model=LeadImportJobResponse)
+async def get_lead_import(
+    job_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Progress of a lead import job: rows processed and imported, errors and throughput"""
+    job_service = LeadImportJobService(db)
+    job = job_service.get_job(job_id, current_user.id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Import job not found")
+    return job_service.describe(job)
+
+@router.post("/{job_id}/cancel", response_model=LeadImportJobResponse)
+async def cancel_lead_import(
+    job_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Cancel a lead import job; leads committed so far are kept"""
+    job_service = LeadImportJobService(db)
+    try:
+        job = job_service.cancel_job(job_id, current_user.id)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if not job:
+        raise HTTPException(status_code=404, detail="Import job not found")
+    return job_service.describe(job)
+
+@router.post("/{job_id}/resume", response_model=LeadImportJobResponse)
+async def resume_lead_import(
+    job_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Resume a canceled or failed lead import job from its last committed chunk"""
+    job_service = LeadImportJobService(db)
+    try:
+        job = job_service.resume_job(job_id, current_user.id)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if not job:
+        raise HTTPException(status_code=404, detail="Import job not found")
+    lead_import_workers.notify()
+    return job_service.describe(job)
@@ -1,16 +1,25 @@
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from app.database.database import get_db
 from app.core.auth import get_current_active_user
 from app.models.models import User
 from app.services.lead_service import LeadService
-from app.schemas.schemas import Lead, LeadCreate, LeadUpdate, LeadListResponse, FileUploadResponse
+from app.schemas.schemas import Lead, LeadCreate, LeadUpdate, LeadListResponse, LeadImportJobResponse
+from app.api.lead_imports import create_lead_import
+import asyncio
 import logging
+import tempfile
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/leads", tags=["leads"])
 
+EXPORT_MEDIA_TYPES = {
+    "parquet": "application/vnd.apache.parquet",
+    "arrow": "application/vnd.apache.arrow.file",
+}
+
 @router.post("/", response_model=Lead)
 async def create_lead(
     lead_data: LeadCreate, 
@@ -52,6 +61,38 @@ async def get_leads(
         logger.error(f"Error getting leads: {str(e)}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
+@router.get("/export")
+async def export_leads(
+    format: str = Query("parquet", pattern="^(parquet|arrow)$"),
+    status: Optional[str] = Query(None),
+    priority: Optional[int] = Query(None),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Export leads as a Parquet or Arrow file"""
+    try:
+        # Spills to disk past 32 MB, so large exports don't sit in memory
+        file = tempfile.SpooledTemporaryFile(max_size=32 * 1024 * 1024)
+        lead_service = LeadService(db)
+        await asyncio.to_thread(lead_service.export_leads, current_user.id, file, format, status, priority)
+        file.seek(0)
+    except Exception as e:
+        logger.error(f"Error exporting leads: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+    def content():
+        try:
+            while chunk := file.read(1024 * 1024):
+                yield chunk
+        finally:
+            file.close()
+
+    return StreamingResponse(
+        content(),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="leads.{format}"'}
+    )
+
 @router.get("/{lead_id}", response_model=Lead)
 async def get_lead(
     lead_id: int, 
@@ -110,35 +151,18 @@ async def delete_lead(
         logger.error(f"Error deleting lead {lead_id}: {str(e)}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
-@router.post("/upload", response_model=FileUploadResponse)
+@router.post("/upload", response_model=LeadImportJobResponse, status_code=202)
 async def upload_leads_csv(
     file: UploadFile = File(...), 
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
-    """Upload leads from CSV file"""
-    try:
-        # Validate file type
-        if not file.filename.endswith('.csv'):
-            raise HTTPException(status_code=400, detail="File must be a CSV")
-        
-        # Read file content
-        content = await file.read()
-        
-        lead_service = LeadService(db)
-        result = lead_service.import_leads_from_csv(content, current_user.id)
-        
-        return FileUploadResponse(
-            filename=file.filename,
-            imported_count=result["imported_count"],
-            errors=result["errors"]
-        )
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"Error uploading leads CSV: {str(e)}")
-        raise HTTPException(status_code=500, detail="Internal server error")
+    """Upload leads from a CSV, Parquet or Arrow file.
+
+    The file is stored and imported by the background import workers, like
+    POST /lead-imports/; poll /lead-imports/{id} with the returned job id.
+    """
+    return await create_lead_import(file, db, current_user)
 
 @router.get("/statistics")
 async def get_lead_statistics(
@@ -6,6 +6,7 @@ from typing import Optional
 from app.database.database import get_db
 from app.models.models import Lead, Call, SystemStatus, Group, GroupCall
 from app.schemas.schemas import DashboardStats, CallStats, LeadStats, GroupStats, QueueStats
+from app.services.rate_limiter import dial_rate_limiter
 import logging
 
 logger = logging.getLogger(__name__)
@@ -81,6 +82,16 @@ async def get_queue_stats(db: Session = Depends(get_db)):
         logger.error(f"Error getting queue stats: {str(e)}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
+@router.get("/rate-limiter")
+async def get_rate_limiter_stats():
+    """Get Twilio dialing rate limiter metrics"""
+    try:
+        return dial_rate_limiter.get_metrics()
+        
+    except Exception as e:
+        logger.error(f"Error getting rate limiter stats: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
 def get_call_statistics(db: Session, start_date: datetime, end_date: datetime) -> CallStats:
     """Calculate call statistics for the given date range"""
     try:
@@ -1,11 +1,11 @@
-from fastapi import APIRouter, Request, HTTPException, Depends
-from sqlalchemy.orm import Session
-from app.database.database import get_db
-from app.models.models import Call, Lead
+from fastapi import APIRouter, Request, HTTPException
 from app.services.twilio_service import TwilioService
 from app.services.ai_service import AIService
+from app.services.dialer_service import TERMINAL_CALL_STATUSES
+from app.services.llm_session_pool import llm_session_pool
+from app.services.twiml_service import streams_twiml_for_call
+from app.services.call_status_ingestor import call_status_ingestor
 import logging
-from datetime import datetime
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/webhook", tags=["webhooks"])
@@ -15,17 +15,19 @@ twilio_service = TwilioService()
 ai_service = AIService()
 
 @router.post("/")
-async def start_call():
+async def start_call(request: Request):
     """Return TwiML template for call handling (same as simple_caller)"""
     try:
         from fastapi.responses import HTMLResponse
-        return HTMLResponse(content=open("templates/streams.xml").read(), media_type="application/xml")
+        form_data = await request.form()
+        twiml_content = await streams_twiml_for_call(form_data.get("CallSid"))
+        return HTMLResponse(content=twiml_content, media_type="application/xml")
     except Exception as e:
         logger.error(f"Error returning TwiML template: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to return TwiML template")
 
 @router.post("/call-start")
-async def call_start_webhook(request: Request, db: Session = Depends(get_db)):
+async def call_start_webhook(request: Request):
     """Handle Twilio call start webhook"""
     try:
         form_data = await request.form()
@@ -34,64 +36,50 @@ async def call_start_webhook(request: Request, db: Session = Depends(get_db)):
         
         logger.info(f"Call start webhook received - SID: {call_sid}, Lead ID: {lead_id}")
         
-        if lead_id:
-            # Update call status in database
-            call = db.query(Call).filter(Call.call_sid == call_sid).first()
-            if call:
-                call.status = "ringing"
-                call.updated_at = datetime.utcnow()
-                db.commit()
-                logger.info(f"Updated call {call_sid} status to ringing")
+        if lead_id and call_sid:
+            # Through the state machine, so this can't move an answered or
+            # finished call back to ringing
+            call_status_ingestor.submit(call_sid, "ringing")
         
-        # Return simple TwiML template (lead info will be fetched via callSid in WebSocket)
+        # Return the streams TwiML; the call context travels in its <Parameter>s
         from fastapi.responses import HTMLResponse
         
-        twiml_content = """<?xml version="1.0" encoding="UTF-8"?>
-<Response>
-    <Connect>
-        <Stream url="wss://excited-alpaca-smart.ngrok-free.app/api/ws" />
-    </Connect>
-    <!-- Keep the call active -->
-    <Pause length="3600"/>
-</Response>"""
-        
-        return HTMLResponse(content=twiml_content, media_type="application/xml")
+        return HTMLResponse(content=await streams_twiml_for_call(call_sid), media_type="application/xml")
         
     except Exception as e:
         logger.error(f"Error in call start webhook: {str(e)}")
         raise HTTPException(status_code=500, detail="Webhook processing failed")
 
 @router.post("/call-status")
-async def call_status_webhook(request: Request, db: Session = Depends(get_db)):
-    """Handle Twilio call status webhook"""
+async def call_status_webhook(request: Request):
+    """Handle Twilio call status webhook.
+    
+    Acknowledged as soon as the event is queued; call_status_ingestor writes
+    it to the calls table with the next batch.
+    """
     try:
         form_data = await request.form()
         call_sid = form_data.get("CallSid")
         call_status = form_data.get("CallStatus")
         call_duration = form_data.get("CallDuration")
+        sequence_number = form_data.get("SequenceNumber")
         
         logger.info(f"Call status webhook - SID: {call_sid}, Status: {call_status}, Duration: {call_duration}")
         
-        # Update call status in database
-        call = db.query(Call).filter(Call.call_sid == call_sid).first()
-        if call:
-            call.status = call_status
-            if call_duration:
-                call.duration = int(call_duration)
-            call.updated_at = datetime.utcnow()
-            
-            # Set outcome based on status
-            if call_status == "completed":
-                call.outcome = "completed"
-            elif call_status == "failed":
-                call.outcome = "failed"
-            elif call_status == "busy":
-                call.outcome = "busy"
-            elif call_status == "no-answer":
-                call.outcome = "no-answer"
-            
-            db.commit()
-            logger.info(f"Updated call {call_sid} status to {call_status}")
+        # Duplicates and late out-of-order callbacks are acknowledged and dropped
+        if not call_sid or not call_status or not call_status_ingestor.submit(
+            call_sid, call_status,
+            int(call_duration) if call_duration else None,
+            int(sequence_number) if sequence_number else None
+        ):
+            return {"status": "success"}
+        
+        # Open the LLM session while the phone rings; drop it if the call never connects.
+        # The cached call context is dropped by the ingestor with the batch.
+        if call_status == "ringing":
+            llm_session_pool.prewarm(call_sid)
+        elif call_status in TERMINAL_CALL_STATUSES:
+            await llm_session_pool.discard(call_sid)
         
         return {"status": "success"}
         
@@ -1,9 +1,11 @@
 import json
 import logging
+import time
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 from app.services.bot_service import run_bot
-from app.services.lead_service import LeadService
-from app.database.database import get_db
+from app.services.call_context_cache import call_context_cache
+from app.services.llm_session_pool import llm_session_pool
+from app.services.twiml_service import verify_stream_parameters
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -24,57 +26,37 @@ async def websocket_endpoint(websocket: WebSocket):
         logger.info(f"WebSocket connection accepted for stream: {stream_sid}, call: {call_sid}")
         print("CALLLL DATA : ", call_data, "WEBSOCKE URL : ", websocket.url)
         
-        # Get lead information and call purpose from database using callSid
-        lead_info = None
-        purpose = "general"
-        custom_prompt = None
-        additional_notes = None
-        try:
-            db = next(get_db())
-            from app.models.models import Call
-            
-            call_record = db.query(Call).filter(Call.call_sid == call_sid).first()
-            if call_record and call_record.lead_id:
-                # Purpose and custom fields from call record
-                purpose = getattr(call_record, "purpose", "general") or "general"
-                custom_prompt = getattr(call_record, "custom_prompt", None)
-                additional_notes = getattr(call_record, "additional_notes", None)
-
-                # Lead details
-                lead_service = LeadService(db)
-                lead = lead_service.get_lead_details(call_record.lead_id)
-                if lead:
-                    lead_info = {
-                        "id": lead.id,
-                        "name": lead.name,
-                        "company": lead.company,
-                        "phone": lead.phone,
-                        "email": lead.email,
-                        "title": lead.title,
-                        "priority": lead.priority,
-                        "notes": lead.notes,
-                    }
-                    logger.info(
-                        f"Found lead info via callSid: {lead.name} from {lead.company}; purpose={purpose}"
-                    )
-                    print(f"LEAD INFO FOUND: {lead_info}")
-                else:
-                    logger.warning(f"Lead not found for lead_id: {call_record.lead_id}")
-            else:
-                logger.warning(f"Call record not found for callSid: {call_sid}")
-                
-        except Exception as e:
-            logger.error(f"Error getting lead info via callSid: {str(e)}")
-            # Continue without lead info if there's an error
+        connected_at = time.perf_counter()
+        
+        # Signed call parameters from the TwiML <Stream>: the call id, so a
+        # cache miss is a primary-key lookup
+        parameters = verify_stream_parameters(call_sid, call_data["start"].get("customParameters"))
+        call_id = int(parameters["call_id"]) if parameters and parameters["call_id"] else None
+        
+        # Attach to the LLM session opened while the phone was ringing; without
+        # one, take the lead and call purpose cached at dial time
+        prewarmed = await llm_session_pool.claim(call_sid)
+        if prewarmed:
+            logger.info(f"Using pre-warmed LLM session for call: {call_sid}")
+            call_context = prewarmed.context
+        else:
+            call_context = await call_context_cache.get_async(call_sid, call_id)
+        if call_context["lead_info"]:
+            print(f"LEAD INFO FOUND: {call_context['lead_info']}")
         
         # Run the bot with lead context and purpose
         await run_bot(
             websocket,
             stream_sid,
-            lead_info,
-            purpose=purpose,
-            custom_prompt=custom_prompt,
-            additional_notes=additional_notes,
+            call_context["lead_info"],
+            purpose=call_context["purpose"],
+            custom_prompt=call_context["custom_prompt"],
+            additional_notes=call_context["additional_notes"],
+            system_instruction=call_context["system_instruction"],
+            call_id=call_id or call_context.get("call_id"),
+            llm=prewarmed.llm if prewarmed else None,
+            connected_at=connected_at,
+            on_first_audio=lambda ttfa: llm_session_pool.record_ttfa(ttfa, prewarmed is not None),
         )
         
     except WebSocketDisconnect:
@@ -27,11 +27,95 @@ class Settings(BaseSettings):
     gemini_api_key: Optional[str] = None
     gemini_model: str = "gemini-1.5-flash"
     
+    # Voice pipeline
+    vad_preload_on_startup: bool = True  # Load the Silero VAD model at boot instead of on the first call
+    vad_session_pool_size: int = 2  # Shared ONNX sessions the per-call VAD analyzers are spread over
+    llm_prewarm_enabled: bool = True  # Open the Gemini Live session while the phone rings
+    llm_prewarm_ttl_seconds: float = 90.0  # Close pre-warmed sessions nobody claimed after this long
+    llm_prewarm_max_sessions: int = 100  # Cap on sessions open ahead of their media stream
+    llm_prewarm_claim_wait_seconds: float = 5.0  # How long a new stream waits for a handshake in flight
+    call_context_cache_backend: str = "auto"  # auto, database, local
+    call_context_cache_ttl_seconds: float = 600.0  # Cached lead / purpose / instruction per call SID
+    call_context_cache_max_entries: int = 10000  # Contexts kept in process per worker
+    transcript_persistence_enabled: bool = True  # Save live call transcripts to conversation_messages
+    transcript_flush_interval_seconds: float = 2.0  # Transcript lines are bulk-inserted this often
+    transcript_flush_batch_size: int = 100  # ...or as soon as this many lines are waiting
+    transcript_buffer_max_messages: int = 500  # Unwritten lines kept per call before the oldest are dropped
+    transcript_write_max_attempts: int = 5  # Failed writes of a call's lines before they are dropped
+    
     # Twilio Configuration
     twilio_account_sid: Optional[str] = None
     twilio_auth_token: Optional[str] = None
     twilio_phone_number: Optional[str] = None
     webhook_base_url: str = "https://excited-alpaca-smart.ngrok-free.app"
+    media_stream_url: Optional[str] = None  # Defaults to wss://<webhook_base_url host>/api/ws
+    stream_parameter_secret: Optional[str] = None  # Signs TwiML <Stream> parameters (defaults to secret_key)
+    twiml_template_dir: str = "templates"  # TwiML templates, compiled once at startup
+    twiml_reload_interval_seconds: float = 2.0  # How often changed templates are picked up (0 disables)
+    twilio_api_base_url: Optional[str] = None  # Send REST calls elsewhere (local stand-in / emulator)
+    twilio_http_timeout_seconds: float = 15.0
+    twilio_http_max_connections: int = 20  # Pooled connections used by async dials
+    twilio_http_keepalive_connections: int = 10
+    
+    # Lead import
+    lead_import_batch_size: int = 5000  # Phones per duplicate lookup and rows per bulk insert
+    lead_import_chunk_rows: int = 50000  # Rows read and committed at a time when streaming an upload
+    lead_import_max_errors: int = 1000  # Row errors listed in an upload response (the rest are counted)
+    lead_import_workers: int = 2  # Background import jobs run at once per process
+    lead_import_upload_dir: str = "uploads/lead_imports"  # Where job uploads are stored (shared by every worker)
+    lead_import_poll_interval_seconds: float = 5.0  # How often idle workers look for queued jobs
+    lead_import_stale_seconds: int = 300  # A running job without progress for this long is taken over
+    lead_import_file_retention_hours: int = 72  # Uploads of failed/canceled jobs are kept this long for resume
+    
+    # Lead search
+    lead_search_backend: str = "auto"  # auto, trigram (PostgreSQL pg_trgm), basic
+    
+    # Group call dialer
+    dialer_concurrent_calls: int = 3  # Default lines per group call (overridable per user / group call)
+    dialer_max_concurrent_calls: int = 20  # Hard ceiling for any single group call
+    dialer_poll_interval_seconds: float = 5.0  # How often a running group call re-checks free slots
+    dialer_call_timeout_seconds: int = 3600  # Calls older than this no longer hold a slot
+    dialer_resume_on_startup: bool = True  # Restart loops for in-progress group calls on boot
+    dialer_discovery_interval_seconds: float = 30.0  # Join group calls started on other workers (0 disables)
+    dial_queue_enqueue_batch_size: int = 1000  # Group members read per keyset page when queueing
+    dial_queue_claim_timeout_seconds: int = 300  # Claims with no call SID after this long go back to pending
+    call_status_flush_interval_seconds: float = 0.5  # Status callbacks are written in batches this often
+    call_status_flush_batch_size: int = 200  # ...or as soon as this many calls have updates waiting
+    call_status_dedup_max_entries: int = 50000  # Recent callbacks / call states remembered in memory
+    call_status_event_retention_hours: float = 48.0  # How long applied callbacks are kept for dedup
+    call_status_write_max_attempts: int = 5  # Writes of a callback before it is given up on
+    call_status_write_backoff_seconds: float = 1.0  # Wait before rewriting a failed callback; doubles each time
+    
+    # Retries for busy / no-answer outcomes (group calls can override)
+    retry_max_attempts: int = 3  # Total dial attempts per lead, including the first
+    retry_backoff_seconds: int = 900  # Delay before the first retry; doubles for each later one
+    retry_backoff_max_seconds: int = 86400
+    
+    # Calling windows: leads are only dialed between these local hours, with
+    # the lead's zone taken from the phone prefix (group calls can override)
+    calling_window_enabled: bool = True
+    calling_window_start_hour: int = 9
+    calling_window_end_hour: int = 21  # Exclusive; equal start/end means all day
+    calling_default_time_zone: str = "America/New_York"  # For numbers whose prefix isn't in the table
+    
+    # Predictive pacing (group calls with pacing_mode="predictive")
+    pacing_window_calls: int = 200  # Recent finished calls used for answer rate / mean duration
+    pacing_min_samples: int = 20  # Below this, use the default answer rate
+    pacing_default_answer_rate: float = 0.3
+    pacing_min_answer_rate: float = 0.05  # Floor so a bad streak can't explode the dial count
+    pacing_default_call_seconds: float = 90.0
+    pacing_ring_seconds: float = 20.0  # Typical time from dial to answer / give-up
+    pacing_max_dial_ratio: float = 3.0  # Never keep more than capacity * ratio calls in flight
+    pacing_aggressiveness: float = 0.7  # 1.0 dials for the expected free bots; lower over-dials less
+    pacing_refresh_seconds: float = 60.0  # Reload outcome history from the calls table
+    
+    # Twilio dialing rate limits (calls per second, shared across processes)
+    twilio_account_cps: float = 1.0
+    twilio_account_burst: int = 1
+    twilio_number_cps: float = 1.0
+    twilio_number_burst: int = 1
+    dial_rate_limit_backend: str = "auto"  # auto, database, local
+    dial_rate_limit_max_wait_seconds: float = 600.0  # Give up on a queued dial after this long
     
     # Google Cloud Configuration (for speech-to-text and text-to-speech)
     google_cloud_project_id: Optional[str] = None
@@ -1,14 +1,41 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, Float, ForeignKey, UniqueConstraint, Table
+from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, Float, ForeignKey, UniqueConstraint, Index, Table, literal_column
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database.database import Base
 
+# Characters dropped from a lead phone for prefix search
+LEAD_PHONE_FORMATTING = "+- ()."
+
+
+def _sql_string(value: str):
+    # Inline rather than bound, so queries match the index expressions on SQLite too
+    return literal_column(f"'{value}'", String)
+
+
+def phone_digits_expression(phone):
+    """Lead phone without formatting characters, for prefix search"""
+    for character in LEAD_PHONE_FORMATTING:
+        phone = func.replace(phone, _sql_string(character), _sql_string(""), type_=String)
+    return phone
+
+
+def search_text_expression(name, company, email):
+    """Lowercased name, company and email, for substring search"""
+    return func.lower(
+        func.coalesce(name, _sql_string("")) + _sql_string(" ")
+        + func.coalesce(company, _sql_string("")) + _sql_string(" ")
+        + func.coalesce(email, _sql_string("")),
+        type_=Text
+    )
+
 # Association table for many-to-many relationship between leads and groups
 lead_groups = Table(
     'lead_groups',
     Base.metadata,
     Column('lead_id', Integer, ForeignKey('leads.id'), primary_key=True),
-    Column('group_id', Integer, ForeignKey('groups.id'), primary_key=True)
+    Column('group_id', Integer, ForeignKey('groups.id'), primary_key=True),
+    # Members of a group in lead_id order, for keyset paging
+    Index('ix_lead_groups_group_lead', 'group_id', 'lead_id')
 )
 
 class User(Base):
@@ -25,6 +52,7 @@ class User(Base):
     country_code = Column(String(10))  # New field
     is_active = Column(Boolean, default=True)
     is_superuser = Column(Boolean, default=False)
+    max_concurrent_calls = Column(Integer, nullable=True)  # Per-user dialer line limit, falls back to settings
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
@@ -54,8 +82,24 @@ class Lead(Base):
     # Composite unique constraint on phone and user_id
     __table_args__ = (
         UniqueConstraint('phone', 'user_id', name='uq_lead_phone_user'),
+        # Expression indexes rather than stored columns, so adding them to a
+        # large leads table doesn't rewrite it. A user's leads by phone digits
+        # (pattern ops so PostgreSQL can use it for LIKE 'prefix%'):
+        Index('ix_leads_user_phone_digits', user_id, phone_digits_expression(phone).label('phone_digits'),
+              postgresql_ops={'phone_digits': 'text_pattern_ops'}),
+        # Substring search with pg_trgm, on phone digits and on text; SQLite scans instead
+        Index('ix_leads_phone_digits_trgm', phone_digits_expression(phone).label('phone_digits'),
+              postgresql_using='gin', postgresql_ops={'phone_digits': 'gin_trgm_ops'}).ddl_if(dialect='postgresql'),
+        Index('ix_leads_search_text_trgm', search_text_expression(name, company, email).label('search_text'),
+              postgresql_using='gin', postgresql_ops={'search_text': 'gin_trgm_ops'}).ddl_if(dialect='postgresql'),
     )
 
+
+# Expressions the lead search indexes are built on
+lead_phone_digits = phone_digits_expression(Lead.phone)
+lead_search_text = search_text_expression(Lead.name, Lead.company, Lead.email)
+
+
 class Group(Base):
     """Group model for organizing leads"""
     __tablename__ = "groups"
@@ -110,9 +154,16 @@ class GroupCall(Base):
     purpose = Column(String(50), default="general")  # feedback, upsell, custom_purpose
     custom_prompt = Column(Text)  # For custom purpose calls
     additional_notes = Column(Text)  # Additional notes for the group call
-    current_lead_index = Column(Integer, default=0)  # Track current position in queue
+    current_lead_index = Column(Integer, default=0)  # Number of leads dialed so far
+    last_lead_id = Column(Integer, nullable=True)  # Keyset cursor: highest group member lead_id already queued
     total_leads = Column(Integer, default=0)  # Total number of leads in group
     completed_calls = Column(Integer, default=0)  # Number of completed calls
+    max_concurrent_calls = Column(Integer, nullable=True)  # Lines kept in flight, falls back to user/settings
+    pacing_mode = Column(String(20), default="fixed")  # fixed, predictive
+    max_attempts = Column(Integer, nullable=True)  # Dial attempts per lead for busy/no-answer, falls back to settings
+    retry_backoff_seconds = Column(Integer, nullable=True)  # Base retry delay (doubles per attempt), falls back to settings
+    calling_window_start_hour = Column(Integer, nullable=True)  # Lead-local hour dialing may start, falls back to settings
+    calling_window_end_hour = Column(Integer, nullable=True)  # Lead-local hour dialing stops (exclusive)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
@@ -120,6 +171,104 @@ class GroupCall(Base):
     group = relationship("Group", back_populates="group_calls")
     user = relationship("User", back_populates="group_calls")
     calls = relationship("Call", back_populates="group_call")
+    dial_queue_entries = relationship("DialQueueEntry", back_populates="group_call")
+
+class DialQueueEntry(Base):
+    """Dial queue model with one row per lead waiting to be dialed in a group call"""
+    __tablename__ = "dial_queue"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    group_call_id = Column(Integer, ForeignKey("group_calls.id"), nullable=False)
+    lead_id = Column(Integer, ForeignKey("leads.id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"))
+    phone_number = Column(String(20), nullable=False)
+    status = Column(String(20), default="pending")  # pending, scheduled (retry not yet due), parked (zone outside the calling window), dialed, failed
+    attempts = Column(Integer, default=0)  # Dial attempts made so far
+    next_attempt_at = Column(DateTime(timezone=True), server_default=func.now())  # Not dialed before this time
+    time_zone = Column(String(64), nullable=True)  # Lead's zone from the phone prefix, e.g. America/Chicago
+    priority = Column(Integer, default=3)  # Copy of Lead.priority (5 = highest) so ordering stays on one index
+    last_attempt_at = Column(DateTime(timezone=True), server_default=func.now())  # Last dial, or enqueue time if never dialed
+    call_id = Column(Integer, ForeignKey("calls.id"), nullable=True)  # Latest call placed for this entry
+    claimed_by = Column(String(100))  # Worker that claimed the entry (host:pid)
+    claimed_at = Column(DateTime(timezone=True))
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    
+    # Relationships
+    group_call = relationship("GroupCall", back_populates="dial_queue_entries")
+    lead = relationship("Lead")
+    call = relationship("Call")
+    
+    __table_args__ = (
+        UniqueConstraint('group_call_id', 'lead_id', name='uq_dial_queue_group_call_lead'),
+        Index('ix_dial_queue_due', 'group_call_id', 'status', 'next_attempt_at'),
+        Index('ix_dial_queue_zone_due', 'group_call_id', 'status', 'time_zone', 'next_attempt_at'),
+        # schedule_retry and finished_count look entries up by their call
+        Index('ix_dial_queue_call_id', 'call_id'),
+    )
+
+# Claim order: highest priority first, then the lead untouched the longest
+Index(
+    'ix_dial_queue_priority',
+    DialQueueEntry.group_call_id,
+    DialQueueEntry.status,
+    DialQueueEntry.priority.desc(),
+    DialQueueEntry.last_attempt_at,
+    DialQueueEntry.id
+)
+
+class RateLimitBucket(Base):
+    """Token bucket state shared by every process that dials through Twilio"""
+    __tablename__ = "rate_limit_buckets"
+    
+    key = Column(String(100), primary_key=True)  # e.g. account:AC..., number:+1...
+    tokens = Column(Float, nullable=False)
+    refilled_at = Column(Float, nullable=False)  # Unix timestamp of the last refill
+
+class CallContextEntry(Base):
+    """Cached call context (lead, purpose, system instruction) shared by every worker"""
+    __tablename__ = "call_contexts"
+    
+    call_sid = Column(String(100), primary_key=True)
+    data = Column(Text, nullable=False)  # JSON
+    expires_at = Column(Float, nullable=False, index=True)  # Unix timestamp
+
+class CallStatusEventEntry(Base):
+    """Status callback already applied to its call, so a duplicate delivered to any worker is ignored"""
+    __tablename__ = "call_status_events"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    call_sid = Column(String(255), nullable=False)
+    status = Column(String(50), nullable=False)
+    sequence_number = Column(Integer, nullable=False, default=-1)  # Twilio SequenceNumber, -1 when absent
+    received_at = Column(Float, nullable=False, index=True)  # Unix timestamp
+    
+    __table_args__ = (
+        UniqueConstraint('call_sid', 'status', 'sequence_number', name='uq_call_status_event'),
+    )
+
+class LeadImportJob(Base):
+    """Background CSV lead import, with progress committed alongside each chunk of leads"""
+    __tablename__ = "lead_import_jobs"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    filename = Column(String(255), nullable=False)  # Name of the uploaded file
+    file_path = Column(String(500), nullable=False)  # Stored copy of the upload, removed once imported
+    status = Column(String(20), default="queued", index=True)  # queued, running, completed, failed, canceled
+    rows_processed = Column(Integer, default=0)  # CSV rows committed so far; a resumed job skips these
+    rows_imported = Column(Integer, default=0)
+    error_count = Column(Integer, default=0)
+    errors = Column(Text)  # JSON list of the first row errors (up to lead_import_max_errors)
+    imported_since = Column(Integer, nullable=True)  # Highest lead id when the job first started
+    processing_seconds = Column(Float, default=0.0)  # Time spent importing chunks, across runs
+    failure = Column(Text)  # Why the job failed
+    claimed_by = Column(String(100))  # Worker running the job (host:pid)
+    heartbeat_at = Column(DateTime(timezone=True))  # Last progress from that worker
+    started_at = Column(DateTime(timezone=True))
+    finished_at = Column(DateTime(timezone=True))
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
 class ConversationMessage(Base):
     """Conversation message model for storing AI conversation history"""
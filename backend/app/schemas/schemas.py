@@ -1,6 +1,7 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field, field_validator
 from typing import Optional, List
 from datetime import datetime
+from app.core.config import settings
 
 # Authentication Schemas
 class UserBase(BaseModel):
@@ -21,12 +22,21 @@ class UserUpdate(BaseModel):
     mobile: Optional[str] = None
     country_code: Optional[str] = None
     password: Optional[str] = None
+    max_concurrent_calls: Optional[int] = Field(None, ge=1)  # Per-user dialer line limit
+
+    @field_validator("max_concurrent_calls")
+    @classmethod
+    def within_dialer_ceiling(cls, value: Optional[int]) -> Optional[int]:
+        if value is not None and value > settings.dialer_max_concurrent_calls:
+            raise ValueError(f"must be at most {settings.dialer_max_concurrent_calls}")
+        return value
 
 class User(UserBase):
     id: int
     username: Optional[str] = None
     is_active: bool
     is_superuser: bool
+    max_concurrent_calls: Optional[int] = None
     created_at: datetime
     updated_at: Optional[datetime] = None
     
@@ -155,6 +165,12 @@ class GroupCallBase(BaseModel):
     purpose: Optional[str] = "general"  # feedback, upsell, custom_purpose
     custom_prompt: Optional[str] = None
     additional_notes: Optional[str] = None
+    max_concurrent_calls: Optional[int] = None  # Lines kept in flight; defaults to user/global setting
+    pacing_mode: Optional[str] = "fixed"  # fixed, predictive (max_concurrent_calls becomes bot capacity)
+    max_attempts: Optional[int] = None  # Dial attempts per lead for busy/no-answer; defaults to global setting
+    retry_backoff_seconds: Optional[int] = None  # First retry delay, doubled per attempt
+    calling_window_start_hour: Optional[int] = None  # Lead-local dialing hours; default to global setting
+    calling_window_end_hour: Optional[int] = None
 
 class GroupCallCreate(GroupCallBase):
     pass
@@ -164,12 +180,19 @@ class GroupCallUpdate(BaseModel):
     purpose: Optional[str] = None
     custom_prompt: Optional[str] = None
     additional_notes: Optional[str] = None
+    max_concurrent_calls: Optional[int] = None
+    pacing_mode: Optional[str] = None
+    max_attempts: Optional[int] = None
+    retry_backoff_seconds: Optional[int] = None
+    calling_window_start_hour: Optional[int] = None
+    calling_window_end_hour: Optional[int] = None
 
 class GroupCall(GroupCallBase):
     id: int
     user_id: int
     status: str
     current_lead_index: int
+    last_lead_id: Optional[int] = None
     total_leads: int
     completed_calls: int
     created_at: datetime
@@ -291,7 +314,17 @@ class ConversationResponse(BaseModel):
     status: str
 
 # File Upload Schemas
-class FileUploadResponse(BaseModel):
+# Lead Import Job Schemas
+class LeadImportJobResponse(BaseModel):
+    id: int
     filename: str
-    imported_count: int
-    errors: List[str] = [] 
\ No newline at end of file
+    status: str
+    rows_processed: int
+    rows_imported: int
+    error_count: int
+    errors: List[str] = []
+    rows_per_second: Optional[float] = None
+    failure: Optional[str] = None
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
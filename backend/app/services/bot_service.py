@@ -1,101 +1,90 @@
 import os
 import sys
+import time
+import asyncio
 import logging
 from dotenv import load_dotenv
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Callable
 
-from pipecat.audio.vad.silero import SileroVADAnalyzer
-from pipecat.frames.frames import EndFrame
+from pipecat.frames.frames import EndFrame, OutputAudioRawFrame
 from pipecat.pipeline.pipeline import Pipeline
 from pipecat.pipeline.runner import PipelineRunner
 from pipecat.pipeline.task import PipelineParams, PipelineTask
 from pipecat.processors.aggregators.openai_llm_context import OpenAILLMContext
+from pipecat.processors.frame_processor import FrameDirection, FrameProcessor
+from pipecat.processors.transcript_processor import TranscriptProcessor
 from pipecat.serializers.twilio import TwilioFrameSerializer
 from pipecat.services.gemini_multimodal_live.gemini import GeminiMultimodalLiveLLMService
 from pipecat.transports.network.fastapi_websocket import (
     FastAPIWebsocketParams,
     FastAPIWebsocketTransport,
 )
+from pipecat.utils.asyncio import TaskManager
+
+from app.core.config import settings
+from app.services.prompt_service import get_system_instruction
+from app.services.transcript_writer import transcript_writer
+from app.services.vad_service import vad_registry
 
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
-def get_system_instruction(
-    lead_info: Optional[Dict[str, Any]] = None,
-    purpose: str = "general",
-    custom_prompt: Optional[str] = None,
-    additional_notes: Optional[str] = None,
-) -> str:
-    """Build a purpose-specific system instruction with optional lead context and custom prompt.
-    purpose: one of ["feedback", "upsell", "custom", "general"]
+class PrewarmableGeminiLiveLLMService(GeminiMultimodalLiveLLMService):
+    """Gemini Live service whose session can be opened before the pipeline starts.
+
+    ``prewarm`` connects and sends the session setup (model, voice, system
+    instruction) while the phone is still ringing; when the pipeline starts,
+    ``start`` finds the socket already open and reuses it.
+
+    pipecat-ai 0.0.67 has no public hook for opening the session early, so
+    this drives the service's own ``_connect``/``_disconnect`` and task
+    manager; requirements.txt pins that release, re-check these when
+    upgrading it.
     """
 
-    if purpose == "upsell":
-        base_instruction = """
-You are SARA, a friendly sales assistant for Queens & Beans Cafe. Your job is to engage the customer, understand their preferences, and politely introduce a relevant offer.
-
-Goals:
-1) Build quick rapport (keep it warm, concise, and natural)
-2) Ask 1-2 qualifying questions to learn taste/visit habits
-3) Present ONE tailored offer (e.g., loyalty membership, seasonal drink, pastry combo)
-4) Highlight 1-2 benefits (value, convenience, taste)
-5) If interested, confirm preference or next step (e.g., text a voucher or add to loyalty)
-
-Guidelines:
-- Be natural and not pushy; if they seem uninterested, gracefully back off
-- Keep responses short and conversational (they will be spoken)
-- Avoid sounding scripted or robotic; be human-like and empathetic
-- If objections arise, acknowledge and offer a light alternative, then move on
-- Never claim things that aren’t true and do not pressure the customer
-        """
-    elif purpose == "feedback":
-        base_instruction = """
-You are SARA, an expert assistant calling to collect feedback about a recent visit to Queens & Beans Cafe.
-
-Goals:
-1) Greet and confirm it's a good time in a friendly, natural tone
-2) Ask 2-3 open-ended questions about their experience (what they liked, what could be improved)
-3) Acknowledge and thank them for specifics they share
-4) Keep it short and respectful; do not upsell during feedback calls
-
-Guidelines:
-- Be conversational and empathetic
-- Avoid complex or robotic phrasing
-- If they had an issue, thank them and show we care
-- Responses will be spoken; keep them concise and natural
-        """
-    elif purpose == "custom" and custom_prompt:
-        base_instruction = f"""
-You are SARA. Follow these custom instructions strictly for this call. Keep language natural and conversational (spoken style), concise, and empathetic as needed.
-
-CUSTOM INSTRUCTION:
-{custom_prompt}
-        """
-    else:
-        base_instruction = """
-You are SARA, a helpful, friendly assistant for Queens & Beans Cafe. Keep conversations short, natural, and respectful. Be helpful without being pushy. Your responses are converted to speech, so keep them concise and conversational.
-        """
-
-    # Add additional operator notes if provided
-    if additional_notes:
-        base_instruction += f"\n\nOPERATOR NOTES (for your awareness; do not read verbatim):\n{additional_notes}\n"
-
-    if lead_info:
-        lead_context = f"""
-
-LEAD INFORMATION:
-- Name: {lead_info.get('name', 'Unknown')}
-- Phone: {lead_info.get('phone', 'Unknown')}
-- Email: {lead_info.get('email', 'Unknown')}
-- Company: {lead_info.get('company', 'Unknown')}
-- Notes: {lead_info.get('notes', 'No additional notes')}
-
-Use this to personalize the conversation (e.g., address by name).
-        """
-        return base_instruction + lead_context
-
-    return base_instruction
+    async def prewarm(self) -> bool:
+        """Open the Live API session now; returns whether it connected"""
+        if not self._task_manager:
+            # Runs the session's receive tasks until the pipeline's StartFrame
+            # brings its own task manager
+            task_manager = TaskManager()
+            task_manager.set_event_loop(asyncio.get_running_loop())
+            self._task_manager = task_manager
+        await self._connect()
+        return self._websocket is not None
+
+    async def close(self):
+        """Close a session that was never attached to a pipeline"""
+        await self._disconnect()
+
+class TimeToFirstAudio(FrameProcessor):
+    """Reports the time from the call connecting to the bot's first audio frame"""
+
+    def __init__(self, connected_at: float, on_first_audio: Optional[Callable[[float], None]] = None, **kwargs):
+        super().__init__(**kwargs)
+        self._connected_at = connected_at
+        self._on_first_audio = on_first_audio
+
+    async def process_frame(self, frame, direction: FrameDirection):
+        await super().process_frame(frame, direction)
+        if self._connected_at is not None and isinstance(frame, OutputAudioRawFrame):
+            ttfa = time.perf_counter() - self._connected_at
+            self._connected_at = None
+            logger.info(f"Time to first audio: {ttfa * 1000:.0f} ms")
+            if self._on_first_audio:
+                self._on_first_audio(ttfa)
+        await self.push_frame(frame, direction)
+
+def create_llm_service(system_instruction: str):
+    """Speech-to-speech LLM for a call (benchmarks swap this for a fake one)"""
+    return PrewarmableGeminiLiveLLMService(
+        api_key=os.getenv("GEMINI_API_KEY", ""),
+        system_instruction=system_instruction,
+        voice_id="Aoede",
+        transcribe_user_audio=True,
+        transcribe_model_audio=True,
+    )
 
 async def run_bot(
     websocket_client,
@@ -104,11 +93,23 @@ async def run_bot(
     purpose: str = "general",
     custom_prompt: Optional[str] = None,
     additional_notes: Optional[str] = None,
+    llm=None,
+    connected_at: Optional[float] = None,
+    on_first_audio: Optional[Callable[[float], None]] = None,
+    system_instruction: Optional[str] = None,
+    call_id: Optional[int] = None,
 ):
-    """Run the AI bot using Pipecat pipeline with context & purpose-specific behavior."""
+    """Run the AI bot using Pipecat pipeline with context & purpose-specific behavior.
+
+    llm: an already connected (pre-warmed) LLM service for this call, if any
+    system_instruction: instruction rendered ahead of time (call context cache), if any
+    connected_at: perf_counter() when the media stream started, for time-to-first-audio
+    call_id: call record the transcript is saved under (not saved without one)
+    """
+    connected_at = connected_at or time.perf_counter()
     try:
         # Build system prompt per purpose
-        system_instruction = get_system_instruction(
+        system_instruction = system_instruction or get_system_instruction(
             lead_info=lead_info,
             purpose=purpose,
             custom_prompt=custom_prompt,
@@ -122,20 +123,15 @@ async def run_bot(
                 audio_out_enabled=True,
                 add_wav_header=False,
                 vad_enabled=True,
-                vad_analyzer=SileroVADAnalyzer(),
+                vad_analyzer=vad_registry.create_analyzer(),
                 vad_audio_passthrough=True,
                 serializer=TwilioFrameSerializer(stream_sid),
             ),
         )
 
-        # Configure LLM service
-        llm = GeminiMultimodalLiveLLMService(
-            api_key=os.getenv("GEMINI_API_KEY", ""),
-            system_instruction=system_instruction,
-            voice_id="Aoede",
-            transcribe_user_audio=True,
-            transcribe_model_audio=True,
-        )
+        # Configure LLM service, unless one was opened while the phone was ringing
+        if llm is None:
+            llm = create_llm_service(system_instruction)
 
         # Purpose-aware greeting
         if lead_info:
@@ -155,12 +151,26 @@ async def run_bot(
         context = OpenAILLMContext([{"role": "user", "content": greeting}])
         context_aggregator = llm.create_context_aggregator(context)
 
+        # Transcript lines are handed to the batched transcript writer; the
+        # user side sits before the LLM, which pushes user transcriptions upstream
+        transcript = None
+        if call_id and settings.transcript_persistence_enabled:
+            transcript = TranscriptProcessor()
+
+            @transcript.event_handler("on_transcript_update")
+            async def on_transcript_update(processor, frame):
+                for message in frame.messages:
+                    transcript_writer.add(call_id, message.role, message.content, message.timestamp)
+
         # Create pipeline
         pipeline = Pipeline([
             transport.input(),
             context_aggregator.user(),
+            *([transcript.user()] if transcript else []),
             llm,
+            TimeToFirstAudio(connected_at, on_first_audio),
             transport.output(),
+            *([transcript.assistant()] if transcript else []),
             context_aggregator.assistant(),
         ])
 
@@ -184,7 +194,11 @@ async def run_bot(
 
         # Run pipeline
         runner = PipelineRunner(handle_sigint=False)
-        await runner.run(task)
+        try:
+            await runner.run(task)
+        finally:
+            if transcript:
+                await transcript_writer.close_call(call_id)
 
     except Exception as e:
         logger.error(f"Error in run_bot: {str(e)}")
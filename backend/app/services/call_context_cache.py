@@ -0,0 +1,261 @@
+import asyncio
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.database.database import SessionLocal
+from app.models.models import Call, CallContextEntry, Lead
+from app.services.lead_service import LeadService
+from app.services.prompt_service import get_system_instruction
+
+logger = logging.getLogger(__name__)
+
+
+class LocalContextBackend:
+    """In-process TTL cache, used for SQLite/local runs or a single worker"""
+
+    in_process = True
+
+    def __init__(self, max_entries: Optional[int] = None):
+        self.max_entries = max_entries or settings.call_context_cache_max_entries
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+
+    def get(self, call_sid: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(call_sid)
+            if entry is None:
+                return None
+            expires_at, context = entry
+            if expires_at <= time.time():
+                del self._entries[call_sid]
+                return None
+            return context
+
+    def set(self, call_sid: str, context: Dict[str, Any], ttl: float) -> None:
+        now = time.time()
+        with self._lock:
+            self._entries.pop(call_sid, None)
+            self._entries[call_sid] = (now + ttl, context)
+            # Entries are inserted in expiry order, so the oldest go first
+            while self._entries:
+                oldest_sid, (expires_at, _) = next(iter(self._entries.items()))
+                if expires_at > now and len(self._entries) <= self.max_entries:
+                    break
+                del self._entries[oldest_sid]
+
+    def delete(self, call_sids: List[str]) -> None:
+        with self._lock:
+            for call_sid in call_sids:
+                self._entries.pop(call_sid, None)
+
+
+class DatabaseContextBackend:
+    """Contexts stored in call_contexts, so the worker that receives the media
+    stream finds what the worker that dialed cached."""
+
+    in_process = False
+
+    def __init__(self):
+        self._last_purge = 0.0
+
+    def get(self, call_sid: str) -> Optional[Dict[str, Any]]:
+        db = SessionLocal()
+        try:
+            entry = db.query(CallContextEntry).filter(
+                CallContextEntry.call_sid == call_sid,
+                CallContextEntry.expires_at > time.time()
+            ).first()
+            return json.loads(entry.data) if entry else None
+        finally:
+            db.close()
+
+    def set(self, call_sid: str, context: Dict[str, Any], ttl: float) -> None:
+        db = SessionLocal()
+        try:
+            now = time.time()
+            db.merge(CallContextEntry(call_sid=call_sid, data=json.dumps(context), expires_at=now + ttl))
+            # Expired rows are purged in passing, at most once per TTL
+            if now - self._last_purge >= ttl:
+                self._last_purge = now
+                db.query(CallContextEntry).filter(
+                    CallContextEntry.expires_at <= now
+                ).delete(synchronize_session=False)
+            db.commit()
+        except IntegrityError:
+            # Another worker cached the same call first
+            db.rollback()
+        finally:
+            db.close()
+
+    def delete(self, call_sids: List[str]) -> None:
+        db = SessionLocal()
+        try:
+            db.query(CallContextEntry).filter(
+                CallContextEntry.call_sid.in_(call_sids)
+            ).delete(synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+
+
+class CallContextCache:
+    """Everything the bot needs when a call is picked up, keyed by call_sid.
+
+    Filled when the call is dialed, so the media WebSocket doesn't have to
+    query the call and lead on the latency-critical pickup path. A miss (a
+    call dialed before a restart, or an evicted entry) falls back to the
+    database and caches the result.
+
+    A context holds call_id, lead_info, purpose, custom_prompt,
+    additional_notes and the rendered system_instruction. Contexts never
+    change once built, so with the database backend every worker also keeps
+    the ones it wrote or read in process: the TwiML webhook and the media
+    stream of a call usually land on the same worker, and the stream start
+    then costs no query.
+    """
+
+    def __init__(self, backend=None):
+        self.backend = backend or self._default_backend()
+        self.local = self.backend if self.backend.in_process else LocalContextBackend()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _default_backend():
+        backend = settings.call_context_cache_backend
+        if backend == "auto":
+            backend = "database" if settings.database_url.startswith("postgresql") else "local"
+        return DatabaseContextBackend() if backend == "database" else LocalContextBackend()
+
+    @staticmethod
+    def build_context(call: Call, lead: Optional[Lead]) -> Dict[str, Any]:
+        """Context for a call record and its lead"""
+        lead_info = None
+        if lead:
+            lead_info = {
+                "id": lead.id,
+                "name": lead.name,
+                "company": lead.company,
+                "phone": lead.phone,
+                "email": lead.email,
+                "title": lead.title,
+                "priority": lead.priority,
+                "notes": lead.notes,
+            }
+        context = {
+            "lead_info": lead_info,
+            "purpose": getattr(call, "purpose", "general") or "general",
+            "custom_prompt": getattr(call, "custom_prompt", None),
+            "additional_notes": getattr(call, "additional_notes", None),
+        }
+        context["system_instruction"] = get_system_instruction(**context)
+        context["call_id"] = call.id
+        return context
+
+    def remember(self, call: Call, db: Session, lead: Optional[Lead] = None) -> None:
+        """Cache the context of a call that was just dialed"""
+        if not call.call_sid:
+            return
+        try:
+            if lead is None and call.lead_id:
+                lead = LeadService(db).get_lead_details(call.lead_id)
+            self._store(call.call_sid, self.build_context(call, lead))
+        except Exception as e:
+            # The pickup path falls back to the database
+            logger.error(f"Failed to cache call context for {call.call_sid}: {str(e)}")
+
+    async def remember_async(self, call: Call, db: Session, lead: Optional[Lead] = None) -> None:
+        """remember() for the event loop: the lead lookup and the database
+        backend's insert run in a thread. The caller must not use `db` until
+        it returns."""
+        await asyncio.to_thread(self.remember, call, db, lead)
+
+    def get(self, call_sid: str, call_id: Optional[int] = None) -> Dict[str, Any]:
+        """Context for call_sid from the cache, or loaded from the database on a
+        miss (by primary key when the call id is known)"""
+        context = self.local.get(call_sid)
+        if context is None and self.local is not self.backend:
+            try:
+                context = self.backend.get(call_sid)
+            except Exception as e:
+                logger.error(f"Call context cache lookup failed for {call_sid}: {str(e)}")
+            if context is not None:
+                self.local.set(call_sid, context, settings.call_context_cache_ttl_seconds)
+        if context is not None:
+            self.hits += 1
+            return context
+
+        self.misses += 1
+        context = self._load(call_sid, call_id)
+        if context["lead_info"]:
+            try:
+                self._store(call_sid, context)
+            except Exception as e:
+                logger.error(f"Failed to cache call context for {call_sid}: {str(e)}")
+        return context
+
+    async def get_async(self, call_sid: str, call_id: Optional[int] = None) -> Dict[str, Any]:
+        """get() for the event loop: in-process hits are served inline, anything
+        that touches the database runs in a thread"""
+        context = self.local.get(call_sid)
+        if context is not None:
+            self.hits += 1
+            return context
+        return await asyncio.to_thread(self.get, call_sid, call_id)
+
+    def forget(self, call_sids: List[str]) -> None:
+        """Drop the contexts of finished calls (one DELETE for the database backend)"""
+        if not call_sids:
+            return
+        self.local.delete(call_sids)
+        try:
+            self.backend.delete(call_sids)
+        except Exception as e:
+            logger.error(f"Failed to drop call contexts for {len(call_sids)} calls: {str(e)}")
+
+    def _store(self, call_sid: str, context: Dict[str, Any]) -> None:
+        ttl = settings.call_context_cache_ttl_seconds
+        if self.local is not self.backend:
+            self.local.set(call_sid, context, ttl)
+        self.backend.set(call_sid, context, ttl)
+
+    def _load(self, call_sid: str, call_id: Optional[int] = None) -> Dict[str, Any]:
+        db = SessionLocal()
+        try:
+            if call_id:
+                call = db.get(Call, call_id)
+            else:
+                call = db.query(Call).filter(Call.call_sid == call_sid).first()
+            if call and call.lead_id:
+                lead = LeadService(db).get_lead_details(call.lead_id)
+                if lead:
+                    logger.info(f"Found lead info via callSid: {lead.name} from {lead.company}; purpose={call.purpose}")
+                else:
+                    logger.warning(f"Lead not found for lead_id: {call.lead_id}")
+                return self.build_context(call, lead)
+            logger.warning(f"Call record not found for callSid: {call_sid}")
+        except Exception as e:
+            # Continue without lead info if there's an error
+            logger.error(f"Error getting lead info via callSid: {str(e)}")
+        finally:
+            db.close()
+        return {
+            "call_id": None,
+            "lead_info": None,
+            "purpose": "general",
+            "custom_prompt": None,
+            "additional_notes": None,
+            "system_instruction": get_system_instruction(),
+        }
+
+
+# Process-wide cache shared by the dialer and the media WebSocket
+call_context_cache = CallContextCache()
@@ -0,0 +1,86 @@
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+# Position of each Twilio call status in a call's lifecycle. A call only ever
+# moves to a higher rank; every terminal status shares the last one, so the
+# first terminal status a call reaches is final.
+CALL_STATUS_RANKS = {
+    "queued": 0,
+    "initiated": 0,
+    "ringing": 1,
+    "in-progress": 2,
+    "answered": 2,
+    "completed": 3,
+    "busy": 3,
+    "no-answer": 3,
+    "failed": 3,
+    "canceled": 3,
+}
+
+# Sequence number used for events that don't carry one (e.g. the call-start webhook)
+NO_SEQUENCE = -1
+
+# (CallSid, CallStatus, SequenceNumber) identifying one delivery of a status callback
+EventKey = Tuple[str, str, int]
+
+
+def advances(current: Optional[str], new: str) -> bool:
+    """Whether moving a call from `current` to `new` is a forward transition"""
+    new_rank = CALL_STATUS_RANKS.get(new)
+    if new_rank is None:
+        return False
+    current_rank = CALL_STATUS_RANKS.get(current) if current else None
+    return current_rank is None or new_rank > current_rank
+
+
+def statuses_before(status: str) -> List[str]:
+    """Statuses a call may be in for `status` to be a forward transition"""
+    rank = CALL_STATUS_RANKS[status]
+    return [name for name, other in CALL_STATUS_RANKS.items() if other < rank]
+
+
+class CallStateTracker:
+    """Recently seen status callbacks and the last known status per call.
+
+    Both are bounded LRUs, so duplicate deliveries and events that would move
+    a call backwards are turned away without touching the database. A call
+    that fell out of the LRU is checked against its row when the event is
+    written.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._seen: "OrderedDict[EventKey, None]" = OrderedDict()
+        self._statuses: "OrderedDict[str, str]" = OrderedDict()
+
+    def check(self, key: EventKey) -> Optional[str]:
+        """Record an incoming event; returns why it should be skipped, or None"""
+        call_sid, status, _ = key
+        with self._lock:
+            if key in self._seen:
+                self._seen.move_to_end(key)
+                return "duplicate"
+            self._remember(self._seen, key, None)
+            known = self._statuses.get(call_sid)
+            if known is not None and not advances(known, status):
+                return "stale"
+        return None
+
+    def forget(self, key: EventKey) -> None:
+        """Stop treating an event as seen, so a redelivery is accepted"""
+        with self._lock:
+            self._seen.pop(key, None)
+
+    def observe(self, call_sid: str, status: Optional[str]) -> None:
+        """Note the status a call is known to be in"""
+        if status:
+            with self._lock:
+                self._remember(self._statuses, call_sid, status)
+
+    def _remember(self, entries: OrderedDict, key, value) -> None:
+        entries[key] = value
+        entries.move_to_end(key)
+        while len(entries) > self.max_entries:
+            entries.popitem(last=False)
@@ -0,0 +1,339 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.core.config import settings
+from app.database.database import SessionLocal
+from app.models.models import Call, CallStatusEventEntry, GroupCall
+from app.services.call_context_cache import call_context_cache
+from app.services.call_state import NO_SEQUENCE, CallStateTracker, advances, statuses_before
+from app.services.dial_queue_service import DialQueueService
+from app.services.dialer_service import TERMINAL_CALL_STATUSES, dialer_service
+from app.services.pacing_service import predictive_pacer
+
+logger = logging.getLogger(__name__)
+
+# Statuses that also set the call outcome
+OUTCOME_STATUSES = ["completed", "failed", "busy", "no-answer"]
+
+
+@dataclass
+class CallStatusEvent:
+    """A Twilio status callback waiting to be written"""
+    call_sid: str
+    status: str
+    duration: Optional[int] = None
+    sequence_number: int = NO_SEQUENCE
+    received_at: float = 0.0
+    attempts: int = 0
+    retry_at: float = 0.0
+
+
+# (user_id, status, duration, group_call_id) of a call the flush finished
+FinishedCall = Tuple[int, str, Optional[int], Optional[int]]
+
+
+class CallStatusIngestor:
+    """Buffers status callbacks and writes them to the calls table in batches.
+
+    The webhook acknowledges Twilio as soon as the event is queued. Calls
+    only move forward through the states in call_state: duplicates and events
+    that don't advance the call's last known status are dropped on arrival,
+    and queued events are coalesced per call_sid to the most advanced one. A
+    writer task flushes them every ``call_status_flush_interval_seconds``, or
+    sooner once ``call_status_flush_batch_size`` calls are waiting, in a
+    single transaction. Each write is conditional on the row still being in
+    an earlier state and records the event in call_status_events, whose
+    unique key stops a duplicate delivered to another worker. After the
+    commit, finished calls' cached contexts are dropped in one go and the
+    lines they freed are handed to the dialer. Twilio was already answered,
+    so an event that can't be written goes back in the queue with backoff;
+    after ``call_status_write_max_attempts`` it is given up on and forgotten
+    by the tracker, so a redelivery is accepted. Pending events are flushed
+    on shutdown.
+    """
+
+    def __init__(self):
+        self._pending: Dict[str, CallStatusEvent] = {}
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._writer: Optional[asyncio.Task] = None
+        self._closing = False
+        self._last_purge = 0.0
+        self.tracker = CallStateTracker(settings.call_status_dedup_max_entries)
+        self.counters = {
+            "received": 0, "duplicate": 0, "stale": 0, "coalesced": 0,
+            "written": 0, "batches": 0, "failed": 0, "dropped": 0, "requeued": 0,
+        }
+        self.last_flush_seconds: Optional[float] = None
+
+    def submit(self, call_sid: str, status: str, duration: Optional[int] = None,
+               sequence_number: Optional[int] = None) -> bool:
+        """Queue a status callback for the next flush; False if it was a
+        duplicate or would not move the call forward"""
+        self.counters["received"] += 1
+        sequence_number = NO_SEQUENCE if sequence_number is None else sequence_number
+        skipped = self.tracker.check((call_sid, status, sequence_number))
+        if skipped:
+            self.counters[skipped] += 1
+            return False
+
+        event = CallStatusEvent(call_sid=call_sid, status=status, duration=duration,
+                                sequence_number=sequence_number, received_at=time.time())
+        queued = self._pending.get(call_sid)
+        if queued is not None:
+            self.counters["coalesced"] += 1
+            event = self._merge(queued, event)
+        self._pending[call_sid] = event
+
+        if not self._closing:
+            if self._writer is None or self._writer.done():
+                self._writer = asyncio.create_task(self._run())
+            if len(self._pending) >= settings.call_status_flush_batch_size:
+                self._wakeup.set()
+        return True
+
+    @staticmethod
+    def _merge(queued: CallStatusEvent, event: CallStatusEvent) -> CallStatusEvent:
+        if not advances(queued.status, event.status):
+            if event.duration is not None:
+                queued.duration = event.duration
+            return queued
+        if event.duration is None:
+            event.duration = queued.duration
+        return event
+
+    def _requeue(self, failed: List[CallStatusEvent]) -> None:
+        """Put events whose write failed back in the queue with backoff, giving
+        up (and letting a redelivery through) after the last attempt"""
+        now = time.time()
+        for event in failed:
+            event.attempts += 1
+            if event.attempts >= settings.call_status_write_max_attempts:
+                self.counters["failed"] += 1
+                self.tracker.forget((event.call_sid, event.status, event.sequence_number))
+                logger.error(
+                    f"Giving up on status {event.status} for call {event.call_sid} "
+                    f"after {event.attempts} attempts"
+                )
+                continue
+
+            self.counters["requeued"] += 1
+            event.retry_at = now + settings.call_status_write_backoff_seconds * 2 ** (event.attempts - 1)
+            queued = self._pending.get(event.call_sid)
+            # A newer event for the call may have arrived during the write
+            self._pending[event.call_sid] = event if queued is None else self._merge(event, queued)
+
+    async def _run(self) -> None:
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), settings.call_status_flush_interval_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            if self._pending:
+                try:
+                    await self.flush()
+                except Exception as e:
+                    logger.error(f"Call status flush failed: {str(e)}")
+
+    async def flush(self) -> int:
+        """Write everything queued so far; returns the number of calls written"""
+        async with self._flush_lock:
+            # Failed events wait out their backoff, except on shutdown
+            now = time.time()
+            batch = [
+                event for event in self._pending.values()
+                if self._closing or event.retry_at <= now
+            ]
+            if not batch:
+                return 0
+            for event in batch:
+                del self._pending[event.call_sid]
+
+            started = time.perf_counter()
+            finished, failed = await asyncio.to_thread(self._write, batch)
+            self.last_flush_seconds = time.perf_counter() - started
+            self.counters["batches"] += 1
+            self.counters["written"] += len(batch) - len(failed)
+            self._requeue(failed)
+
+        # Feed outcomes to predictive pacing and refill freed lines
+        for user_id, status, duration, group_call_id in finished:
+            predictive_pacer.observe(user_id, status, duration)
+            if group_call_id:
+                dialer_service.on_call_finished(group_call_id)
+        return len(batch) - len(failed)
+
+    def _write(self, batch: List[CallStatusEvent]) -> Tuple[List[FinishedCall], List[CallStatusEvent]]:
+        finished, failed = self._write_events(batch)
+        failed_sids = {event.call_sid for event in failed}
+        call_context_cache.forget([
+            event.call_sid for event in batch
+            if event.status in TERMINAL_CALL_STATUSES and event.call_sid not in failed_sids
+        ])
+        return finished, failed
+
+    def _write_events(self, batch: List[CallStatusEvent]) -> Tuple[List[FinishedCall], List[CallStatusEvent]]:
+        """Apply a batch in one transaction, falling back to one transaction
+        per event so a bad row can't hold back the rest. Returns the calls
+        finished and the events that could not be written."""
+        db = SessionLocal()
+        try:
+            observed: List[Tuple[str, str]] = []
+            finished = self._apply(db, batch, observed)
+            self._purge_events(db)
+            db.commit()
+            self._observe(observed)
+            return finished, []
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Call status batch of {len(batch)} failed, writing events one by one: {str(e)}")
+        finally:
+            db.close()
+
+        finished = []
+        failed = []
+        for event in batch:
+            db = SessionLocal()
+            try:
+                observed = []
+                finished.extend(self._apply(db, [event], observed))
+                db.commit()
+                self._observe(observed)
+            except IntegrityError:
+                # Applied by another worker between our check and the insert
+                db.rollback()
+                self.counters["duplicate"] += 1
+            except Exception as e:
+                db.rollback()
+                failed.append(event)
+                logger.error(f"Failed to write status {event.status} for call {event.call_sid}: {str(e)}")
+            finally:
+                db.close()
+        return finished, failed
+
+    def _observe(self, observed: List[Tuple[str, str]]) -> None:
+        for call_sid, status in observed:
+            self.tracker.observe(call_sid, status)
+
+    def _apply(self, db: Session, batch: List[CallStatusEvent],
+               observed: List[Tuple[str, str]]) -> List[FinishedCall]:
+        """Write the events that advance their call; statuses the calls end up
+        in are added to `observed` for the tracker once committed"""
+        sids = [event.call_sid for event in batch]
+        calls = {call.call_sid: call for call in db.query(Call).filter(Call.call_sid.in_(sids)).all()}
+        applied_keys = set(
+            db.query(
+                CallStatusEventEntry.call_sid, CallStatusEventEntry.status, CallStatusEventEntry.sequence_number
+            ).filter(CallStatusEventEntry.call_sid.in_(sids)).all()
+        )
+        group_calls: Dict[int, Optional[GroupCall]] = {}
+        queue = DialQueueService(db)
+        finished: List[FinishedCall] = []
+        records = []
+        now = datetime.utcnow()
+
+        for event in batch:
+            call = calls.get(event.call_sid)
+            if call is None:
+                self.counters["dropped"] += 1
+                logger.warning(f"Status {event.status} for unknown call {event.call_sid}")
+                continue
+            if (event.call_sid, event.status, event.sequence_number) in applied_keys:
+                self.counters["duplicate"] += 1
+                continue
+            if not advances(call.status, event.status):
+                # Out of order: the row is already further along, nothing to write
+                self.counters["stale"] += 1
+                observed.append((event.call_sid, call.status))
+                continue
+
+            values = {Call.status: event.status, Call.updated_at: now}
+            if event.duration is not None:
+                values[Call.duration] = event.duration
+            if event.status in OUTCOME_STATUSES:
+                values[Call.outcome] = event.status
+            # Conditional on the row not having moved on in the meantime, so
+            # concurrent writers can't move a call backwards and only the first
+            # terminal status frees its group call line
+            if db.query(Call).filter(
+                Call.id == call.id,
+                or_(Call.status.in_(statuses_before(event.status)), Call.status.is_(None))
+            ).update(values, synchronize_session=False) != 1:
+                self.counters["stale"] += 1
+                continue
+            for column, value in values.items():
+                set_committed_value(call, column.key, value)
+            records.append({
+                "call_sid": event.call_sid,
+                "status": event.status,
+                "sequence_number": event.sequence_number,
+                "received_at": event.received_at,
+            })
+            observed.append((event.call_sid, event.status))
+
+            if event.status not in TERMINAL_CALL_STATUSES:
+                continue
+
+            # Queue a retry for busy/no-answer outcomes, otherwise count the lead
+            # as done, in the same transaction as the status change
+            group_call_id = call.group_call_id
+            if group_call_id:
+                if group_call_id not in group_calls:
+                    group_calls[group_call_id] = db.query(GroupCall).filter(GroupCall.id == group_call_id).first()
+                group_call = group_calls[group_call_id]
+                retry_at = queue.schedule_retry(call, group_call) if group_call else None
+                if retry_at is None:
+                    db.query(GroupCall).filter(GroupCall.id == group_call_id).update(
+                        {GroupCall.completed_calls: GroupCall.completed_calls + 1},
+                        synchronize_session=False
+                    )
+            finished.append((call.user_id, event.status, call.duration, group_call_id))
+
+        if records:
+            db.bulk_insert_mappings(CallStatusEventEntry, records)
+        return finished
+
+    def _purge_events(self, db: Session) -> None:
+        """Drop applied-event records past the retention window, at most once an hour"""
+        now = time.time()
+        if now - self._last_purge < 3600:
+            return
+        self._last_purge = now
+        db.query(CallStatusEventEntry).filter(
+            CallStatusEventEntry.received_at < now - settings.call_status_event_retention_hours * 3600
+        ).delete(synchronize_session=False)
+
+    def stats(self) -> Dict[str, Any]:
+        stats: Dict[str, Any] = {
+            "pending": len(self._pending),
+            "flush_interval_seconds": settings.call_status_flush_interval_seconds,
+            "flush_batch_size": settings.call_status_flush_batch_size,
+            "last_flush_ms": round(self.last_flush_seconds * 1000, 1) if self.last_flush_seconds is not None else None,
+        }
+        stats.update(self.counters)
+        return stats
+
+    async def shutdown(self) -> None:
+        """Stop the writer and flush whatever is still queued (app shutdown)"""
+        self._closing = True
+        self._wakeup.set()
+        if self._writer:
+            # Let a flush in progress finish rather than cancelling it mid-write
+            await asyncio.gather(self._writer, return_exceptions=True)
+            self._writer = None
+        while self._pending:
+            await self.flush()
+
+
+# Process-wide ingestion queue fed by the status webhook
+call_status_ingestor = CallStatusIngestor()
@@ -0,0 +1,189 @@
+import logging
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from app.core.config import settings
+from app.services.twilio_service import TwilioService
+
+logger = logging.getLogger(__name__)
+
+# NANP area codes by time zone. Area codes that span zones use the zone most
+# of their numbers are in.
+_NANP_AREA_CODES: Dict[str, str] = {
+    # US Eastern
+    "America/New_York": """
+        201 202 203 207 212 215 216 220 223 229 231 234 239 240 248 252 260 267 269 272 276 283
+        301 302 304 305 313 315 317 321 326 330 332 336 339 347 351 352 380 386 401 404 407 410
+        412 413 419 423 434 440 443 445 463 470 475 478 484 502 508 513 516 517 518 540 551 561
+        567 570 571 574 582 585 586 603 606 607 609 610 614 616 617 631 640 646 667 678 680 681
+        703 704 706 716 717 718 724 727 732 734 740 743 754 757 762 765 770 772 774 781 786 802
+        803 804 810 812 813 814 826 828 835 838 839 843 845 848 854 856 857 859 860 862 863 864
+        865 878 904 906 908 910 912 914 917 919 929 930 934 937 941 947 948 954 959 973 978 980
+        984 989
+    """,
+    # US Central
+    "America/Chicago": """
+        205 210 214 217 218 219 224 225 228 251 254 256 262 270 281 308 309 312 314 316 318 319
+        320 325 331 334 337 346 361 364 402 405 409 414 417 430 432 447 464 469 479 501 504 507
+        512 515 531 534 539 557 563 572 573 580 601 605 608 612 615 618 620 629 630 636 641 651
+        659 660 662 682 701 708 712 713 715 726 731 737 763 769 773 779 785 806 815 816 817 830
+        832 847 850 870 872 901 903 913 918 920 931 936 938 940 945 952 956 972 979 985
+    """,
+    # US Mountain
+    "America/Denver": "303 307 385 406 435 505 575 719 720 801 915 970 983",
+    "America/Boise": "208 986",
+    "America/Phoenix": "480 520 602 623 928",
+    # US Pacific
+    "America/Los_Angeles": """
+        206 209 213 253 279 310 323 341 350 360 408 415 424 425 442 458 503 509 510 530 541 559
+        562 564 619 626 628 650 657 661 669 702 707 714 725 747 760 775 805 818 820 831 840 858
+        909 916 925 949 951 971
+    """,
+    "America/Anchorage": "907",
+    "Pacific/Honolulu": "808",
+    # Canada
+    "America/Toronto": "226 249 289 343 365 367 416 418 437 438 450 514 519 548 579 581 613 647 705 807 819 873 905",
+    "America/Winnipeg": "204 431",
+    "America/Regina": "306 639",
+    "America/Edmonton": "368 403 587 780 825",
+    "America/Vancouver": "236 250 604 672 778",
+    "America/Halifax": "782 902",
+    "America/Moncton": "506",
+    "America/St_Johns": "709",
+}
+
+# Country calling codes for countries that (practically) use a single zone
+_COUNTRY_CODES: Dict[str, str] = {
+    "Europe/London": "44",
+    "Europe/Dublin": "353",
+    "Europe/Paris": "33",
+    "Europe/Berlin": "49",
+    "Europe/Madrid": "34",
+    "Europe/Rome": "39",
+    "Europe/Amsterdam": "31",
+    "Europe/Brussels": "32",
+    "Europe/Zurich": "41",
+    "Europe/Stockholm": "46",
+    "Europe/Oslo": "47",
+    "Europe/Copenhagen": "45",
+    "Europe/Warsaw": "48",
+    "Europe/Lisbon": "351",
+    "Europe/Athens": "30",
+    "Europe/Istanbul": "90",
+    "Asia/Kolkata": "91",
+    "Asia/Karachi": "92",
+    "Asia/Colombo": "94",
+    "Asia/Kathmandu": "977",
+    "Asia/Dhaka": "880",
+    "Asia/Dubai": "971",
+    "Asia/Riyadh": "966",
+    "Asia/Qatar": "974",
+    "Asia/Kuwait": "965",
+    "Asia/Bahrain": "973",
+    "Asia/Muscat": "968",
+    "Asia/Singapore": "65",
+    "Asia/Kuala_Lumpur": "60",
+    "Asia/Manila": "63",
+    "Asia/Bangkok": "66",
+    "Asia/Ho_Chi_Minh": "84",
+    "Asia/Hong_Kong": "852",
+    "Asia/Taipei": "886",
+    "Asia/Shanghai": "86",
+    "Asia/Tokyo": "81",
+    "Asia/Seoul": "82",
+    "Pacific/Auckland": "64",
+    "Africa/Johannesburg": "27",
+    "Africa/Lagos": "234",
+    "Africa/Nairobi": "254",
+    "Africa/Cairo": "20",
+    "Africa/Casablanca": "212",
+    "America/Bogota": "57",
+    "America/Lima": "51",
+    "America/Santiago": "56",
+    "America/Argentina/Buenos_Aires": "54",
+}
+
+
+def _build_prefix_table() -> Dict[str, str]:
+    """Flatten the zone lists into E.164 digit prefix -> zone"""
+    table = {}
+    for zone, codes in _NANP_AREA_CODES.items():
+        for code in codes.split():
+            table[f"1{code}"] = zone
+    for zone, code in _COUNTRY_CODES.items():
+        table[code] = zone
+    return table
+
+
+# Precomputed once at import; lookups try at most MAX_PREFIX_LENGTH dict hits
+PREFIX_TIME_ZONES: Dict[str, str] = _build_prefix_table()
+MAX_PREFIX_LENGTH = max(len(prefix) for prefix in PREFIX_TIME_ZONES)
+
+
+@lru_cache(maxsize=None)
+def _zone_info(zone: str) -> Optional[ZoneInfo]:
+    try:
+        return ZoneInfo(zone)
+    except (ZoneInfoNotFoundError, ValueError):
+        logger.warning(f"Unknown time zone {zone}")
+        return None
+
+
+class CallingWindowService:
+    """Resolves a lead's time zone from their phone number and decides which
+    zones are inside the calling window right now.
+
+    Dial queue entries store the zone they were bucketed into, so the dialer
+    only has to claim from zones that are currently open.
+    """
+
+    @property
+    def known_time_zones(self) -> List[str]:
+        """Every zone a queue entry can be bucketed into"""
+        return sorted(set(PREFIX_TIME_ZONES.values()) | {settings.calling_default_time_zone})
+
+    def time_zone_for_phone(self, phone: str) -> str:
+        """Longest-prefix match of the normalized number against the prefix table"""
+        digits = TwilioService._clean_phone_number(phone or "").lstrip("+")
+        for length in range(min(MAX_PREFIX_LENGTH, len(digits)), 0, -1):
+            zone = PREFIX_TIME_ZONES.get(digits[:length])
+            if zone:
+                return zone
+        return settings.calling_default_time_zone
+
+    def get_window(self, group_call) -> Tuple[int, int]:
+        """Calling window (start hour, end hour) in the lead's local time"""
+        start = group_call.calling_window_start_hour
+        end = group_call.calling_window_end_hour
+        if start is None:
+            start = settings.calling_window_start_hour
+        if end is None:
+            end = settings.calling_window_end_hour
+        return start, end
+
+    def is_open(self, zone: str, start_hour: int, end_hour: int, now: Optional[datetime] = None) -> bool:
+        """Whether local time in zone is within [start_hour, end_hour); equal hours mean all day"""
+        tz = _zone_info(zone)
+        if tz is None:
+            return False
+        now = now or datetime.now(tz=ZoneInfo("UTC"))
+        hour = now.astimezone(tz).hour
+        if start_hour == end_hour:
+            return True
+        if start_hour < end_hour:
+            return start_hour <= hour < end_hour
+        # Window wraps past midnight, e.g. 18 -> 2
+        return hour >= start_hour or hour < end_hour
+
+    def open_time_zones(self, group_call, now: Optional[datetime] = None) -> Optional[List[str]]:
+        """Zones whose leads may be dialed now, or None when windows are disabled"""
+        if not settings.calling_window_enabled:
+            return None
+        start, end = self.get_window(group_call)
+        return [zone for zone in self.known_time_zones if self.is_open(zone, start, end, now)]
+
+
+# Process-wide instance shared by the dial queue and the dialer
+calling_window_service = CallingWindowService()
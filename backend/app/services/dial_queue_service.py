@@ -0,0 +1,376 @@
+import logging
+import random
+from datetime import datetime, timedelta
+from typing import Iterable, List, Optional
+
+from sqlalchemy import func, or_
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.models import Call, DialQueueEntry, GroupCall, Lead, lead_groups
+from app.services.calling_window_service import calling_window_service
+from app.services.pacing_service import FINISHED_CALL_STATUSES
+
+logger = logging.getLogger(__name__)
+
+# Outcomes worth dialing again later
+RETRYABLE_CALL_STATUSES = ["busy", "no-answer"]
+
+# Entry statuses still waiting to be dialed: due now, a retry due later, or
+# parked until the lead's time zone is inside the calling window
+WAITING_ENTRY_STATUSES = ["pending", "scheduled", "parked"]
+
+
+class DialQueueService:
+    """Persistent per-group-call dial queue, claimed with FOR UPDATE SKIP LOCKED so processes can share it"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def enqueue_group_call(self, group_call: GroupCall) -> int:
+        """Queue group members past the group call's lead cursor; returns the number added.
+
+        Members are read from lead_groups in lead_id order one batch at a
+        time, and ``group_call.last_lead_id`` is committed after each batch,
+        so a large group never loads as a whole and an interrupted enqueue
+        resumes where it stopped. Group calls started before the dial queue
+        existed first get their already dialed leads recorded, so the dialer
+        picks up after them.
+        """
+        if group_call.last_lead_id is None and group_call.current_lead_index and not self.entry_count(group_call.id):
+            self._backfill_dialed_leads(group_call)
+
+        added = 0
+        while True:
+            query = self._member_query(group_call.group_id)
+            if group_call.last_lead_id is not None:
+                query = query.filter(Lead.id > group_call.last_lead_id)
+            rows = query.order_by(Lead.id).limit(settings.dial_queue_enqueue_batch_size).all()
+            if not rows:
+                break
+
+            added += self._insert_entries(group_call, rows)
+            group_call.last_lead_id = rows[-1].id
+            self.db.commit()
+
+        group_call.total_leads = self.entry_count(group_call.id)
+        self.db.commit()
+
+        logger.info(f"Queued {added} lead(s) for group call {group_call.id}")
+        return added
+
+    def sync_group_membership(self, group_id: int, added_lead_ids: Iterable[int] = (),
+                              removed_lead_ids: Iterable[int] = ()) -> None:
+        """Apply group membership edits to the group's unfinished group calls.
+
+        Added leads behind a group call's cursor are queued directly; members
+        ahead of it (new leads always are, their ids being higher) are queued
+        in cursor order and the cursor moves past them, as an enqueue pass
+        would. Removed leads lose their waiting entries. The caller commits.
+        """
+        added_lead_ids = list(added_lead_ids)
+        removed_lead_ids = list(removed_lead_ids)
+        group_calls = self.db.query(GroupCall).filter(
+            GroupCall.group_id == group_id,
+            GroupCall.status != "completed",
+            GroupCall.last_lead_id.isnot(None)
+        ).all()
+
+        for group_call in group_calls:
+            behind_cursor = [lead_id for lead_id in added_lead_ids if lead_id <= group_call.last_lead_id]
+            if behind_cursor:
+                rows = self._member_query(group_id).filter(Lead.id.in_(behind_cursor)).all()
+                self._insert_entries(group_call, rows)
+            if any(lead_id > group_call.last_lead_id for lead_id in added_lead_ids):
+                self._queue_past_cursor(group_call)
+            if removed_lead_ids:
+                self.db.query(DialQueueEntry).filter(
+                    DialQueueEntry.group_call_id == group_call.id,
+                    DialQueueEntry.lead_id.in_(removed_lead_ids),
+                    DialQueueEntry.status.in_(WAITING_ENTRY_STATUSES)
+                ).delete(synchronize_session=False)
+            self.db.flush()
+            group_call.total_leads = self.entry_count(group_call.id) + self._member_query(group_id).filter(
+                Lead.id > group_call.last_lead_id
+            ).count()
+
+    def _queue_past_cursor(self, group_call: GroupCall) -> None:
+        """Queue every member past the cursor and advance it, without committing"""
+        while True:
+            rows = self._member_query(group_call.group_id).filter(
+                Lead.id > group_call.last_lead_id
+            ).order_by(Lead.id).limit(settings.dial_queue_enqueue_batch_size).all()
+            if not rows:
+                return
+            self._insert_entries(group_call, rows)
+            group_call.last_lead_id = rows[-1].id
+            self.db.flush()
+
+    def _backfill_dialed_leads(self, group_call: GroupCall) -> int:
+        """Queue a pre-dial-queue group call's already dialed leads as dialed entries.
+
+        Such group calls only tracked ``current_lead_index``; the leads before
+        it are the ones that have a call in the group call, so each gets an
+        entry pointing at its latest call and is skipped when the rest of the
+        group is queued.
+        """
+        latest_call_ids = self.db.query(func.max(Call.id)).filter(
+            Call.group_call_id == group_call.id,
+            Call.lead_id.isnot(None)
+        ).group_by(Call.lead_id)
+        calls = self.db.query(Call).filter(Call.id.in_(latest_call_ids)).all()
+
+        entries = [
+            {
+                'group_call_id': group_call.id,
+                'lead_id': call.lead_id,
+                'user_id': group_call.user_id,
+                'phone_number': call.phone_number,
+                'status': 'dialed',
+                'attempts': 1,
+                'call_id': call.id,
+                'next_attempt_at': call.created_at,
+                'last_attempt_at': call.created_at,
+                'claimed_at': call.created_at,
+                'time_zone': calling_window_service.time_zone_for_phone(call.phone_number),
+            }
+            for call in calls
+        ]
+        if entries:
+            self.db.bulk_insert_mappings(DialQueueEntry, entries)
+            self.db.commit()
+            logger.info(f"Recorded {len(entries)} already dialed lead(s) for group call {group_call.id}")
+        return len(entries)
+
+    def count_group_members(self, group_id: int) -> int:
+        """Number of leads in a group, counted on lead_groups without loading them"""
+        return self.db.query(func.count()).select_from(lead_groups).filter(
+            lead_groups.c.group_id == group_id
+        ).scalar()
+
+    def entry_count(self, group_call_id: int) -> int:
+        return self.db.query(DialQueueEntry).filter(DialQueueEntry.group_call_id == group_call_id).count()
+
+    def _member_query(self, group_id: int):
+        """Columns needed to queue a group's members, straight from lead_groups joined to leads"""
+        return self.db.query(Lead.id, Lead.phone, Lead.priority).join(
+            lead_groups, lead_groups.c.lead_id == Lead.id
+        ).filter(lead_groups.c.group_id == group_id)
+
+    def _insert_entries(self, group_call: GroupCall, rows) -> int:
+        """Bulk insert pending entries for member rows that aren't queued yet"""
+        queued_lead_ids = {
+            row.lead_id for row in self.db.query(DialQueueEntry.lead_id).filter(
+                DialQueueEntry.group_call_id == group_call.id,
+                DialQueueEntry.lead_id.in_([row.id for row in rows])
+            ).all()
+        }
+
+        now = datetime.utcnow()
+        entries = [
+            {
+                'group_call_id': group_call.id,
+                'lead_id': row.id,
+                'user_id': group_call.user_id,
+                'phone_number': row.phone,
+                'status': 'pending',
+                'attempts': 0,
+                'next_attempt_at': now,
+                'last_attempt_at': now,
+                'time_zone': calling_window_service.time_zone_for_phone(row.phone),
+                'priority': row.priority if row.priority is not None else 3,
+            }
+            for row in rows
+            if row.id not in queued_lead_ids
+        ]
+
+        if entries:
+            self.db.bulk_insert_mappings(DialQueueEntry, entries)
+        return len(entries)
+
+    def claim_next(self, group_call_id: int, worker_id: str,
+                   time_zones: Optional[List[str]] = None) -> Optional[DialQueueEntry]:
+        """Claim the next due entry, skipping rows locked by other workers.
+
+        Entries come out by lead priority (5 first), then by last attempt time
+        (enqueue time for leads not dialed yet), in ix_dial_queue_priority
+        order, so the first unlocked row ends the index scan. With
+        ``time_zones`` set (the zones inside the calling window), entries of
+        other zones are parked and parked entries of those zones released
+        first, so only entries bucketed into open zones (or queued before
+        zones were recorded) are considered. The row lock is held until
+        the caller commits, so the caller should create its call record in the
+        same transaction.
+        """
+        now = datetime.utcnow()
+        self.release_due_retries(group_call_id, now)
+        self.park_closed_zones(group_call_id, time_zones)
+
+        query = self.db.query(DialQueueEntry).filter(
+            DialQueueEntry.group_call_id == group_call_id,
+            DialQueueEntry.status == "pending"
+        )
+        if time_zones is not None:
+            query = query.filter(self._in_time_zones(time_zones))
+
+        entry = query.order_by(
+            DialQueueEntry.priority.desc(),
+            DialQueueEntry.last_attempt_at,
+            DialQueueEntry.id
+        ).with_for_update(skip_locked=True).first()
+
+        if not entry:
+            return None
+
+        entry.status = "dialed"
+        entry.attempts = (entry.attempts or 0) + 1
+        entry.claimed_by = worker_id
+        entry.claimed_at = now
+        entry.last_attempt_at = now
+        return entry
+
+    def reclaim_stale_claims(self, now: Optional[datetime] = None) -> int:
+        """Put back entries claimed by a dial that never got a call SID.
+
+        A worker that dies between claiming an entry and recording Twilio's
+        call SID leaves the entry ``dialed`` and its call ``initiated``
+        forever, holding a line. The dialer refreshes ``claimed_at`` while a
+        dial waits on the rate limiter or Twilio; once it is older than the
+        claim timeout, the call is marked failed and the entry returns to pending
+        without using up an attempt. The caller commits.
+        """
+        cutoff = (now or datetime.utcnow()) - timedelta(seconds=settings.dial_queue_claim_timeout_seconds)
+        stale = self.db.query(DialQueueEntry).outerjoin(Call, Call.id == DialQueueEntry.call_id).filter(
+            DialQueueEntry.status == "dialed",
+            DialQueueEntry.claimed_at < cutoff,
+            Call.call_sid.is_(None)
+        ).with_for_update(of=DialQueueEntry, skip_locked=True).all()
+
+        for entry in stale:
+            if entry.call_id is not None:
+                self.db.query(Call).filter(Call.id == entry.call_id).update(
+                    {Call.status: "failed"}, synchronize_session=False
+                )
+            logger.warning(
+                f"Claim on lead {entry.lead_id} in group call {entry.group_call_id} by {entry.claimed_by} "
+                f"went stale; putting it back in the queue"
+            )
+            entry.status = "pending"
+            entry.attempts = max(0, (entry.attempts or 1) - 1)
+            entry.call_id = None
+            entry.claimed_by = None
+            entry.claimed_at = None
+        return len(stale)
+
+    def park_closed_zones(self, group_call_id: int, time_zones: Optional[List[str]]) -> int:
+        """Move entries between pending and parked as zones enter and leave the window.
+
+        Pending entries of zones outside ``time_zones`` are parked and parked
+        entries of zones inside it go back to pending; with ``time_zones``
+        None (windows disabled) every parked entry is released. Both updates
+        look zones up on ix_dial_queue_zone_due. Returns the number of entries
+        released; the caller commits.
+        """
+        parked = self.db.query(DialQueueEntry).filter(
+            DialQueueEntry.group_call_id == group_call_id,
+            DialQueueEntry.status == "parked"
+        )
+        if time_zones is None:
+            return parked.update({DialQueueEntry.status: "pending"}, synchronize_session=False)
+
+        closed_zones = [zone for zone in calling_window_service.known_time_zones if zone not in time_zones]
+        if closed_zones:
+            self.db.query(DialQueueEntry).filter(
+                DialQueueEntry.group_call_id == group_call_id,
+                DialQueueEntry.status == "pending",
+                DialQueueEntry.time_zone.in_(closed_zones)
+            ).update({DialQueueEntry.status: "parked"}, synchronize_session=False)
+        if not time_zones:
+            return 0
+        return parked.filter(DialQueueEntry.time_zone.in_(time_zones)).update(
+            {DialQueueEntry.status: "pending"}, synchronize_session=False
+        )
+
+    def touch_claim(self, entry_id: int, now: Optional[datetime] = None) -> int:
+        """Refresh the claim time of an entry whose dial is still in flight; the caller commits"""
+        return self.db.query(DialQueueEntry).filter(
+            DialQueueEntry.id == entry_id,
+            DialQueueEntry.status == "dialed"
+        ).update({DialQueueEntry.claimed_at: now or datetime.utcnow()}, synchronize_session=False)
+
+    def release_due_retries(self, group_call_id: int, now: Optional[datetime] = None) -> int:
+        """Move scheduled retries whose time has come back to pending; the caller commits"""
+        return self.db.query(DialQueueEntry).filter(
+            DialQueueEntry.group_call_id == group_call_id,
+            DialQueueEntry.status == "scheduled",
+            DialQueueEntry.next_attempt_at <= (now or datetime.utcnow())
+        ).update({DialQueueEntry.status: "pending"}, synchronize_session=False)
+
+    def schedule_retry(self, call: Call, group_call: GroupCall, transient_error: bool = False) -> Optional[datetime]:
+        """Put the call's queue entry back in line after a busy/no-answer outcome.
+
+        ``transient_error`` marks a dial that Twilio never placed because of a
+        rate limit, server error or timeout; it is retried whatever the call's
+        status. Uses exponential backoff from the group call's retry policy.
+        Returns the next attempt time, or None when the lead has used all its
+        attempts. The caller commits.
+        """
+        if not transient_error and call.status not in RETRYABLE_CALL_STATUSES:
+            return None
+
+        entry = self.db.query(DialQueueEntry).filter(DialQueueEntry.call_id == call.id).first()
+        if not entry:
+            return None
+
+        max_attempts = group_call.max_attempts or settings.retry_max_attempts
+        if (entry.attempts or 0) >= max_attempts:
+            return None
+
+        base = group_call.retry_backoff_seconds or settings.retry_backoff_seconds
+        delay = min(base * 2 ** max(0, (entry.attempts or 1) - 1), settings.retry_backoff_max_seconds)
+        # Spread retries out a little so a busy batch doesn't come back all at once
+        delay *= random.uniform(0.9, 1.1)
+
+        entry.status = "scheduled"
+        entry.next_attempt_at = datetime.utcnow() + timedelta(seconds=delay)
+
+        logger.info(
+            f"Lead {entry.lead_id} in group call {group_call.id} retry {entry.attempts + 1}/{max_attempts} "
+            f"at {entry.next_attempt_at.isoformat()}"
+        )
+        return entry.next_attempt_at
+
+    def update_lead_priority(self, lead_id: int, priority: int) -> int:
+        """Re-rank a lead's entries that are still waiting; the caller commits"""
+        return self.db.query(DialQueueEntry).filter(
+            DialQueueEntry.lead_id == lead_id,
+            DialQueueEntry.status.in_(WAITING_ENTRY_STATUSES)
+        ).update({DialQueueEntry.priority: priority}, synchronize_session=False)
+
+    def remove_lead(self, lead_id: int) -> int:
+        """Drop every entry of a lead about to be deleted; the caller commits"""
+        return self.db.query(DialQueueEntry).filter(
+            DialQueueEntry.lead_id == lead_id
+        ).delete(synchronize_session=False)
+
+    def pending_count(self, group_call_id: int, time_zones: Optional[List[str]] = None) -> int:
+        """Count entries still waiting to be dialed, including scheduled retries"""
+        query = self.db.query(DialQueueEntry).filter(
+            DialQueueEntry.group_call_id == group_call_id,
+            DialQueueEntry.status.in_(WAITING_ENTRY_STATUSES)
+        )
+        if time_zones is not None:
+            query = query.filter(self._in_time_zones(time_zones))
+        return query.count()
+
+    def finished_count(self, group_call_id: int) -> int:
+        """Count entries done for good: their latest call ended and no retry is waiting"""
+        return self.db.query(DialQueueEntry).join(Call, Call.id == DialQueueEntry.call_id).filter(
+            DialQueueEntry.group_call_id == group_call_id,
+            DialQueueEntry.status.notin_(WAITING_ENTRY_STATUSES),
+            Call.status.in_(FINISHED_CALL_STATUSES)
+        ).count()
+
+    @staticmethod
+    def _in_time_zones(time_zones: List[str]):
+        return or_(DialQueueEntry.time_zone.is_(None), DialQueueEntry.time_zone.in_(time_zones))
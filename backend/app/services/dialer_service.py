@@ -0,0 +1,400 @@
+import asyncio
+import logging
+import os
+import socket
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Set
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.database.database import SessionLocal
+from app.models.models import Call, GroupCall, User
+from app.services.call_context_cache import call_context_cache
+from app.services.calling_window_service import calling_window_service
+from app.services.dial_queue_service import DialQueueService
+from app.services.llm_session_pool import llm_session_pool
+from app.services.pacing_service import predictive_pacer
+from app.services.twilio_service import TwilioService, is_transient_error
+
+logger = logging.getLogger(__name__)
+
+# Call statuses that still occupy a line
+ACTIVE_CALL_STATUSES = ["initiated", "queued", "ringing", "in-progress", "answered"]
+
+# Active statuses where the callee picked up and a bot is talking
+CONNECTED_CALL_STATUSES = ["in-progress", "answered"]
+
+# Twilio statuses after which a call is finished and its line is free
+TERMINAL_CALL_STATUSES = ["completed", "busy", "no-answer", "failed", "canceled"]
+
+
+class DialerService:
+    """Keeps N calls in flight for every running group call.
+
+    Each in-progress group call gets its own asyncio task which tops up free
+    slots, then sleeps until the poll interval elapses or ``notify`` is called.
+    Leads come from the persistent dial queue, so loops in several processes
+    can drain the same campaign and a restarted process picks up where the
+    previous one stopped.
+    """
+
+    def __init__(self):
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._twilio_service: Optional[TwilioService] = None
+        self._twilio_lock: Optional[asyncio.Lock] = None
+        self._tasks: Dict[int, asyncio.Task] = {}
+        self._wakeups: Dict[int, asyncio.Event] = {}
+        self._one_shot_tasks: Set[asyncio.Task] = set()
+        self._discovery_task: Optional[asyncio.Task] = None
+        self._closing = False
+
+    async def get_twilio_service(self) -> TwilioService:
+        """Twilio client, created on first dial so importing the dialer needs no credentials.
+
+        Built in a thread: TwilioService checks its credentials with a
+        blocking API call, which would otherwise stall every call on the loop.
+        """
+        if self._twilio_service is None:
+            if self._twilio_lock is None:
+                self._twilio_lock = asyncio.Lock()
+            async with self._twilio_lock:
+                if self._twilio_service is None:
+                    self._twilio_service = await asyncio.to_thread(TwilioService)
+        return self._twilio_service
+
+    def start(self, group_call_id: int) -> None:
+        """Start the dialing loop for a group call (no-op if already running)"""
+        if self._closing:
+            return
+        task = self._tasks.get(group_call_id)
+        if task and not task.done():
+            self.notify(group_call_id)
+            return
+
+        self._wakeups[group_call_id] = asyncio.Event()
+        self._tasks[group_call_id] = asyncio.create_task(self._run(group_call_id))
+        logger.info(f"Dialer started for group call {group_call_id}")
+
+    def notify(self, group_call_id: int) -> None:
+        """Wake the dialing loop so it re-checks free slots immediately"""
+        event = self._wakeups.get(group_call_id)
+        if event:
+            event.set()
+
+    def on_call_finished(self, group_call_id: int) -> None:
+        """Refill the line freed by a finished call.
+
+        Wakes the local loop if this process runs one; otherwise does a single
+        fill pass here, so a webhook landing on any worker keeps the queue moving.
+        Does nothing once the dialer is shutting down.
+        """
+        if self._closing:
+            return
+        if self.is_running(group_call_id):
+            self.notify(group_call_id)
+        else:
+            task = asyncio.create_task(self._fill_once(group_call_id))
+            self._one_shot_tasks.add(task)
+            task.add_done_callback(self._one_shot_tasks.discard)
+
+    def is_running(self, group_call_id: int) -> bool:
+        task = self._tasks.get(group_call_id)
+        return bool(task and not task.done())
+
+    async def stop(self, group_call_id: int) -> None:
+        """Stop the dialing loop for a group call; calls already placed keep running"""
+        task = self._tasks.pop(group_call_id, None)
+        self._wakeups.pop(group_call_id, None)
+        if task and not task.done():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    async def resume_active(self) -> None:
+        """Restart loops for group calls left in progress by a previous process.
+
+        Also puts back queue entries whose claiming worker died mid-dial, and
+        queues group calls started before the dial queue existed.
+        """
+        group_call_ids = await asyncio.to_thread(self._prepare_active)
+
+        resumed = [group_call_id for group_call_id in group_call_ids if not self.is_running(group_call_id)]
+        for group_call_id in resumed:
+            self.start(group_call_id)
+
+        if resumed:
+            logger.info(f"Resumed dialer for {len(resumed)} group call(s)")
+
+    def _prepare_active(self) -> List[int]:
+        db = SessionLocal()
+        try:
+            queue = DialQueueService(db)
+            reclaimed = queue.reclaim_stale_claims()
+            db.commit()
+            if reclaimed:
+                logger.info(f"Put {reclaimed} stale dial queue claim(s) back in the queue")
+
+            group_calls = db.query(GroupCall).filter(GroupCall.status == "in_progress").all()
+            for group_call in group_calls:
+                if group_call.last_lead_id is None:
+                    queue.enqueue_group_call(group_call)
+            return [group_call.id for group_call in group_calls]
+        finally:
+            db.close()
+
+    def start_discovery(self) -> None:
+        """Periodically join in-progress group calls started by other processes"""
+        if settings.dialer_discovery_interval_seconds > 0 and self._discovery_task is None:
+            self._discovery_task = asyncio.create_task(self._discover())
+
+    async def shutdown(self) -> None:
+        """Stop every dialing loop and refill pass, then close the Twilio connection pool"""
+        self._closing = True
+        if self._discovery_task:
+            self._discovery_task.cancel()
+            try:
+                await self._discovery_task
+            except asyncio.CancelledError:
+                pass
+            self._discovery_task = None
+
+        for group_call_id in list(self._tasks.keys()):
+            await self.stop(group_call_id)
+
+        one_shot_tasks = list(self._one_shot_tasks)
+        for task in one_shot_tasks:
+            task.cancel()
+        await asyncio.gather(*one_shot_tasks, return_exceptions=True)
+
+        if self._twilio_service is not None:
+            await self._twilio_service.aclose()
+
+    def get_concurrency_limit(self, group_call: GroupCall, db: Session) -> int:
+        """Resolve the line limit: group call override, then user setting, then global default"""
+        limit = group_call.max_concurrent_calls
+        if not limit:
+            user = db.query(User).filter(User.id == group_call.user_id).first()
+            limit = user.max_concurrent_calls if user else None
+        if not limit:
+            limit = settings.dialer_concurrent_calls
+        return max(1, min(limit, settings.dialer_max_concurrent_calls))
+
+    def count_active_calls(self, group_call_id: int, db: Session, statuses: List[str] = ACTIVE_CALL_STATUSES) -> int:
+        """Count calls of a group call that still hold a line"""
+        cutoff = datetime.utcnow() - timedelta(seconds=settings.dialer_call_timeout_seconds)
+        return db.query(Call).filter(
+            Call.group_call_id == group_call_id,
+            Call.status.in_(statuses),
+            Call.created_at >= cutoff
+        ).count()
+
+    async def dial_next_lead(self, group_call: GroupCall, db: Session) -> Optional[Call]:
+        """Claim the next queue entry whose lead is inside the calling window and dial it.
+
+        Returns the created call record, or None when no entry is available.
+        """
+        open_zones = calling_window_service.open_time_zones(group_call)
+        entry = DialQueueService(db).claim_next(group_call.id, self.worker_id, open_zones)
+        if entry is None:
+            db.commit()
+            return None
+
+        # Create the call record in the same transaction as the claim
+        call = Call(
+            lead_id=entry.lead_id,
+            user_id=group_call.user_id,
+            phone_number=entry.phone_number,
+            status="initiated",
+            purpose=group_call.purpose,
+            custom_prompt=group_call.custom_prompt,
+            additional_notes=group_call.additional_notes,
+            group_call_id=group_call.id
+        )
+        db.add(call)
+        db.flush()
+        entry.call_id = call.id
+        db.query(GroupCall).filter(GroupCall.id == group_call.id).update(
+            {GroupCall.current_lead_index: GroupCall.current_lead_index + 1},
+            synchronize_session=False
+        )
+        db.commit()
+        db.refresh(call)
+
+        # Initiate Twilio call without blocking the event loop. The dial can
+        # wait in the rate limiter for longer than the claim timeout, so the
+        # claim is kept fresh until Twilio answers
+        keep_claim = asyncio.create_task(self._keep_claim(entry.id))
+        try:
+            twilio_service = await self.get_twilio_service()
+            call_sid = await twilio_service.initiate_call_async(entry.phone_number, entry.lead_id)
+        except Exception as e:
+            logger.error(f"Failed to initiate Twilio call: {str(e)}")
+            call.status = "failed"
+            # Rate limits, Twilio 5xx and timeouts go back in the queue with backoff
+            retry_at = None
+            if is_transient_error(e):
+                retry_at = DialQueueService(db).schedule_retry(call, group_call, transient_error=True)
+            if retry_at is None:
+                entry.status = "failed"
+                # No status webhook will arrive for this call, so count it here
+                db.query(GroupCall).filter(GroupCall.id == group_call.id).update(
+                    {GroupCall.completed_calls: GroupCall.completed_calls + 1},
+                    synchronize_session=False
+                )
+            db.commit()
+            return call
+        finally:
+            keep_claim.cancel()
+
+        logger.info(f"Call initiated for lead {entry.lead_id} in group call {group_call.id}")
+
+        # The call is live from here on: bookkeeping failures must not mark it
+        # failed or re-dial the lead, and must leave the session usable
+        try:
+            call.call_sid = call_sid
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Failed to record call SID {call_sid} for call {call.id}: {str(e)}")
+            return call
+
+        try:
+            await call_context_cache.remember_async(call, db)
+            llm_session_pool.prewarm(call_sid)
+        except Exception as e:
+            db.rollback()
+            # The media stream loads the context itself when it isn't cached
+            logger.warning(f"Failed to prepare call {call_sid} ahead of the answer: {str(e)}")
+
+        return call
+
+    async def dial_manually(self, group_call_id: int, db: Session) -> Optional[Call]:
+        """Place one call for an in-progress or paused group call on request.
+
+        Takes the same row lock and line limit as the dialing loops, so a
+        manual dial can't overshoot the limit or race them. Returns None when
+        every line is busy or no entry can be claimed.
+        """
+        group_call = self._lock_group_call(group_call_id, db)
+        if not group_call or group_call.status not in ("in_progress", "paused"):
+            db.commit()
+            return None
+
+        active = self.count_active_calls(group_call_id, db)
+        if active >= self._line_target(group_call, active, db):
+            db.commit()
+            return None
+        return await self.dial_next_lead(group_call, db)
+
+    def _lock_group_call(self, group_call_id: int, db: Session) -> Optional[GroupCall]:
+        return db.query(GroupCall).filter(
+            GroupCall.id == group_call_id
+        ).populate_existing().with_for_update().first()
+
+    def _line_target(self, group_call: GroupCall, active: int, db: Session) -> int:
+        """Calls the group call may have in flight right now"""
+        limit = self.get_concurrency_limit(group_call, db)
+        if group_call.pacing_mode == "predictive":
+            # The line limit becomes bot capacity; dial ahead by the observed answer rate
+            connected = self.count_active_calls(group_call.id, db, CONNECTED_CALL_STATUSES)
+            limit = predictive_pacer.target_for_user(
+                group_call.user_id, db, capacity=limit, connected=connected, dialing=active - connected
+            )
+        return limit
+
+    async def _keep_claim(self, entry_id: int) -> None:
+        """Refresh a queue entry's claim while its dial is in flight, so it isn't reclaimed as stale"""
+        while True:
+            await asyncio.sleep(settings.dial_queue_claim_timeout_seconds / 3)
+            try:
+                await asyncio.to_thread(self._touch_claim, entry_id)
+            except Exception as e:
+                logger.warning(f"Failed to refresh the claim on dial queue entry {entry_id}: {str(e)}")
+
+    @staticmethod
+    def _touch_claim(entry_id: int) -> None:
+        db = SessionLocal()
+        try:
+            DialQueueService(db).touch_claim(entry_id)
+            db.commit()
+        finally:
+            db.close()
+
+    async def fill_slots(self, group_call_id: int) -> bool:
+        """Dial until the group call has no free lines left.
+
+        Returns False once the loop should stop (paused, deleted or finished).
+        """
+        db = SessionLocal()
+        try:
+            while True:
+                # Lock the group call row while counting lines and claiming an
+                # entry, so workers on other processes can't overshoot the limit.
+                # dial_next_lead commits before dialing, which releases the lock.
+                group_call = self._lock_group_call(group_call_id, db)
+                if not group_call or group_call.status != "in_progress":
+                    db.commit()
+                    return False
+
+                active = self.count_active_calls(group_call_id, db)
+                if active >= self._line_target(group_call, active, db):
+                    db.commit()
+                    return True
+
+                call = await self.dial_next_lead(group_call, db)
+                if call is not None:
+                    continue
+
+                # Nothing left to claim right now (queue drained, retries not yet
+                # due or every remaining zone outside its window); finish once
+                # the queue is drained and idle
+                if active == 0 and DialQueueService(db).pending_count(group_call_id) == 0:
+                    group_call.status = "completed"
+                    db.commit()
+                    logger.info(f"Group call {group_call_id} completed")
+                    return False
+
+                return True
+        finally:
+            db.close()
+
+    async def _fill_once(self, group_call_id: int) -> None:
+        try:
+            await self.fill_slots(group_call_id)
+        except Exception as e:
+            logger.error(f"Failed to refill group call {group_call_id}: {str(e)}")
+
+    async def _discover(self) -> None:
+        while True:
+            await asyncio.sleep(settings.dialer_discovery_interval_seconds)
+            try:
+                await self.resume_active()
+            except Exception as e:
+                logger.error(f"Dialer discovery failed: {str(e)}")
+
+    async def _run(self, group_call_id: int) -> None:
+        try:
+            while await self.fill_slots(group_call_id):
+                wakeup = self._wakeups.get(group_call_id)
+                if wakeup is None:
+                    break
+                try:
+                    await asyncio.wait_for(wakeup.wait(), timeout=settings.dialer_poll_interval_seconds)
+                except asyncio.TimeoutError:
+                    pass
+                wakeup.clear()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Dialer loop for group call {group_call_id} failed: {str(e)}")
+        finally:
+            if self._tasks.get(group_call_id) is asyncio.current_task():
+                self._tasks.pop(group_call_id, None)
+                self._wakeups.pop(group_call_id, None)
+
+
+# Process-wide dialer shared by the API routers and webhooks
+dialer_service = DialerService()
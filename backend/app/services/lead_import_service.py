@@ -0,0 +1,395 @@
+import asyncio
+import json
+import logging
+import os
+import shutil
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, BinaryIO, Dict, List, Optional, Set
+
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.database.database import SessionLocal
+from app.models.models import LeadImportJob
+from app.services.lead_service import ImportedPhones, LeadService, lead_file_format
+
+logger = logging.getLogger(__name__)
+
+# Jobs that can still make progress
+OPEN_JOB_STATUSES = ["queued", "running"]
+
+# Jobs that stopped before the end of their file and can be resumed
+RESUMABLE_JOB_STATUSES = ["failed", "canceled"]
+
+
+class LeadImportJobService:
+    """Creates and controls a user's background lead import jobs"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def create_job(self, file: BinaryIO, filename: str, user_id: int) -> LeadImportJob:
+        """Store an upload and queue it for import"""
+        os.makedirs(settings.lead_import_upload_dir, exist_ok=True)
+        # Keep the extension: it tells the worker how to read the file
+        file_path = os.path.join(settings.lead_import_upload_dir, uuid.uuid4().hex + os.path.splitext(filename)[1].lower())
+        with open(file_path, "wb") as stored:
+            shutil.copyfileobj(file, stored, 1024 * 1024)
+
+        job = LeadImportJob(user_id=user_id, filename=filename, file_path=file_path, status="queued")
+        self.db.add(job)
+        try:
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            os.remove(file_path)
+            raise
+        self.db.refresh(job)
+        return job
+
+    def get_job(self, job_id: int, user_id: int) -> Optional[LeadImportJob]:
+        return self.db.query(LeadImportJob).filter(
+            LeadImportJob.id == job_id, LeadImportJob.user_id == user_id
+        ).first()
+
+    def list_jobs(self, user_id: int, limit: int = 20) -> List[LeadImportJob]:
+        return self.db.query(LeadImportJob).filter(
+            LeadImportJob.user_id == user_id
+        ).order_by(LeadImportJob.id.desc()).limit(limit).all()
+
+    def cancel_job(self, job_id: int, user_id: int) -> Optional[LeadImportJob]:
+        """Cancel a queued or running job.
+
+        A running job stops at its next chunk: that chunk is rolled back, so
+        the job keeps the progress of its last committed chunk and can be
+        resumed from there.
+        """
+        job = self.get_job(job_id, user_id)
+        if not job:
+            return None
+        if job.status not in OPEN_JOB_STATUSES:
+            raise ValueError(f"Import job is already {job.status}")
+
+        self.db.query(LeadImportJob).filter(
+            LeadImportJob.id == job_id, LeadImportJob.status.in_(OPEN_JOB_STATUSES)
+        ).update({
+            LeadImportJob.status: "canceled",
+            LeadImportJob.claimed_by: None,
+            LeadImportJob.finished_at: datetime.utcnow(),
+        }, synchronize_session=False)
+        self.db.commit()
+        self.db.refresh(job)
+        return job
+
+    def resume_job(self, job_id: int, user_id: int) -> Optional[LeadImportJob]:
+        """Queue a failed or canceled job again; it continues after its last committed chunk"""
+        job = self.get_job(job_id, user_id)
+        if not job:
+            return None
+        if job.status not in RESUMABLE_JOB_STATUSES:
+            raise ValueError(f"Only failed or canceled import jobs can be resumed (job is {job.status})")
+        if not os.path.exists(job.file_path):
+            raise ValueError("The uploaded file of this import job is no longer available")
+
+        self.db.query(LeadImportJob).filter(
+            LeadImportJob.id == job_id, LeadImportJob.status.in_(RESUMABLE_JOB_STATUSES)
+        ).update({
+            LeadImportJob.status: "queued",
+            LeadImportJob.failure: None,
+            LeadImportJob.finished_at: None,
+        }, synchronize_session=False)
+        self.db.commit()
+        self.db.refresh(job)
+        return job
+
+    @staticmethod
+    def describe(job: LeadImportJob) -> Dict[str, Any]:
+        """Progress report of a job for the API"""
+        processing_seconds = job.processing_seconds or 0.0
+        return {
+            "id": job.id,
+            "filename": job.filename,
+            "status": job.status,
+            "rows_processed": job.rows_processed or 0,
+            "rows_imported": job.rows_imported or 0,
+            "error_count": job.error_count or 0,
+            "errors": json.loads(job.errors) if job.errors else [],
+            "rows_per_second": round((job.rows_processed or 0) / processing_seconds, 1) if processing_seconds else None,
+            "failure": job.failure,
+            "created_at": job.created_at,
+            "started_at": job.started_at,
+            "finished_at": job.finished_at,
+        }
+
+
+class _JobReleased(Exception):
+    """The job was canceled or taken over while a chunk was being imported"""
+
+
+class LeadImportWorkerPool:
+    """Runs queued lead import jobs in the background.
+
+    ``lead_import_workers`` asyncio tasks per process claim queued jobs with
+    a conditional update, so every process can share the queue, and import
+    them in a thread with LeadService's streaming import. Each chunk's leads
+    are committed in the same transaction as the job's progress, on the
+    condition that the job is still running under this worker: a canceled
+    job stops at its next chunk with nothing half-written, and a resumed one
+    skips the rows already committed. Each task claims jobs under its own
+    worker id and keeps a heartbeat on its job while it runs, however slow
+    a chunk is; a job whose heartbeat is older than
+    ``lead_import_stale_seconds`` is taken over. On shutdown, running jobs
+    stop at their next chunk and go back to the queue.
+    """
+
+    def __init__(self):
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup = asyncio.Event()
+        self._stopping = threading.Event()
+        self._last_purge = 0.0
+        self.running_jobs: Set[int] = set()
+        self.counters = {"completed": 0, "failed": 0, "released": 0, "rows_processed": 0, "rows_imported": 0}
+
+    def start(self) -> None:
+        """Start the worker tasks (no-op if they are running)"""
+        self._tasks = [task for task in self._tasks if not task.done()]
+        if self._tasks or self._stopping.is_set():
+            return
+        self._tasks = [
+            asyncio.create_task(self._run(f"{self.worker_id}:{index}"))
+            for index in range(max(1, settings.lead_import_workers))
+        ]
+
+    def notify(self) -> None:
+        """Wake idle workers to pick up a newly queued job"""
+        self.start()
+        self._wakeup.set()
+
+    async def _run(self, worker_id: str) -> None:
+        while not self._stopping.is_set():
+            try:
+                job_id = await asyncio.to_thread(self._claim, worker_id)
+                if job_id is not None:
+                    heartbeat = asyncio.create_task(self._heartbeat(job_id, worker_id))
+                    try:
+                        await asyncio.to_thread(self._process, job_id, worker_id)
+                    finally:
+                        heartbeat.cancel()
+                    continue
+                await asyncio.to_thread(self._purge_files)
+            except Exception as e:
+                logger.error(f"Lead import worker error: {str(e)}")
+
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), settings.lead_import_poll_interval_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    async def _heartbeat(self, job_id: int, worker_id: str) -> None:
+        """Keep a running job's heartbeat fresh between chunks, so a slow chunk isn't taken over"""
+        while True:
+            await asyncio.sleep(settings.lead_import_stale_seconds / 3)
+            try:
+                await asyncio.to_thread(self._touch, job_id, worker_id)
+            except Exception as e:
+                logger.warning(f"Failed to refresh the heartbeat of lead import job {job_id}: {str(e)}")
+
+    @staticmethod
+    def _touch(job_id: int, worker_id: str) -> None:
+        db = SessionLocal()
+        try:
+            db.query(LeadImportJob).filter(
+                LeadImportJob.id == job_id,
+                LeadImportJob.status == "running",
+                LeadImportJob.claimed_by == worker_id,
+            ).update({LeadImportJob.heartbeat_at: datetime.utcnow()}, synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+
+    def _claim(self, worker_id: str) -> Optional[int]:
+        """Claim the oldest queued job, or a running one whose worker went quiet"""
+        db = SessionLocal()
+        try:
+            now = datetime.utcnow()
+            claimable = or_(
+                LeadImportJob.status == "queued",
+                (LeadImportJob.status == "running")
+                & (LeadImportJob.heartbeat_at < now - timedelta(seconds=settings.lead_import_stale_seconds)),
+            )
+            candidates = db.query(LeadImportJob.id).filter(claimable).order_by(LeadImportJob.id).limit(10).all()
+            for (job_id,) in candidates:
+                # Conditional on the job still being claimable, so only one worker wins it
+                claimed = db.query(LeadImportJob).filter(LeadImportJob.id == job_id, claimable).update({
+                    LeadImportJob.status: "running",
+                    LeadImportJob.claimed_by: worker_id,
+                    LeadImportJob.heartbeat_at: now,
+                }, synchronize_session=False)
+                db.commit()
+                if claimed == 1:
+                    return job_id
+            return None
+        finally:
+            db.close()
+
+    def _process(self, job_id: int, worker_id: str) -> None:
+        """Import a claimed job's file from its last committed row to the end"""
+        db = SessionLocal()
+        self.running_jobs.add(job_id)
+        try:
+            job = db.query(LeadImportJob).filter(LeadImportJob.id == job_id).first()
+            lead_service = LeadService(db)
+            if job.imported_since is None:
+                self._update(db, job_id, worker_id, {
+                    LeadImportJob.imported_since: lead_service.highest_lead_id(),
+                    LeadImportJob.started_at: datetime.utcnow(),
+                })
+                db.refresh(job)
+
+            skip = job.rows_processed or 0
+            errors: List[str] = json.loads(job.errors) if job.errors else []
+            imported = ImportedPhones(job.imported_since)
+            position = 0
+            with open(job.file_path, "rb") as file:
+                for chunk in lead_service.read_import_chunks(file, lead_file_format(job.file_path)):
+                    first_row = position + 1
+                    position += len(chunk)
+                    # Rows committed by an earlier run still count as earlier in the file
+                    if position <= skip:
+                        imported.add(chunk)
+                        continue
+                    if skip >= first_row:
+                        # Resume mid-chunk when the chunk size changed between runs
+                        imported.add(chunk.iloc[:skip - first_row + 1])
+                        chunk = chunk.iloc[skip - first_row + 1:]
+                        first_row = skip + 1
+                    if self._stopping.is_set():
+                        self._release(db, job_id, worker_id)
+                        return
+
+                    started = time.perf_counter()
+                    chunk_imported, chunk_errors = lead_service.import_chunk(
+                        chunk, job.user_id, first_row, imported
+                    )
+                    errors.extend(chunk_errors[:settings.lead_import_max_errors - len(errors)])
+                    self._update(db, job_id, worker_id, {
+                        LeadImportJob.rows_processed: position,
+                        LeadImportJob.rows_imported: LeadImportJob.rows_imported + chunk_imported,
+                        LeadImportJob.error_count: LeadImportJob.error_count + len(chunk_errors),
+                        LeadImportJob.errors: json.dumps(errors),
+                        LeadImportJob.processing_seconds:
+                            LeadImportJob.processing_seconds + (time.perf_counter() - started),
+                    })
+                    self.counters["rows_processed"] += len(chunk)
+                    self.counters["rows_imported"] += chunk_imported
+
+            self._update(db, job_id, worker_id, {
+                LeadImportJob.status: "completed",
+                LeadImportJob.claimed_by: None,
+                LeadImportJob.finished_at: datetime.utcnow(),
+            })
+            self.counters["completed"] += 1
+            self._remove_file(job.file_path)
+            logger.info(f"Lead import job {job_id} completed ({position} rows)")
+
+        except _JobReleased:
+            db.rollback()
+            logger.info(f"Lead import job {job_id} was canceled or taken over, stopped")
+        except Exception as e:
+            db.rollback()
+            self.counters["failed"] += 1
+            logger.error(f"Lead import job {job_id} failed: {str(e)}")
+            try:
+                self._update(db, job_id, worker_id, {
+                    LeadImportJob.status: "failed",
+                    LeadImportJob.failure: str(e),
+                    LeadImportJob.claimed_by: None,
+                    LeadImportJob.finished_at: datetime.utcnow(),
+                })
+            except _JobReleased:
+                db.rollback()
+            except Exception as update_error:
+                db.rollback()
+                logger.error(f"Failed to mark lead import job {job_id} as failed: {str(update_error)}")
+        finally:
+            self.running_jobs.discard(job_id)
+            db.close()
+
+    @staticmethod
+    def _update(db: Session, job_id: int, worker_id: str, values: Dict) -> None:
+        """Update the job and commit with whatever else is pending, if this worker still runs it"""
+        values[LeadImportJob.heartbeat_at] = datetime.utcnow()
+        updated = db.query(LeadImportJob).filter(
+            LeadImportJob.id == job_id,
+            LeadImportJob.status == "running",
+            LeadImportJob.claimed_by == worker_id,
+        ).update(values, synchronize_session=False)
+        if updated != 1:
+            raise _JobReleased()
+        db.commit()
+
+    def _release(self, db: Session, job_id: int, worker_id: str) -> None:
+        """Hand a job back to the queue at its last committed chunk (shutdown)"""
+        db.query(LeadImportJob).filter(
+            LeadImportJob.id == job_id,
+            LeadImportJob.status == "running",
+            LeadImportJob.claimed_by == worker_id,
+        ).update({LeadImportJob.status: "queued", LeadImportJob.claimed_by: None}, synchronize_session=False)
+        db.commit()
+        self.counters["released"] += 1
+        logger.info(f"Lead import job {job_id} released for another worker")
+
+    def _purge_files(self) -> None:
+        """Delete uploads of failed/canceled jobs past the retention window, at most once an hour"""
+        now = time.time()
+        if now - self._last_purge < 3600:
+            return
+        self._last_purge = now
+        cutoff = datetime.utcnow() - timedelta(hours=settings.lead_import_file_retention_hours)
+        db = SessionLocal()
+        try:
+            jobs = db.query(LeadImportJob.file_path).filter(
+                LeadImportJob.status.in_(RESUMABLE_JOB_STATUSES),
+                LeadImportJob.finished_at < cutoff,
+            ).all()
+            for (file_path,) in jobs:
+                self._remove_file(file_path)
+        finally:
+            db.close()
+
+    @staticmethod
+    def _remove_file(file_path: str) -> None:
+        try:
+            os.remove(file_path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"Could not remove lead import upload {file_path}: {str(e)}")
+
+    def stats(self) -> Dict[str, Any]:
+        stats: Dict[str, Any] = {
+            "worker_id": self.worker_id,
+            "workers": len([task for task in self._tasks if not task.done()]),
+            "running_jobs": sorted(self.running_jobs),
+        }
+        stats.update(self.counters)
+        return stats
+
+    async def shutdown(self) -> None:
+        """Stop the workers; running jobs go back to the queue at their next chunk (app shutdown)"""
+        self._stopping.set()
+        self._wakeup.set()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+            self._tasks = []
+
+
+# Process-wide pool running queued lead import jobs
+lead_import_workers = LeadImportWorkerPool()
@@ -0,0 +1,137 @@
+import re
+from typing import List, Optional
+
+from sqlalchemy import and_, case, func, or_
+from sqlalchemy.orm import Query
+from sqlalchemy.sql.elements import ColumnElement
+
+from app.core.config import settings
+from app.models.models import Lead, lead_phone_digits, lead_search_text
+
+# Formatting characters dropped from phones (the same ones lead_phone_digits strips)
+PHONE_FORMATTING = re.compile(r"[+\-\s().]")
+
+# Digits a search needs before it is treated as (part of) a phone number
+MIN_PHONE_SEARCH_DIGITS = 3
+
+
+def phone_digits(search: str) -> Optional[str]:
+    """Digits of a search that looks like (part of) a phone number, else None"""
+    digits = PHONE_FORMATTING.sub("", search)
+    if len(digits) >= MIN_PHONE_SEARCH_DIGITS and digits.isdigit():
+        return digits
+    return None
+
+
+def search_words(search: str) -> List[str]:
+    """Lowercased words of a search, escaped for LIKE"""
+    return [
+        word.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        for word in search.lower().split()
+    ]
+
+
+def _phone_numbers(digits: str) -> List[str]:
+    # Phones are stored as typed, with or without the +1 country code, so
+    # "+1 415 555" should also find "4155550001"
+    if digits.startswith("1") and len(digits) > MIN_PHONE_SEARCH_DIGITS:
+        return [digits, digits[1:]]
+    return [digits]
+
+
+def _phone_match(digits: str) -> ColumnElement:
+    return or_(*[lead_phone_digits.like(f"%{number}%") for number in _phone_numbers(digits)])
+
+
+def _phone_rank(digits: str) -> ColumnElement:
+    """0 for phones starting with the digits (after an optional country code 1),
+    1 for phones containing them, 2 for leads matched on text only"""
+    prefixes = dict.fromkeys(
+        prefix for number in _phone_numbers(digits) for prefix in (number, "1" + number)
+    )
+    return case(
+        (or_(*[lead_phone_digits.like(f"{prefix}%") for prefix in prefixes]), 0),
+        (_phone_match(digits), 1),
+        else_=2
+    )
+
+
+def _text_match(words: List[str]) -> ColumnElement:
+    return and_(*[lead_search_text.like(f"%{word}%", escape="\\") for word in words])
+
+
+def _filter_phone(query: Query, search: str, digits: str) -> Query:
+    # Anywhere in the number, as the old ILIKE search matched; numbers that
+    # start with the digits come first. The digits may also be part of a
+    # name, company or email ("jdoe123"), so text matches follow
+    return query.filter(
+        or_(_phone_match(digits), _text_match(search_words(search)))
+    ).order_by(_phone_rank(digits), lead_phone_digits, Lead.id)
+
+
+class TrigramLeadSearch:
+    """PostgreSQL search: pg_trgm GIN indexes on lead_search_text, ranked by
+    word similarity, and on lead_phone_digits for phone-like searches."""
+
+    def filter(self, query: Query, search: str) -> Query:
+        digits = phone_digits(search)
+        if digits:
+            return _filter_phone(query, search, digits)
+
+        words = search_words(search)
+        if not words:
+            return query
+        rank = func.word_similarity(search.lower(), lead_search_text)
+        return query.filter(_text_match(words)).order_by(rank.desc(), Lead.id)
+
+
+class BasicLeadSearch:
+    """Search without PostgreSQL extensions, for SQLite/local runs.
+
+    Phone-like searches scan lead_phone_digits within the user's entries of
+    the (user_id, lead_phone_digits) index, and lead_search_text for their
+    text matches; text searches scan lead_search_text. Text matches are not ranked: ordering by id lets the
+    scan stop at the first page, while any computed rank has SQLite sort
+    every match.
+    """
+
+    def filter(self, query: Query, search: str) -> Query:
+        digits = phone_digits(search)
+        if digits:
+            return _filter_phone(query, search, digits)
+
+        words = search_words(search)
+        if not words:
+            return query
+        return query.filter(_text_match(words)).order_by(Lead.id)
+
+
+class LeadSearch:
+    """Filters and ranks a lead query by a free-text search.
+
+    Searches that look like a phone number match leads whose normalized
+    phone contains those digits, numbers starting with them (with or
+    without the +1 country code) first, then leads whose name, company or
+    email contain the search as typed. Other searches match leads whose
+    name, company or email contain every word, best matches first where the
+    backend ranks them. The backend follows ``lead_search_backend``.
+    """
+
+    def __init__(self, backend=None):
+        self.backend = backend or self._default_backend()
+
+    @staticmethod
+    def _default_backend():
+        backend = settings.lead_search_backend
+        if backend == "auto":
+            backend = "trigram" if settings.database_url.startswith("postgresql") else "basic"
+        return TrigramLeadSearch() if backend == "trigram" else BasicLeadSearch()
+
+    def apply(self, query: Query, search: Optional[str]) -> Query:
+        if not search or not search.strip():
+            return query
+        return self.backend.filter(query, search.strip())
+
+
+# Process-wide lead search, shared by every request
+lead_search = LeadSearch()
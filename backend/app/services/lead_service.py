@@ -1,14 +1,91 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, or_
+from sqlalchemy import func, and_
+from sqlalchemy.dialects import postgresql, sqlite
+from app.core.config import settings
 from app.models.models import Lead
 from app.schemas.schemas import LeadCreate, LeadUpdate
+from app.services.dial_queue_service import DialQueueService
+from app.services.lead_search import lead_search
+import numpy as np
 import pandas as pd
-import io
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
 import logging
-from typing import Dict, List, Optional
+import math
+import os
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
+# Columns kept as text when streaming, so every chunk parses them alike
+LEAD_IMPORT_TEXT_COLUMNS = ['name', 'phone', 'email', 'company', 'title', 'address', 'notes', 'status']
+
+# How every import reads CSV columns, so a phone like 4155551111 is stored as
+# typed rather than as the float 4155551111.0
+LEAD_IMPORT_CSV_DTYPES = {name: str for name in LEAD_IMPORT_TEXT_COLUMNS}
+
+# Every column an import reads
+LEAD_IMPORT_COLUMNS = LEAD_IMPORT_TEXT_COLUMNS + ['priority']
+
+# Lead file formats by file extension
+LEAD_FILE_FORMATS = {'.csv': 'csv', '.parquet': 'parquet', '.arrow': 'arrow', '.feather': 'arrow'}
+
+# Columns of a lead export, in order
+LEAD_EXPORT_SCHEMA = pa.schema([
+    ('id', pa.int64()),
+    ('name', pa.string()),
+    ('phone', pa.string()),
+    ('email', pa.string()),
+    ('company', pa.string()),
+    ('title', pa.string()),
+    ('address', pa.string()),
+    ('notes', pa.string()),
+    ('priority', pa.int64()),
+    ('status', pa.string()),
+    ('created_at', pa.timestamp('us', tz='UTC')),
+    ('updated_at', pa.timestamp('us', tz='UTC')),
+])
+
+
+def lead_file_format(filename: str) -> Optional[str]:
+    """Format of a lead file from its extension (csv, parquet or arrow), None if unsupported"""
+    return LEAD_FILE_FORMATS.get(os.path.splitext(filename or '')[1].lower())
+
+
+class ImportedPhones:
+    """Phones in the rows a chunked import has already read, to tell a phone
+    repeated in the file from one that already existed.
+
+    Only a lead above ``imported_since`` (the highest lead id when the import
+    started) whose phone was also in an earlier chunk counts as coming from
+    this file; leads created meanwhile by the API or another import are
+    reported as already existing. Phones are kept as a sorted array of 64-bit
+    hashes, 8 bytes a row, so memory stays small on multi-million row files.
+    """
+
+    def __init__(self, imported_since: int):
+        self.imported_since = imported_since
+        self._hashes = np.empty(0, dtype=np.uint64)
+
+    @staticmethod
+    def _hash(phones: List[str]) -> np.ndarray:
+        return pd.util.hash_array(np.asarray(phones, dtype=object), categorize=False)
+
+    def add(self, chunk: pd.DataFrame) -> None:
+        """Record the phones of a chunk once it has been imported (or skipped on resume)"""
+        if 'phone' in chunk.columns:
+            phones = chunk['phone'].dropna().astype(str).tolist()
+            self._hashes = np.union1d(self._hashes, self._hash(phones))
+
+    def seen(self, phones: List[str]) -> List[str]:
+        """The phones from `phones` that were in an earlier chunk"""
+        if not phones:
+            return []
+        found = np.isin(self._hash(phones), self._hashes)
+        return [phone for phone, hit in zip(phones, found) if hit]
+
+
 class LeadService:
     def __init__(self, db: Session):
         self.db = db
@@ -35,21 +112,15 @@ class LeadService:
         """Get leads for the specified user with filtering"""
         query = self.db.query(Lead).filter(Lead.user_id == user_id)
         
-        if search:
-            search_filter = or_(
-                Lead.name.ilike(f"%{search}%"),
-                Lead.company.ilike(f"%{search}%"),
-                Lead.email.ilike(f"%{search}%"),
-                Lead.phone.ilike(f"%{search}%")
-            )
-            query = query.filter(search_filter)
-        
         if status:
             query = query.filter(Lead.status == status)
         
         if priority:
             query = query.filter(Lead.priority == priority)
         
+        # Indexed name/company/email and phone number search, best matches first
+        query = lead_search.apply(query, search)
+        
         total = query.count()
         leads = query.offset(skip).limit(limit).all()
         
@@ -94,6 +165,10 @@ class LeadService:
         for field, value in update_data.items():
             setattr(lead, field, value)
         
+        # Keep queued group call dials in line with the new priority
+        if update_data.get('priority') is not None:
+            DialQueueService(self.db).update_lead_priority(lead.id, update_data['priority'])
+        
         self.db.commit()
         self.db.refresh(lead)
         return lead
@@ -104,67 +179,286 @@ class LeadService:
         if not lead:
             return False
         
+        # Queue entries reference the lead, so they go first
+        DialQueueService(self.db).remove_lead(lead.id)
         self.db.delete(lead)
         self.db.commit()
         return True
 
-    def import_leads_from_csv(self, content: bytes, user_id: int) -> Dict:
-        """Import leads from CSV content for the specified user"""
+    def import_leads_from_stream(self, file: BinaryIO, user_id: int, file_format: str = 'csv') -> Dict:
+        """Import leads from a CSV, Parquet or Arrow file object for the
+        specified user, in chunks.
+
+        Reads ``lead_import_chunk_rows`` rows at a time and commits each
+        chunk, so memory stays flat whatever the file size. Text columns are
+        read as text, so a phone keeps its exact form whichever chunk it is
+        in. Phones repeated across chunks are caught through ImportedPhones.
+        At most ``lead_import_max_errors`` row errors are listed. If the
+        import fails midway, chunks committed before the failure are kept.
+        """
+        imported_count = 0
+        error_count = 0
+        errors: List[str] = []
         try:
-            # Read CSV content
-            df = pd.read_csv(io.BytesIO(content))
-            
-            imported_count = 0
-            errors = []
-            
-            for index, row in df.iterrows():
-                try:
-                    # Validate required fields
-                    if pd.isna(row.get('name')) or pd.isna(row.get('phone')):
-                        errors.append(f"Row {index + 1}: Missing required fields (name or phone)")
-                        continue
-                    
-                    # Check if phone already exists for this user
-                    existing_lead = self.db.query(Lead).filter(
-                        and_(Lead.phone == str(row['phone']), Lead.user_id == user_id)
-                    ).first()
-                    
-                    if existing_lead:
-                        errors.append(f"Row {index + 1}: Phone number {row['phone']} already exists for this user")
-                        continue
-                    
-                    # Create lead data
-                    lead_data = {
-                        'name': str(row['name']),
-                        'phone': str(row['phone']),
-                        'email': str(row.get('email', '')) if not pd.isna(row.get('email')) else None,
-                        'company': str(row.get('company', '')) if not pd.isna(row.get('company')) else None,
-                        'title': str(row.get('title', '')) if not pd.isna(row.get('title')) else None,
-                        'address': str(row.get('address', '')) if not pd.isna(row.get('address')) else None,
-                        'notes': str(row.get('notes', '')) if not pd.isna(row.get('notes')) else None,
-                        'priority': int(row.get('priority', 3)) if not pd.isna(row.get('priority')) else 3,
-                        'status': str(row.get('status', 'pending')) if not pd.isna(row.get('status')) else 'pending',
-                        'user_id': user_id
-                    }
-                    
-                    # Create the lead
-                    db_lead = Lead(**lead_data)
-                    self.db.add(db_lead)
-                    imported_count += 1
-                    
-                except Exception as e:
-                    errors.append(f"Row {index + 1}: {str(e)}")
-                    continue
-            
-            self.db.commit()
-            return {
-                'imported_count': imported_count,
-                'errors': errors
-            }
-            
+            imported = ImportedPhones(self.highest_lead_id())
+            first_row = 1
+            for chunk in self.read_import_chunks(file, file_format):
+                chunk_imported, chunk_errors = self.import_chunk(chunk, user_id, first_row, imported)
+                self.db.commit()
+                imported_count += chunk_imported
+                first_row += len(chunk)
+
+                error_count += len(chunk_errors)
+                errors.extend(chunk_errors[:settings.lead_import_max_errors - len(errors)])
+
         except Exception as e:
-            logger.error(f"Error importing leads: {str(e)}")
-            raise ValueError(f"Failed to import leads: {str(e)}")
+            self.db.rollback()
+            logger.error(f"Error importing leads after {imported_count} rows: {str(e)}")
+            raise ValueError(f"Failed to import leads after {imported_count} rows: {str(e)}")
+
+        if error_count > len(errors):
+            errors.append(f"... and {error_count - len(errors)} more rows with errors")
+        return {
+            'imported_count': imported_count,
+            'errors': errors
+        }
+
+    def export_leads(self, user_id: int, file: BinaryIO, file_format: str = 'parquet',
+                     status: Optional[str] = None, priority: Optional[int] = None) -> int:
+        """Write the user's leads to `file` as Parquet or an Arrow IPC file.
+
+        Leads are read in id order, ``lead_import_batch_size`` at a time,
+        and each batch is written as one record batch (a row group in
+        Parquet), so memory stays flat however many leads there are. Returns
+        the number of leads written.
+        """
+        if file_format == 'parquet':
+            writer = pq.ParquetWriter(file, LEAD_EXPORT_SCHEMA)
+        elif file_format == 'arrow':
+            writer = pa.ipc.new_file(file, LEAD_EXPORT_SCHEMA)
+        else:
+            raise ValueError(f"Unsupported lead export format: {file_format}")
+
+        columns = [getattr(Lead, field.name) for field in LEAD_EXPORT_SCHEMA]
+        exported = 0
+        last_id = 0
+        try:
+            while True:
+                query = self.db.query(*columns).filter(Lead.user_id == user_id, Lead.id > last_id)
+                if status:
+                    query = query.filter(Lead.status == status)
+                if priority:
+                    query = query.filter(Lead.priority == priority)
+                rows = query.order_by(Lead.id).limit(settings.lead_import_batch_size).all()
+                if not rows:
+                    break
+                writer.write_batch(pa.RecordBatch.from_arrays(
+                    [pa.array(values, type=field.type) for values, field in zip(zip(*rows), LEAD_EXPORT_SCHEMA)],
+                    schema=LEAD_EXPORT_SCHEMA
+                ))
+                exported += len(rows)
+                last_id = rows[-1].id
+        finally:
+            writer.close()
+        return exported
+
+    def highest_lead_id(self) -> int:
+        """Highest lead id so far; an import started now only inserts leads above it"""
+        return self.db.query(func.max(Lead.id)).scalar() or 0
+
+    @staticmethod
+    def read_import_chunks(file: BinaryIO, file_format: str = 'csv') -> Iterator[pd.DataFrame]:
+        """Rows of a lead file in frames of ``lead_import_chunk_rows``"""
+        if file_format == 'csv':
+            return pd.read_csv(
+                file,
+                chunksize=settings.lead_import_chunk_rows,
+                dtype=LEAD_IMPORT_CSV_DTYPES,
+            )
+        if file_format == 'parquet':
+            # Row groups are decoded one batch at a time, only for the lead columns
+            parquet = pq.ParquetFile(file)
+            columns = [name for name in parquet.schema_arrow.names if name in LEAD_IMPORT_COLUMNS]
+            batches = parquet.iter_batches(batch_size=settings.lead_import_chunk_rows, columns=columns)
+        elif file_format == 'arrow':
+            batches = LeadService._arrow_batches(file)
+        else:
+            raise ValueError(f"Unsupported lead file format: {file_format}")
+        return (LeadService._arrow_frame(batch) for batch in batches)
+
+    @staticmethod
+    def _arrow_batches(file: BinaryIO) -> Iterator[pa.RecordBatch]:
+        """Record batches of an Arrow IPC file, re-sliced to ``lead_import_chunk_rows``"""
+        name = getattr(file, 'name', None)
+        if isinstance(name, str) and os.path.isfile(name):
+            # Memory-mapped, so batches reference the file's pages without copying
+            source = pa.memory_map(name)
+        else:
+            source = file
+        reader = pa.ipc.open_file(source)
+        chunk_rows = settings.lead_import_chunk_rows
+        for index in range(reader.num_record_batches):
+            batch = reader.get_batch(index)
+            for offset in range(0, batch.num_rows, chunk_rows):
+                yield batch.slice(offset, chunk_rows)
+
+    @staticmethod
+    def _arrow_frame(batch: pa.RecordBatch) -> pd.DataFrame:
+        """DataFrame of the lead columns of a record batch, text columns cast to strings"""
+        columns = {}
+        for name in batch.schema.names:
+            if name in LEAD_IMPORT_TEXT_COLUMNS:
+                columns[name] = LeadService._arrow_text(batch.column(name))
+            elif name in LEAD_IMPORT_COLUMNS:
+                columns[name] = batch.column(name)
+        return pa.table(columns).to_pandas() if columns else pd.DataFrame(index=range(batch.num_rows))
+
+    @staticmethod
+    def _arrow_text(values: pa.Array) -> pa.Array:
+        """Strings of an Arrow column; whole floats are written without a
+        fraction or exponent, as a CSV holds them (14155551111.0 -> "14155551111")"""
+        if pa.types.is_floating(values.type):
+            try:
+                values = pc.cast(values, pa.int64())
+            except pa.ArrowInvalid:
+                pass  # Fractional or out of range values keep their float form
+        return pc.cast(values, pa.string())
+
+    def import_chunk(self, chunk: pd.DataFrame, user_id: int, first_row: int,
+                     imported: ImportedPhones) -> Tuple[int, List[str]]:
+        """Insert the valid leads of one chunk of a streamed import; returns
+        how many were inserted and the chunk's row errors in row order. The
+        caller commits."""
+        leads, rows, errors = self._prepare_import(chunk, user_id, first_row, imported)
+        imported_count = self._insert_leads(user_id, leads, rows, errors)
+        imported.add(chunk)
+        return imported_count, [errors[row] for row in sorted(errors)]
+
+    def _prepare_import(self, df: pd.DataFrame, user_id: int, first_row: int,
+                        imported: ImportedPhones) -> Tuple[List[Dict], List[int], Dict[int, str]]:
+        """Lead rows ready to insert, their row numbers, and per-row errors
+        ({row number: message}) for a chunk of rows, the first of which is
+        row `first_row`.
+
+        `imported` holds the phones of earlier chunks: leads this import
+        inserted for them are reported as repeated in the file rather than
+        as already existing.
+        """
+        rows = pd.Series(range(first_row, first_row + len(df)), index=df.index)
+        errors: Dict[int, str] = {}
+
+        def column(name: str) -> pd.Series:
+            return df[name] if name in df.columns else pd.Series(None, index=df.index, dtype=object)
+
+        # Validate required fields
+        missing = column('name').isna() | column('phone').isna()
+        for row in rows[missing]:
+            errors[row] = f"Row {row}: Missing required fields (name or phone)"
+        df = df[~missing]
+        rows = rows[~missing]
+        phones = column('phone').astype(str)
+
+        # Check which phones already exist for this user, one query per batch
+        known = self._existing_phones(user_id, phones.unique().tolist())
+        from_file = set(imported.seen(
+            [phone for phone, lead_id in known.items() if lead_id > imported.imported_since]
+        ))
+        existing = phones.isin(set(known) - from_file)
+        for row, phone in zip(rows[existing], phones[existing]):
+            errors[row] = f"Row {row}: Phone number {phone} already exists for this user"
+        df, rows, phones = df[~existing], rows[~existing], phones[~existing]
+
+        priorities, priority_errors = self._import_priorities(column('priority'))
+        for index, message in priority_errors.items():
+            errors[rows[index]] = f"Row {rows[index]}: {message}"
+        valid = ~df.index.isin(list(priority_errors))
+        df, rows, phones, priorities = df[valid], rows[valid], phones[valid], priorities[valid]
+
+        # The same phone twice in the file: the first valid row wins
+        repeated = phones.duplicated(keep='first') | phones.isin(from_file)
+        for row, phone in zip(rows[repeated], phones[repeated]):
+            errors[row] = f"Row {row}: Phone number {phone} appears more than once in this file"
+        df, rows, phones, priorities = df[~repeated], rows[~repeated], phones[~repeated], priorities[~repeated]
+
+        def text(name: str, default: Optional[str] = None) -> List[Optional[str]]:
+            values = column(name)
+            return values.astype(str).where(values.notna(), default).tolist()
+
+        leads = pd.DataFrame({
+            'name': column('name').astype(str).tolist(),
+            'phone': phones.tolist(),
+            'email': text('email'),
+            'company': text('company'),
+            'title': text('title'),
+            'address': text('address'),
+            'notes': text('notes'),
+            'priority': priorities.tolist(),
+            'status': text('status', 'pending'),
+            'user_id': user_id,
+        })
+        return leads.to_dict('records'), rows.tolist(), errors
+
+    @staticmethod
+    def _import_priorities(values: pd.Series) -> Tuple[pd.Series, Dict[object, str]]:
+        """Priorities as int (3 where empty), plus the error of each value int() rejects"""
+        priorities = pd.Series(3, index=values.index, dtype=object)
+        present = values.notna()
+        errors: Dict[object, str] = {}
+        if pd.api.types.is_numeric_dtype(values.dtype) and not pd.api.types.is_bool_dtype(values.dtype):
+            numbers = values[present].astype(float)
+            finite = numbers.map(math.isfinite)
+            priorities[numbers.index[finite]] = numbers[finite].astype('int64').tolist()
+            candidates = values[present][~finite]
+        else:
+            candidates = values[present]
+        # Strings (and inf) go through int() itself, for the same result and message
+        for index, value in candidates.items():
+            try:
+                priorities[index] = int(value)
+            except Exception as e:
+                errors[index] = str(e)
+        return priorities, errors
+
+    def _existing_phones(self, user_id: int, phones: List[str]) -> Dict[str, int]:
+        """Phones from `phones` that this user already has leads for, with the lead id"""
+        existing: Dict[str, int] = {}
+        batch_size = settings.lead_import_batch_size
+        for start in range(0, len(phones), batch_size):
+            existing.update(
+                self.db.query(Lead.phone, Lead.id).filter(
+                    Lead.user_id == user_id,
+                    Lead.phone.in_(phones[start:start + batch_size])
+                )
+            )
+        return existing
+
+    def _insert_leads(self, user_id: int, leads: List[Dict], rows: List[int], errors: Dict[int, str]) -> int:
+        """Bulk insert lead rows in batches; returns how many were inserted.
+        The caller commits.
+
+        Rows whose phone the user has by now (a lead committed meanwhile by
+        the API or another import) are skipped by ON CONFLICT DO NOTHING on
+        uq_lead_phone_user instead of failing the batch, and are added to
+        `errors` as already existing.
+        """
+        # Core rather than ORM insert: the ORM splits a batch into one statement
+        # per combination of empty columns
+        dialect = postgresql if self.db.get_bind().dialect.name == 'postgresql' else sqlite
+        leads_table = Lead.__table__
+        statement = dialect.insert(leads_table).on_conflict_do_nothing(
+            index_elements=['phone', 'user_id']
+        ).returning(leads_table.c.phone)
+        inserted = 0
+        batch_size = settings.lead_import_batch_size
+        for start in range(0, len(leads), batch_size):
+            batch = leads[start:start + batch_size]
+            added = set(self.db.execute(statement, batch).scalars())
+            inserted += len(added)
+            if len(added) < len(batch):
+                for lead, row in zip(batch, rows[start:start + batch_size]):
+                    if lead['phone'] not in added:
+                        errors[row] = f"Row {row}: Phone number {lead['phone']} already exists for this user"
+        return inserted
 
     def get_lead_statistics(self, user_id: int) -> Dict:
         """Get lead statistics for the specified user"""
@@ -0,0 +1,158 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, Optional
+
+from app.core.config import settings
+from app.services.call_context_cache import call_context_cache
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PrewarmedSession:
+    """An LLM session opened for a call that has not connected its media stream yet"""
+    call_sid: str
+    created_at: float
+    context: Dict[str, Any] = field(default_factory=dict)
+    llm: Any = None
+    opening: Optional[asyncio.Task] = None
+
+
+class LLMSessionPool:
+    """Speech-to-speech LLM sessions opened while the phone is ringing.
+
+    A session is opened (call context fetched from the call context cache,
+    Live API handshake done) when the dial succeeds or Twilio reports `ringing`,
+    keyed by call_sid. The media WebSocket claims it when the callee answers
+    instead of connecting from scratch. Sessions nobody claims (unanswered
+    calls, or streams that land on another worker) are closed after
+    ``llm_prewarm_ttl_seconds`` or when the call reaches a terminal status.
+    """
+
+    def __init__(self):
+        self._sessions: Dict[str, PrewarmedSession] = {}
+        self._sweeper: Optional[asyncio.Task] = None
+        self.counters = {"opened": 0, "failed": 0, "claimed": 0, "missed": 0, "expired": 0, "discarded": 0, "skipped": 0}
+        self._ttfa: Dict[str, Deque[float]] = {"warm": deque(maxlen=1000), "cold": deque(maxlen=1000)}
+
+    def prewarm(self, call_sid: Optional[str]) -> bool:
+        """Start opening a session for call_sid in the background; False if skipped"""
+        if not settings.llm_prewarm_enabled or not call_sid or call_sid in self._sessions:
+            return False
+        if len(self._sessions) >= settings.llm_prewarm_max_sessions:
+            self.counters["skipped"] += 1
+            logger.warning(f"LLM pre-warm pool full ({len(self._sessions)} sessions), not pre-warming {call_sid}")
+            return False
+
+        session = PrewarmedSession(call_sid=call_sid, created_at=time.monotonic())
+        session.opening = asyncio.create_task(self._open(session))
+        self._sessions[call_sid] = session
+        if self._sweeper is None or self._sweeper.done():
+            self._sweeper = asyncio.create_task(self._sweep())
+        return True
+
+    async def _open(self, session: PrewarmedSession) -> None:
+        # bot_service pulls in pipecat; import it only when a session is opened
+        from app.services import bot_service
+
+        try:
+            context = await call_context_cache.get_async(session.call_sid)
+            llm = bot_service.create_llm_service(context["system_instruction"])
+            prewarm = getattr(llm, "prewarm", None)
+            if prewarm is None or not await prewarm():
+                raise RuntimeError("session did not connect")
+            session.context = context
+            session.llm = llm
+            self.counters["opened"] += 1
+            logger.info(f"Pre-warmed LLM session for {session.call_sid} in {time.monotonic() - session.created_at:.2f}s")
+        except Exception as e:
+            self.counters["failed"] += 1
+            logger.error(f"Failed to pre-warm LLM session for {session.call_sid}: {str(e)}")
+
+    async def claim(self, call_sid: str) -> Optional[PrewarmedSession]:
+        """Take the session opened for call_sid, or None to connect as usual.
+
+        A handshake still in flight is waited for up to
+        ``llm_prewarm_claim_wait_seconds``; it started earlier than a fresh
+        one would, so it is never slower to wait for it.
+        """
+        session = self._sessions.pop(call_sid, None)
+        if session is None:
+            self.counters["missed"] += 1
+            return None
+
+        if not session.opening.done():
+            try:
+                await asyncio.wait_for(asyncio.shield(session.opening), settings.llm_prewarm_claim_wait_seconds)
+            except asyncio.TimeoutError:
+                logger.warning(f"Pre-warmed LLM session for {call_sid} not ready in time, connecting fresh")
+                asyncio.create_task(self._close(session))
+                self.counters["missed"] += 1
+                return None
+
+        if session.llm is None:
+            self.counters["missed"] += 1
+            return None
+        self.counters["claimed"] += 1
+        return session
+
+    async def discard(self, call_sid: str) -> None:
+        """Close the session for a call that ended without connecting its stream"""
+        session = self._sessions.pop(call_sid, None)
+        if session:
+            self.counters["discarded"] += 1
+            await self._close(session)
+
+    async def _close(self, session: PrewarmedSession) -> None:
+        if session.opening and not session.opening.done():
+            session.opening.cancel()
+            try:
+                await session.opening
+            except asyncio.CancelledError:
+                pass
+        if session.llm is not None:
+            try:
+                await session.llm.close()
+            except Exception as e:
+                logger.error(f"Error closing pre-warmed LLM session for {session.call_sid}: {str(e)}")
+
+    async def _sweep(self) -> None:
+        """Close sessions nobody claimed within the TTL; exits when the pool is empty"""
+        ttl = settings.llm_prewarm_ttl_seconds
+        while self._sessions:
+            await asyncio.sleep(min(ttl / 2, 5.0))
+            now = time.monotonic()
+            for call_sid, session in list(self._sessions.items()):
+                if now - session.created_at >= ttl and self._sessions.pop(call_sid, None):
+                    self.counters["expired"] += 1
+                    logger.info(f"Pre-warmed LLM session for {call_sid} expired unclaimed")
+                    await self._close(session)
+
+    def record_ttfa(self, seconds: float, prewarmed: bool) -> None:
+        """Time to first audio of a call, for comparing warm and cold starts"""
+        self._ttfa["warm" if prewarmed else "cold"].append(seconds)
+
+    def stats(self) -> Dict[str, Any]:
+        stats: Dict[str, Any] = {"enabled": settings.llm_prewarm_enabled, "open_sessions": len(self._sessions)}
+        stats.update(self.counters)
+        for kind, samples in self._ttfa.items():
+            ordered = sorted(samples)
+            stats[f"ttfa_{kind}_calls"] = len(ordered)
+            stats[f"ttfa_{kind}_p50_ms"] = round(ordered[len(ordered) // 2] * 1000) if ordered else None
+            stats[f"ttfa_{kind}_p95_ms"] = round(ordered[int(len(ordered) * 0.95)] * 1000) if ordered else None
+        return stats
+
+    async def shutdown(self) -> None:
+        """Close every open session (app shutdown)"""
+        if self._sweeper:
+            self._sweeper.cancel()
+        sessions = list(self._sessions.values())
+        self._sessions.clear()
+        await asyncio.gather(*(self._close(session) for session in sessions))
+
+
+# Process-wide pool shared by the dialer, webhooks and the media WebSocket
+llm_session_pool = LLMSessionPool()
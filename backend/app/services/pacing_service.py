@@ -0,0 +1,227 @@
+import heapq
+import logging
+import math
+import threading
+import time
+from collections import deque
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.models import Call
+
+logger = logging.getLogger(__name__)
+
+# Terminal statuses that count as a dial attempt for answer-rate purposes
+FINISHED_CALL_STATUSES = ["completed", "busy", "no-answer", "failed", "canceled"]
+
+
+def is_answered(status: Optional[str], duration: Optional[int]) -> bool:
+    """A call was answered if Twilio completed it with talk time"""
+    return status == "completed" and bool(duration)
+
+
+class CallOutcomeWindow:
+    """Rolling window of recent call outcomes with O(1) answer-rate and mean-duration updates"""
+
+    def __init__(self, size: int):
+        self._outcomes = deque(maxlen=size)
+        self._answered = 0
+        self._answered_seconds = 0
+        self.loaded_at = 0.0
+
+    def add(self, answered: bool, duration: int) -> None:
+        if len(self._outcomes) == self._outcomes.maxlen:
+            old_answered, old_duration = self._outcomes[0]
+            if old_answered:
+                self._answered -= 1
+                self._answered_seconds -= old_duration
+        self._outcomes.append((answered, duration if answered else 0))
+        if answered:
+            self._answered += 1
+            self._answered_seconds += duration
+
+    @property
+    def samples(self) -> int:
+        return len(self._outcomes)
+
+    @property
+    def answer_rate(self) -> float:
+        if self.samples < settings.pacing_min_samples:
+            return settings.pacing_default_answer_rate
+        return max(self._answered / self.samples, settings.pacing_min_answer_rate)
+
+    @property
+    def mean_duration(self) -> float:
+        if not self._answered:
+            return settings.pacing_default_call_seconds
+        return self._answered_seconds / self._answered
+
+
+class PredictivePacer:
+    """Decides how many calls a predictive group call should have in flight.
+
+    The target keeps the campaign's bot capacity busy: free bot slots (plus
+    connected calls expected to hang up while a new call rings) divided by the
+    observed answer rate gives the number of lines worth dialing. Outcomes are
+    seeded per user from the calls table and updated from the status webhook.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._windows: Dict[int, CallOutcomeWindow] = {}
+
+    def observe(self, user_id: int, status: str, duration: Optional[int]) -> None:
+        """Record a finished call reported by the status webhook"""
+        with self._lock:
+            window = self._windows.get(user_id)
+            if window is not None:
+                window.add(is_answered(status, duration), int(duration or 0))
+
+    def get_window(self, user_id: int, db: Session) -> CallOutcomeWindow:
+        """Outcome window for a user, reloaded from the calls table when stale"""
+        with self._lock:
+            window = self._windows.get(user_id)
+            if window and time.time() - window.loaded_at < settings.pacing_refresh_seconds:
+                return window
+
+        window = self.load_history(user_id, db)
+        with self._lock:
+            self._windows[user_id] = window
+        return window
+
+    def load_history(self, user_id: int, db: Session) -> CallOutcomeWindow:
+        """Build an outcome window from the user's most recent finished calls"""
+        rows = db.query(Call.status, Call.duration).filter(
+            Call.user_id == user_id,
+            Call.status.in_(FINISHED_CALL_STATUSES)
+        ).order_by(Call.id.desc()).limit(settings.pacing_window_calls).all()
+
+        window = CallOutcomeWindow(settings.pacing_window_calls)
+        for status, duration in reversed(rows):
+            window.add(is_answered(status, duration), int(duration or 0))
+        window.loaded_at = time.time()
+        return window
+
+    def target_in_flight(self, capacity: int, connected: int, dialing: int,
+                         answer_rate: float, mean_duration: float) -> int:
+        """Number of calls (connected + dialing) to keep in flight"""
+        # Connected calls expected to end while a freshly dialed call is still ringing
+        expected_hangups = connected * min(1.0, settings.pacing_ring_seconds / max(mean_duration, 1.0))
+        free_bots = max(0.0, capacity - connected + expected_hangups)
+
+        # Calls already ringing will fill part of the free capacity; aggressiveness
+        # trades bot idle time against answered calls finding every bot busy
+        needed_dials = free_bots * settings.pacing_aggressiveness / answer_rate - dialing
+        target = connected + dialing + max(0, math.floor(needed_dials))
+        if free_bots > 0 and connected + dialing == 0:
+            # A small group with a high answer rate can round down to zero dials; keep at least one going
+            target = max(1, target)
+
+        ceiling = math.ceil(capacity * settings.pacing_max_dial_ratio)
+        return max(0, min(target, ceiling))
+
+    def target_for_user(self, user_id: int, db: Session, capacity: int, connected: int, dialing: int) -> int:
+        window = self.get_window(user_id, db)
+        return self.target_in_flight(capacity, connected, dialing, window.answer_rate, window.mean_duration)
+
+    def get_metrics(self, user_id: int, db: Session) -> Dict:
+        window = self.get_window(user_id, db)
+        return {
+            "samples": window.samples,
+            "answer_rate": round(window.answer_rate, 3),
+            "mean_duration": round(window.mean_duration, 1),
+        }
+
+
+class PacingSimulator:
+    """Replays historical call outcomes through a pacing policy, offline.
+
+    Each dial takes the next historical call in order: it rings for
+    ``ring_seconds`` and then either ends (not answered) or holds a bot for its
+    recorded duration. Reports bot utilization and how often answered calls
+    found no free bot (over-dialing).
+    """
+
+    def __init__(self, history: Iterable[Call], capacity: int, ring_seconds: Optional[float] = None,
+                 window_size: Optional[int] = None):
+        if capacity < 1:
+            raise ValueError(f"Capacity must be at least 1 bot, got {capacity}")
+        self.history = [(call.status, int(call.duration or 0)) for call in history]
+        self.capacity = capacity
+        self.ring_seconds = ring_seconds if ring_seconds is not None else settings.pacing_ring_seconds
+        self.window_size = window_size or settings.pacing_window_calls
+
+    def run(self, mode: str = "predictive", fixed_lines: Optional[int] = None, tick_seconds: float = 1.0) -> Dict:
+        lines = self.capacity if fixed_lines is None else fixed_lines
+        if lines < 1:
+            raise ValueError(f"Fixed pacing needs at least 1 line, got {lines}")
+        if tick_seconds <= 0:
+            raise ValueError(f"Tick must be positive, got {tick_seconds}")
+        pacer = PredictivePacer()
+        window = CallOutcomeWindow(self.window_size)
+
+        # (time, kind, answered, duration) events; kinds: "ring_end", "hangup"
+        events: List = []
+        now = 0.0
+        next_call = 0
+        dialing = connected = 0
+        dialed = answered_calls = over_capacity = 0
+        peak_connected = 0
+        busy_bot_seconds = 0.0
+
+        while next_call < len(self.history) or events:
+            # Launch calls for this tick
+            if mode == "predictive":
+                target = pacer.target_in_flight(self.capacity, connected, dialing,
+                                                window.answer_rate, window.mean_duration)
+            else:
+                target = lines
+            while next_call < len(self.history) and connected + dialing < target:
+                status, duration = self.history[next_call]
+                next_call += 1
+                dialed += 1
+                dialing += 1
+                heapq.heappush(events, (now + self.ring_seconds, "ring_end", is_answered(status, duration), duration))
+            if not events:
+                # Nothing in flight and the policy won't dial (e.g. a zero dial ratio)
+                break
+
+            # Advance to the next tick, processing events on the way
+            next_tick = now + tick_seconds
+            while events and events[0][0] <= next_tick:
+                at, kind, answered, duration = heapq.heappop(events)
+                busy_bot_seconds += min(connected, self.capacity) * (at - now)
+                now = at
+                if kind == "ring_end":
+                    dialing -= 1
+                    window.add(answered, duration)
+                    if answered:
+                        answered_calls += 1
+                        if connected >= self.capacity:
+                            over_capacity += 1
+                        connected += 1
+                        peak_connected = max(peak_connected, connected)
+                        heapq.heappush(events, (now + duration, "hangup", True, duration))
+                else:
+                    connected -= 1
+            busy_bot_seconds += min(connected, self.capacity) * (next_tick - now)
+            now = next_tick
+
+        return {
+            "mode": mode,
+            "capacity": self.capacity,
+            "dialed": dialed,
+            "answered": answered_calls,
+            "over_capacity": over_capacity,
+            "over_capacity_rate": round(over_capacity / answered_calls, 4) if answered_calls else 0.0,
+            "peak_connected": peak_connected,
+            "elapsed_seconds": round(now, 1),
+            "bot_utilization": round(busy_bot_seconds / (self.capacity * now), 4) if now else 0.0,
+            "calls_per_hour": round(dialed / now * 3600, 1) if now else 0.0,
+        }
+
+
+# Process-wide pacer shared by the dialer and the status webhook
+predictive_pacer = PredictivePacer()
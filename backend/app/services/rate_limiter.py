@@ -0,0 +1,234 @@
+import asyncio
+import logging
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy.exc import IntegrityError
+
+from app.core.config import settings
+from app.database.database import SessionLocal
+from app.models.models import RateLimitBucket
+
+logger = logging.getLogger(__name__)
+
+# (key, rate per second, burst size)
+BucketSpec = Tuple[str, float, int]
+
+
+class RateLimitTimeout(Exception):
+    """Raised when a dial waited longer than dial_rate_limit_max_wait_seconds"""
+
+
+def _refill(tokens: float, refilled_at: float, now: float, rate: float, burst: int) -> float:
+    return min(float(burst), tokens + max(0.0, now - refilled_at) * rate)
+
+
+class LocalBucketBackend:
+    """In-process token buckets, used for SQLite/local runs or a single worker"""
+
+    in_process = True
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+
+    def try_consume(self, specs: List[BucketSpec]) -> float:
+        """Take one token from every bucket, or return the seconds to wait"""
+        now = time.time()
+        with self._lock:
+            levels = {}
+            for key, rate, burst in specs:
+                tokens, refilled_at = self._buckets.get(key, (float(burst), now))
+                levels[key] = _refill(tokens, refilled_at, now, rate, burst)
+
+            wait = max(
+                ((1.0 - levels[key]) / rate for key, rate, _ in specs if levels[key] < 1.0),
+                default=0.0
+            )
+            for key, _, _ in specs:
+                self._buckets[key] = (levels[key] - (0.0 if wait else 1.0), now)
+            return wait
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            return {key: round(tokens, 3) for key, (tokens, _) in self._buckets.items()}
+
+
+class DatabaseBucketBackend:
+    """Token buckets stored in rate_limit_buckets and updated under row locks,
+    so every process and host shares the same budget."""
+
+    in_process = False
+
+    def try_consume(self, specs: List[BucketSpec]) -> float:
+        """Take one token from every bucket, or return the seconds to wait"""
+        db = SessionLocal()
+        try:
+            now = time.time()
+            rows = {}
+            # Lock in key order so concurrent dialers can't deadlock
+            for key, rate, burst in sorted(specs):
+                row = db.query(RateLimitBucket).filter(
+                    RateLimitBucket.key == key
+                ).with_for_update().first()
+                if row is None:
+                    row = RateLimitBucket(key=key, tokens=float(burst), refilled_at=now)
+                    db.add(row)
+                    db.flush()
+                row.tokens = _refill(row.tokens, row.refilled_at, now, rate, burst)
+                row.refilled_at = now
+                rows[key] = row
+
+            wait = max(
+                ((1.0 - rows[key].tokens) / rate for key, rate, _ in specs if rows[key].tokens < 1.0),
+                default=0.0
+            )
+            if not wait:
+                for row in rows.values():
+                    row.tokens -= 1.0
+            db.commit()
+            return wait
+        except IntegrityError:
+            # Another process created the bucket first; retry shortly
+            db.rollback()
+            return 0.01
+        finally:
+            db.close()
+
+    def snapshot(self) -> Dict[str, float]:
+        db = SessionLocal()
+        try:
+            now = time.time()
+            return {
+                row.key: round(min(row.tokens + (now - row.refilled_at) * self._rate_for(row.key), self._burst_for(row.key)), 3)
+                for row in db.query(RateLimitBucket).all()
+            }
+        finally:
+            db.close()
+
+    @staticmethod
+    def _rate_for(key: str) -> float:
+        return settings.twilio_account_cps if key.startswith("account:") else settings.twilio_number_cps
+
+    @staticmethod
+    def _burst_for(key: str) -> int:
+        return settings.twilio_account_burst if key.startswith("account:") else settings.twilio_number_burst
+
+
+class DialRateLimiter:
+    """Token-bucket limiter for outbound Twilio calls, per account and per from-number.
+
+    Callers over the limit wait in line instead of failing. Waiters in one
+    process are served first-come first-served; across processes the shared
+    buckets decide who goes next.
+    """
+
+    def __init__(self, backend=None):
+        self.backend = backend or self._default_backend()
+        self._async_lock: Optional[asyncio.Lock] = None
+        self._thread_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.acquired_total = 0
+        self.delayed_total = 0
+        self.timeouts_total = 0
+        self.wait_seconds_total = 0.0
+        self.max_wait_seconds = 0.0
+        self.waiting = 0
+
+    @staticmethod
+    def _default_backend():
+        backend = settings.dial_rate_limit_backend
+        if backend == "auto":
+            backend = "database" if settings.database_url.startswith("postgresql") else "local"
+        return DatabaseBucketBackend() if backend == "database" else LocalBucketBackend()
+
+    def bucket_specs(self, account_sid: str, from_number: str) -> List[BucketSpec]:
+        return [
+            (f"account:{account_sid}", settings.twilio_account_cps, settings.twilio_account_burst),
+            (f"number:{from_number}", settings.twilio_number_cps, settings.twilio_number_burst),
+        ]
+
+    async def acquire(self, account_sid: str, from_number: str) -> float:
+        """Wait until a call may be placed; returns the seconds spent waiting"""
+        if self._async_lock is None:
+            self._async_lock = asyncio.Lock()
+
+        specs = self.bucket_specs(account_sid, from_number)
+        started = time.monotonic()
+        self._track_waiting(1)
+        try:
+            async with self._async_lock:
+                while True:
+                    wait = await self._try_consume_async(specs)
+                    if not wait:
+                        break
+                    self._check_timeout(started)
+                    await asyncio.sleep(wait)
+        finally:
+            self._track_waiting(-1)
+        return self._record(time.monotonic() - started)
+
+    def acquire_blocking(self, account_sid: str, from_number: str) -> float:
+        """Blocking variant of acquire for synchronous callers (run it off the event loop)"""
+        specs = self.bucket_specs(account_sid, from_number)
+        started = time.monotonic()
+        self._track_waiting(1)
+        try:
+            with self._thread_lock:
+                while True:
+                    wait = self.backend.try_consume(specs)
+                    if not wait:
+                        break
+                    self._check_timeout(started)
+                    time.sleep(wait)
+        finally:
+            self._track_waiting(-1)
+        return self._record(time.monotonic() - started)
+
+    async def _try_consume_async(self, specs: List[BucketSpec]) -> float:
+        # In-process buckets are served inline; the database backend locks rows
+        # and commits, so it runs in a thread to keep the event loop free
+        if self.backend.in_process:
+            return self.backend.try_consume(specs)
+        return await asyncio.to_thread(self.backend.try_consume, specs)
+
+    def get_metrics(self) -> Dict:
+        """Limiter counters and current bucket levels"""
+        with self._stats_lock:
+            metrics = {
+                "backend": type(self.backend).__name__,
+                "account_cps": settings.twilio_account_cps,
+                "number_cps": settings.twilio_number_cps,
+                "acquired_total": self.acquired_total,
+                "delayed_total": self.delayed_total,
+                "timeouts_total": self.timeouts_total,
+                "wait_seconds_total": round(self.wait_seconds_total, 3),
+                "max_wait_seconds": round(self.max_wait_seconds, 3),
+                "waiting": self.waiting,
+            }
+        metrics["buckets"] = self.backend.snapshot()
+        return metrics
+
+    def _check_timeout(self, started: float) -> None:
+        if time.monotonic() - started > settings.dial_rate_limit_max_wait_seconds:
+            with self._stats_lock:
+                self.timeouts_total += 1
+            raise RateLimitTimeout("Timed out waiting for a dialing slot")
+
+    def _track_waiting(self, delta: int) -> None:
+        with self._stats_lock:
+            self.waiting += delta
+
+    def _record(self, waited: float) -> float:
+        with self._stats_lock:
+            self.acquired_total += 1
+            if waited > 0.001:
+                self.delayed_total += 1
+                self.wait_seconds_total += waited
+                self.max_wait_seconds = max(self.max_wait_seconds, waited)
+        return waited
+
+
+# Process-wide limiter used by every Twilio dial
+dial_rate_limiter = DialRateLimiter()
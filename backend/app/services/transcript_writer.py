@@ -0,0 +1,205 @@
+import asyncio
+import logging
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Deque, Dict, List, Optional, Set
+
+from app.core.config import settings
+from app.database.database import SessionLocal
+from app.models.models import ConversationMessage
+
+logger = logging.getLogger(__name__)
+
+
+def _parse_timestamp(timestamp: Optional[str]) -> datetime:
+    if timestamp:
+        try:
+            return datetime.fromisoformat(timestamp)
+        except ValueError:
+            pass
+    return datetime.now(timezone.utc)
+
+
+class TranscriptWriter:
+    """Buffers live call transcripts and bulk-inserts them into conversation_messages.
+
+    The bot pipeline only appends to an in-memory buffer per call, so
+    transcription never waits on the database. A writer task flushes every
+    buffer in one bulk insert every ``transcript_flush_interval_seconds``, or
+    sooner once ``transcript_flush_batch_size`` messages are waiting. Each
+    call's buffer holds at most ``transcript_buffer_max_messages``; if the
+    database falls that far behind, the oldest unwritten lines of that call
+    are dropped rather than growing memory. A call's buffer is flushed when
+    its pipeline ends, and everything left is flushed on shutdown. If the
+    bulk insert fails, each call is written on its own, so one bad line only
+    holds back its own call; a call whose lines fail
+    ``transcript_write_max_attempts`` times in a row loses them.
+    """
+
+    def __init__(self):
+        self._buffers: Dict[int, Deque[Dict[str, Any]]] = {}
+        self._pending = 0
+        self._overflowing: Set[int] = set()
+        self._failures: Dict[int, int] = {}
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._writer: Optional[asyncio.Task] = None
+        self._closing = False
+        self.counters = {"received": 0, "written": 0, "dropped": 0, "batches": 0, "failed": 0}
+
+    def add(self, call_id: int, role: str, content: str, timestamp: Optional[str] = None) -> None:
+        """Queue one transcript line of a call"""
+        self.counters["received"] += 1
+        self._buffer({
+            "call_id": call_id,
+            "role": role,
+            "content": content,
+            "timestamp": _parse_timestamp(timestamp),
+        })
+
+        if not self._closing:
+            if self._writer is None or self._writer.done():
+                self._writer = asyncio.create_task(self._run())
+            if self._pending >= settings.transcript_flush_batch_size:
+                self._wakeup.set()
+
+    def _buffer(self, row: Dict[str, Any]) -> None:
+        buffer = self._buffers.get(row["call_id"])
+        if buffer is None:
+            buffer = self._buffers[row["call_id"]] = deque()
+        if len(buffer) >= settings.transcript_buffer_max_messages:
+            buffer.popleft()
+            self._pending -= 1
+            self.counters["dropped"] += 1
+            if row["call_id"] not in self._overflowing:
+                self._overflowing.add(row["call_id"])
+                logger.warning(f"Transcript buffer full for call {row['call_id']}, dropping its oldest lines")
+        buffer.append(row)
+        self._pending += 1
+
+    def _requeue(self, call_id: int, rows: List[Dict[str, Any]]) -> None:
+        """Put a call's unwritten lines back at the front of its buffer, giving
+        up on them after the last attempt"""
+        self.counters["failed"] += 1
+        failures = self._failures.get(call_id, 0) + 1
+        if failures >= settings.transcript_write_max_attempts:
+            self._failures.pop(call_id, None)
+            self.counters["dropped"] += len(rows)
+            logger.error(f"Giving up on {len(rows)} transcript lines of call {call_id} after {failures} attempts")
+            return
+        self._failures[call_id] = failures
+
+        buffer = self._buffers.get(call_id)
+        if buffer is None:
+            buffer = self._buffers[call_id] = deque()
+        # Lines added during the write stay after the ones being retried
+        buffer.extendleft(reversed(rows))
+        self._pending += len(rows)
+        while len(buffer) > settings.transcript_buffer_max_messages:
+            buffer.popleft()
+            self._pending -= 1
+            self.counters["dropped"] += 1
+            if call_id not in self._overflowing:
+                self._overflowing.add(call_id)
+                logger.warning(f"Transcript buffer full for call {call_id}, dropping its oldest lines")
+
+    async def _run(self) -> None:
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), settings.transcript_flush_interval_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            if self._pending:
+                try:
+                    await self.flush()
+                except Exception as e:
+                    logger.error(f"Transcript flush failed: {str(e)}")
+
+    async def flush(self, call_id: Optional[int] = None) -> int:
+        """Write the buffered lines of one call, or of every call; returns how many were written"""
+        async with self._flush_lock:
+            call_ids = [call_id] if call_id is not None else list(self._buffers)
+            batches: Dict[int, List[Dict[str, Any]]] = {}
+            for buffered_call_id in call_ids:
+                buffer = self._buffers.pop(buffered_call_id, None)
+                self._overflowing.discard(buffered_call_id)
+                if buffer:
+                    batches[buffered_call_id] = list(buffer)
+            if not batches:
+                return 0
+            self._pending -= sum(len(rows) for rows in batches.values())
+
+            try:
+                failed = await asyncio.to_thread(self._write, batches)
+            except Exception as e:
+                logger.error(f"Transcript write failed: {str(e)}")
+                failed = set(batches)
+
+            written = 0
+            for buffered_call_id, rows in batches.items():
+                if buffered_call_id in failed:
+                    self._requeue(buffered_call_id, rows)
+                else:
+                    self._failures.pop(buffered_call_id, None)
+                    written += len(rows)
+            self.counters["batches"] += 1
+            self.counters["written"] += written
+            return written
+
+    @classmethod
+    def _write(cls, batches: Dict[int, List[Dict[str, Any]]]) -> Set[int]:
+        """Insert every call's lines in one transaction, falling back to one
+        transaction per call so a bad line can't hold back the other calls.
+        Returns the calls whose lines could not be written."""
+        try:
+            cls._insert([row for rows in batches.values() for row in rows])
+            return set()
+        except Exception as e:
+            if len(batches) == 1:
+                logger.error(f"Failed to write transcript lines of call {next(iter(batches))}: {str(e)}")
+                return set(batches)
+            logger.error(f"Transcript batch of {len(batches)} calls failed, writing calls one by one: {str(e)}")
+
+        failed = set()
+        for call_id, rows in batches.items():
+            try:
+                cls._insert(rows)
+            except Exception as e:
+                failed.add(call_id)
+                logger.error(f"Failed to write {len(rows)} transcript lines of call {call_id}: {str(e)}")
+        return failed
+
+    @staticmethod
+    def _insert(rows: List[Dict[str, Any]]) -> None:
+        db = SessionLocal()
+        try:
+            db.bulk_insert_mappings(ConversationMessage, rows)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    async def close_call(self, call_id: int) -> None:
+        """Flush a call's remaining lines when its pipeline ends"""
+        await self.flush(call_id)
+
+    def stats(self) -> Dict[str, Any]:
+        stats: Dict[str, Any] = {"pending": self._pending, "calls_buffered": len(self._buffers)}
+        stats.update(self.counters)
+        return stats
+
+    async def shutdown(self) -> None:
+        """Stop the writer and flush every buffer (app shutdown)"""
+        self._closing = True
+        self._wakeup.set()
+        if self._writer:
+            await asyncio.gather(self._writer, return_exceptions=True)
+            self._writer = None
+        await self.flush()
+
+
+# Process-wide transcript buffer shared by every call's pipeline
+transcript_writer = TranscriptWriter()
@@ -0,0 +1,104 @@
+import logging
+from typing import Dict, Optional, Tuple
+
+import httpx
+from twilio.http import AsyncHttpClient
+from twilio.http.http_client import TwilioHttpClient
+from twilio.http.request import Request as TwilioRequest
+from twilio.http.response import Response
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+TWILIO_API_BASE_URL = "https://api.twilio.com"
+
+
+def rebase_url(url: str, base_url: Optional[str]) -> str:
+    """Point a Twilio REST URL at another host (local stand-in or emulator)"""
+    if base_url and url.startswith(TWILIO_API_BASE_URL):
+        return base_url.rstrip('/') + url[len(TWILIO_API_BASE_URL):]
+    return url
+
+
+class RebasedTwilioHttpClient(TwilioHttpClient):
+    """Blocking Twilio HTTP client that honours ``twilio_api_base_url``"""
+
+    def __init__(self, base_url: Optional[str] = None, **kwargs):
+        super().__init__(**kwargs)
+        self.base_url = base_url
+
+    def request(self, method: str, url: str, *args, **kwargs) -> Response:
+        return super().request(method, rebase_url(url, self.base_url), *args, **kwargs)
+
+
+class HttpxTwilioHttpClient(AsyncHttpClient):
+    """Asynchronous Twilio HTTP client on a pooled, keep-alive httpx client.
+
+    Used with ``Client.calls.create_async`` so a dial never blocks the event
+    loop. The httpx client (and its TLS context, which takes a while to load)
+    is built up front rather than on the first dial.
+    """
+
+    def __init__(
+        self,
+        timeout: Optional[float] = None,
+        max_connections: Optional[int] = None,
+        max_keepalive_connections: Optional[int] = None,
+        base_url: Optional[str] = None,
+    ):
+        super().__init__(logging.getLogger("twilio.http_client"), True, timeout or settings.twilio_http_timeout_seconds)
+        self.base_url = base_url
+        self.limits = httpx.Limits(
+            max_connections=max_connections or settings.twilio_http_max_connections,
+            max_keepalive_connections=max_keepalive_connections or settings.twilio_http_keepalive_connections,
+        )
+        self._client = httpx.AsyncClient(limits=self.limits, timeout=self.timeout)
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client.is_closed:
+            self._client = httpx.AsyncClient(limits=self.limits, timeout=self.timeout)
+        return self._client
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        params: Optional[Dict[str, object]] = None,
+        data: Optional[Dict[str, object]] = None,
+        headers: Optional[Dict[str, str]] = None,
+        auth: Optional[Tuple[str, str]] = None,
+        timeout: Optional[float] = None,
+        allow_redirects: bool = False,
+    ) -> Response:
+        """Make an HTTP request to the Twilio API over the shared connection pool"""
+        if timeout is not None and timeout <= 0:
+            raise ValueError(timeout)
+
+        kwargs = {
+            "method": method.upper(),
+            "url": rebase_url(url, self.base_url),
+            "params": params,
+            "data": data,
+            "headers": headers,
+            "auth": auth,
+        }
+
+        self.log_request(kwargs)
+        self._test_only_last_response = None
+        self._test_only_last_request = TwilioRequest(**kwargs)
+
+        response = await self.client.request(
+            **kwargs,
+            timeout=timeout or self.timeout,
+            follow_redirects=allow_redirects,
+        )
+
+        self.log_response(response.status_code, response)
+        self._test_only_last_response = Response(response.status_code, response.text, response.headers)
+        return self._test_only_last_response
+
+    async def close(self) -> None:
+        """Close pooled connections"""
+        await self._client.aclose()
@@ -1,13 +1,31 @@
+import asyncio
 import os
 from typing import Optional, Dict, Any
+import httpx
 from twilio.rest import Client
 from twilio.twiml.voice_response import VoiceResponse, Connect, Stream, Pause
-from twilio.base.exceptions import TwilioException
+from twilio.base.exceptions import TwilioException, TwilioRestException
 from app.core.config import settings
+from app.services.rate_limiter import RateLimitTimeout, dial_rate_limiter
+from app.services.twilio_http_client import HttpxTwilioHttpClient, RebasedTwilioHttpClient
 import logging
 
 logger = logging.getLogger(__name__)
 
+
+def is_transient_error(error: Exception) -> bool:
+    """Whether a failed dial is worth retrying later.
+
+    Twilio rate limits (429), server errors (5xx), network timeouts or
+    connection failures and our own dial rate limiter running out of wait
+    time clear up on their own; anything else, such as an invalid number,
+    fails the same way every time.
+    """
+    if isinstance(error, TwilioRestException):
+        return error.status == 429 or error.status >= 500
+    return isinstance(error, (httpx.TransportError, asyncio.TimeoutError, RateLimitTimeout))
+
+
 class TwilioService:
     """Manages Twilio voice calls and TwiML generation"""
     
@@ -21,7 +39,14 @@ class TwilioService:
             if not all([self.account_sid, self.auth_token, self.from_number]):
                 raise ValueError("Missing Twilio credentials in environment variables")
             
-            self.client = Client(self.account_sid, self.auth_token)
+            base_url = settings.twilio_api_base_url
+            self.client = Client(
+                self.account_sid, self.auth_token,
+                http_client=RebasedTwilioHttpClient(base_url=base_url) if base_url else None
+            )
+            # Pooled keep-alive client for dials made from the event loop
+            self.async_http_client = HttpxTwilioHttpClient(base_url=base_url)
+            self.async_client = Client(self.account_sid, self.auth_token, http_client=self.async_http_client)
             
             # Test connection
             self.client.api.accounts(self.account_sid).fetch()
@@ -32,38 +57,24 @@ class TwilioService:
             raise
     
     def initiate_call(self, to_number: str, lead_id: int) -> str:
-        """Initiate outbound call to lead"""
-        try:
-            # Clean phone number
-            to_number = self._clean_phone_number(to_number)
-            logger.info(f"Cleaned phone number: {to_number}")
+        """Initiate outbound call to lead.
         
-            # Construct webhook URLs (simpler approach like simple_caller)
-            webhook_base = settings.webhook_base_url.rstrip('/')
-            call_url = f"{webhook_base}/api/webhook/"  # Simple endpoint like simple_caller
-            status_url = f"{webhook_base}/api/webhook/call-status"
+        Blocking: waits for the rate limiter and the Twilio API on the calling
+        thread. From async code use ``initiate_call_async`` instead.
+        """
+        try:
+            params = self._call_params(to_number)
         
-            logger.info(f"Call URL: {call_url}")
-            logger.info(f"Status URL: {status_url}")
+            # Wait for a slot under the calls-per-second limits
+            waited = dial_rate_limiter.acquire_blocking(self.account_sid, self.from_number)
+            if waited:
+                logger.info(f"Dial to {params['to']} delayed {waited:.2f}s by rate limiter")
         
             # Create the call
-            logger.info(f"Creating call from {self.from_number} to {to_number}")
-        
-            call = self.client.calls.create(
-                to=to_number,
-                from_=self.from_number,
-                url=call_url,
-                method='POST',
-                status_callback=status_url,
-                status_callback_event=['initiated', 'ringing', 'answered', 'completed', 'failed'],
-                status_callback_method='POST',
-                record=True,
-                timeout=30,
-                machine_detection='Enable',
-                machine_detection_timeout=10
-            )
+            logger.info(f"Creating call from {self.from_number} to {params['to']}")
+            call = self.client.calls.create(**params)
         
-            logger.info(f"Call initiated to {to_number} for lead {lead_id}, SID: {call.sid}")
+            logger.info(f"Call initiated to {params['to']} for lead {lead_id}, SID: {call.sid}")
             return call.sid
         
         except TwilioException as e:
@@ -73,6 +84,65 @@ class TwilioService:
             logger.error(f"Unexpected exception: {e}")
             raise
     
+    async def initiate_call_async(self, to_number: str, lead_id: int) -> str:
+        """Initiate outbound call to lead without blocking the event loop.
+        
+        Goes through the pooled httpx client, so concurrent dials reuse
+        keep-alive connections to the Twilio API.
+        """
+        try:
+            params = self._call_params(to_number)
+        
+            # Wait for a slot under the calls-per-second limits
+            waited = await dial_rate_limiter.acquire(self.account_sid, self.from_number)
+            if waited:
+                logger.info(f"Dial to {params['to']} delayed {waited:.2f}s by rate limiter")
+        
+            logger.info(f"Creating call from {self.from_number} to {params['to']}")
+            call = await self.async_client.calls.create_async(**params)
+        
+            logger.info(f"Call initiated to {params['to']} for lead {lead_id}, SID: {call.sid}")
+            return call.sid
+        
+        except TwilioException as e:
+            logger.error(f"TwilioException: {e}")
+            raise
+        except Exception as e:
+            logger.error(f"Unexpected exception: {e}")
+            raise
+    
+    async def aclose(self) -> None:
+        """Close the pooled connections of the async client"""
+        await self.async_http_client.close()
+    
+    def _call_params(self, to_number: str) -> Dict[str, Any]:
+        """Arguments for calls.create shared by the blocking and async paths"""
+        # Clean phone number
+        to_number = self._clean_phone_number(to_number)
+        logger.info(f"Cleaned phone number: {to_number}")
+        
+        # Construct webhook URLs (simpler approach like simple_caller)
+        webhook_base = settings.webhook_base_url.rstrip('/')
+        call_url = f"{webhook_base}/api/webhook/"  # Simple endpoint like simple_caller
+        status_url = f"{webhook_base}/api/webhook/call-status"
+        
+        logger.info(f"Call URL: {call_url}")
+        logger.info(f"Status URL: {status_url}")
+        
+        return {
+            'to': to_number,
+            'from_': self.from_number,
+            'url': call_url,
+            'method': 'POST',
+            'status_callback': status_url,
+            'status_callback_event': ['initiated', 'ringing', 'answered', 'completed', 'failed'],
+            'status_callback_method': 'POST',
+            'record': True,
+            'timeout': 30,
+            'machine_detection': 'Enable',
+            'machine_detection_timeout': 10
+        }
+    
     def generate_streams_twiml(self, websocket_url: str) -> str:
         """Generate TwiML for streaming call"""
         response = VoiceResponse()
@@ -107,7 +177,8 @@ class TwilioService:
             logger.error(f"Error getting call details: {e}")
             return None
     
-    def _clean_phone_number(self, phone: str) -> str:
+    @staticmethod
+    def _clean_phone_number(phone: str) -> str:
         """Clean and format phone number"""
         # Remove all non-digit characters
         cleaned = ''.join(filter(str.isdigit, phone))
@@ -128,4 +199,4 @@ class TwilioService:
             cleaned = self._clean_phone_number(phone)
             return len(cleaned) >= 10 and cleaned.startswith('+')
         except:
-            return False 
\ No newline at end of file
+            return False 
\ No newline at end of file
@@ -0,0 +1,226 @@
+import asyncio
+import hashlib
+import hmac
+import logging
+import os
+import threading
+from string import Template
+from typing import Any, Dict, List, Optional, Tuple
+from xml.sax.saxutils import escape, quoteattr
+
+from app.core.config import settings
+from app.services.call_context_cache import call_context_cache
+
+logger = logging.getLogger(__name__)
+
+STREAMS_TEMPLATE = "streams.xml"
+
+# <Stream> parameters passed to the media WebSocket in the `start` event.
+# Identifiers only: Twilio caps custom parameters at about 500 characters in
+# total, and TwiML shows up in Twilio's logs, so prompts and lead details
+# stay in the call context cache.
+STREAM_PARAMETERS = ("call_id", "lead_id", "purpose")
+SIGNATURE_PARAMETER = "signature"
+
+
+def stream_url() -> str:
+    """Media stream WebSocket URL, derived from webhook_base_url unless configured"""
+    if settings.media_stream_url:
+        return settings.media_stream_url
+    base = settings.webhook_base_url.rstrip('/')
+    if base.startswith("https://"):
+        base = "wss://" + base[len("https://"):]
+    elif base.startswith("http://"):
+        base = "ws://" + base[len("http://"):]
+    return f"{base}/api/ws"
+
+
+def _signing_key() -> bytes:
+    return (settings.stream_parameter_secret or settings.secret_key).encode()
+
+
+def sign_parameters(call_sid: str, parameters: Dict[str, str]) -> str:
+    """HMAC over the call SID and the stream parameters, so a stream can't
+    claim another call's context"""
+    message = "\n".join([call_sid] + [f"{name}={parameters.get(name, '')}" for name in STREAM_PARAMETERS])
+    return hmac.new(_signing_key(), message.encode(), hashlib.sha256).hexdigest()
+
+
+def stream_parameters(call_sid: str, context: Dict[str, Any]) -> Dict[str, str]:
+    """Signed <Parameter> values for a call, from its cached call context"""
+    lead_info = context.get("lead_info") or {}
+    parameters = {
+        "call_id": str(context.get("call_id") or ""),
+        "lead_id": str(lead_info.get("id") or ""),
+        "purpose": context.get("purpose") or "general",
+    }
+    parameters[SIGNATURE_PARAMETER] = sign_parameters(call_sid, parameters)
+    return parameters
+
+
+def verify_stream_parameters(call_sid: str, parameters: Optional[Dict[str, str]]) -> Optional[Dict[str, str]]:
+    """The stream parameters of a `start` event if their signature is valid, else None"""
+    if not parameters or SIGNATURE_PARAMETER not in parameters:
+        return None
+    expected = sign_parameters(call_sid, parameters)
+    if not hmac.compare_digest(expected, str(parameters[SIGNATURE_PARAMETER])):
+        logger.warning(f"Invalid stream parameter signature for call: {call_sid}")
+        return None
+    return {name: parameters.get(name, "") for name in STREAM_PARAMETERS}
+
+
+class CompiledTemplate:
+    """A TwiML template split once into literal text and $placeholder slots.
+
+    Rendering fills the slots and joins the parts; the template text is not
+    scanned again per request.
+    """
+
+    def __init__(self, name: str, source: str, mtime: float):
+        self.name = name
+        self.mtime = mtime
+        self._parts: List[str] = []
+        self._slots: List[Tuple[int, str]] = []
+
+        position = 0
+        for match in Template.pattern.finditer(source):
+            self._parts.append(source[position:match.start()])
+            position = match.end()
+            if match.group("escaped") is not None:
+                self._parts.append("$")
+            elif match.group("named") or match.group("braced"):
+                self._slots.append((len(self._parts), match.group("named") or match.group("braced")))
+                self._parts.append("")
+            else:
+                raise ValueError(f"Invalid placeholder in {name} at offset {match.start()}")
+        self._parts.append(source[position:])
+        self.placeholders = frozenset(slot for _, slot in self._slots)
+
+    def render(self, values: Dict[str, str]) -> str:
+        parts = self._parts.copy()
+        for index, slot in self._slots:
+            parts[index] = values[slot]
+        return "".join(parts)
+
+
+class TwiMLTemplateEngine:
+    """TwiML templates from ``twiml_template_dir``, compiled once and kept in memory.
+
+    Templates are loaded at startup (off the event loop); a watcher re-stats
+    them every ``twiml_reload_interval_seconds`` in a thread and recompiles
+    any that changed, so edits go live without a restart and the webhook
+    path never touches the disk. A template that fails to compile keeps its
+    previous version.
+    """
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory or settings.twiml_template_dir
+        self._templates: Dict[str, CompiledTemplate] = {}
+        self._seen_mtimes: Dict[str, float] = {}  # Includes versions that failed to compile
+        self._lock = threading.Lock()
+        self._watcher: Optional[asyncio.Task] = None
+        self.reloads = 0
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _compile(self, name: str) -> Optional[CompiledTemplate]:
+        path = self._path(name)
+        try:
+            mtime = os.stat(path).st_mtime
+            with open(path, encoding="utf-8") as f:
+                return CompiledTemplate(name, f.read(), mtime)
+        except Exception as e:
+            logger.error(f"Failed to load TwiML template {path}: {str(e)}")
+            return None
+
+    def load(self) -> None:
+        """Compile every template in the directory (startup)"""
+        for name in sorted(os.listdir(self.directory)):
+            if name.endswith(".xml"):
+                template = self._compile(name)
+                if template:
+                    with self._lock:
+                        self._templates[name] = template
+        logger.info(f"Loaded {len(self._templates)} TwiML template(s) from {self.directory}")
+
+    def reload_changed(self) -> int:
+        """Recompile templates whose file changed; returns how many were reloaded"""
+        reloaded = 0
+        for name, template in list(self._templates.items()):
+            try:
+                mtime = os.stat(self._path(name)).st_mtime
+            except OSError:
+                continue  # Keep serving the compiled copy of a removed file
+            if mtime == self._seen_mtimes.get(name, template.mtime):
+                continue
+            self._seen_mtimes[name] = mtime
+            fresh = self._compile(name)
+            if fresh:
+                with self._lock:
+                    self._templates[name] = fresh
+                reloaded += 1
+                logger.info(f"Reloaded TwiML template {name}")
+        self.reloads += reloaded
+        return reloaded
+
+    def get(self, name: str) -> CompiledTemplate:
+        template = self._templates.get(name)
+        if template is None:
+            # Not loaded at startup (scripts, or a template added later)
+            template = self._compile(name)
+            if template is None:
+                raise FileNotFoundError(f"TwiML template not found: {self._path(name)}")
+            with self._lock:
+                self._templates[name] = template
+        return template
+
+    def render(self, name: str, **values: str) -> str:
+        return self.get(name).render(values)
+
+    def start_watching(self) -> None:
+        """Start the hot-reload watcher (no-op when the interval is 0)"""
+        if settings.twiml_reload_interval_seconds > 0 and (self._watcher is None or self._watcher.done()):
+            self._watcher = asyncio.create_task(self._watch())
+
+    async def _watch(self) -> None:
+        while True:
+            await asyncio.sleep(settings.twiml_reload_interval_seconds)
+            try:
+                await asyncio.to_thread(self.reload_changed)
+            except Exception as e:
+                logger.error(f"TwiML template reload failed: {str(e)}")
+
+    async def stop(self) -> None:
+        if self._watcher:
+            self._watcher.cancel()
+            try:
+                await self._watcher
+            except asyncio.CancelledError:
+                pass
+            self._watcher = None
+
+
+# Process-wide template cache shared by the webhook routers
+twiml_engine = TwiMLTemplateEngine()
+
+
+def render_streams_twiml(parameters: Optional[Dict[str, str]] = None) -> str:
+    """TwiML connecting the call to the media stream, with per-call <Parameter>s"""
+    rendered = "".join(
+        f"\n            <Parameter name={quoteattr(name)} value={quoteattr(value)} />"
+        for name, value in (parameters or {}).items()
+    )
+    return twiml_engine.render(
+        STREAMS_TEMPLATE,
+        stream_url=escape(stream_url(), {'"': "&quot;"}),
+        parameters=rendered,
+    )
+
+
+async def streams_twiml_for_call(call_sid: Optional[str]) -> str:
+    """Streams TwiML for the call Twilio is asking about, carrying its signed context"""
+    if not call_sid:
+        return render_streams_twiml()
+    context = await call_context_cache.get_async(call_sid)
+    return render_streams_twiml(stream_parameters(call_sid, context))
@@ -0,0 +1,160 @@
+import itertools
+import logging
+import threading
+import time
+from importlib import resources
+from typing import Dict, List, Optional
+
+import numpy as np
+import onnxruntime
+from pipecat.audio.vad.vad_analyzer import VADAnalyzer, VADParams
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Silero's recurrent state is reset this often, as pipecat's own analyzer does;
+# older audio barely affects the prediction
+STATE_RESET_SECONDS = 5.0
+
+
+class SileroCallState:
+    """Silero model state for one call on top of a shared ONNX session.
+
+    Only the recurrent state and audio context (a few KB) are per call;
+    ``InferenceSession.run`` is thread safe, so calls analysing audio on their
+    own transport threads can share a session.
+    """
+
+    def __init__(self, session: onnxruntime.InferenceSession):
+        self.session = session
+        self.reset()
+
+    def reset(self) -> None:
+        self.state = np.zeros((2, 1, 128), dtype="float32")
+        self.context: Optional[np.ndarray] = None
+        self.sample_rate = 0
+
+    def __call__(self, samples: np.ndarray, sample_rate: int) -> float:
+        """Speech probability of one 512 (16 kHz) or 256 (8 kHz) sample chunk"""
+        context_size = 64 if sample_rate == 16000 else 32
+        if self.context is None or sample_rate != self.sample_rate:
+            self.reset()
+            self.context = np.zeros((1, context_size), dtype="float32")
+            self.sample_rate = sample_rate
+
+        audio = np.concatenate((self.context, samples.reshape(1, -1)), axis=1)
+        output, self.state = self.session.run(
+            None, {"input": audio, "state": self.state, "sr": np.array(sample_rate, dtype="int64")}
+        )
+        self.context = audio[:, -context_size:]
+        return float(output[0][0])
+
+
+class SharedSileroVADAnalyzer(VADAnalyzer):
+    """Silero VAD analyzer that borrows a session from the registry instead of loading the model.
+
+    Built on pipecat's public VADAnalyzer interface only, so it doesn't
+    depend on how SileroVADAnalyzer stores its model.
+    """
+
+    def __init__(
+        self,
+        session: onnxruntime.InferenceSession,
+        *,
+        sample_rate: Optional[int] = None,
+        params: Optional[VADParams] = None,
+    ):
+        super().__init__(sample_rate=sample_rate, params=params or VADParams())
+        self.model = SileroCallState(session)
+        self.last_reset_time = 0.0
+
+    def set_sample_rate(self, sample_rate: int):
+        if sample_rate not in (8000, 16000):
+            raise ValueError("Silero VAD sample rate needs to be 16000 or 8000")
+        super().set_sample_rate(sample_rate)
+
+    def num_frames_required(self) -> int:
+        return 512 if self.sample_rate == 16000 else 256
+
+    def voice_confidence(self, buffer) -> float:
+        try:
+            # Signed 16-bit PCM scaled to [-1, 1)
+            samples = np.frombuffer(buffer, np.int16).astype(np.float32) / 32768.0
+            confidence = self.model(samples, self.sample_rate)
+
+            now = time.time()
+            if now - self.last_reset_time >= STATE_RESET_SECONDS:
+                self.model.reset()
+                self.last_reset_time = now
+            return confidence
+        except Exception as e:
+            # A short or empty buffer
+            logger.error(f"Error analyzing audio with Silero VAD: {str(e)}")
+            return 0
+
+
+class VADModelRegistry:
+    """Process-wide Silero VAD model.
+
+    The model is loaded once (at startup, or on the first call) into a small
+    pool of ONNX sessions; each call gets a lightweight analyzer bound to one
+    of them round-robin.
+    """
+
+    MODEL_PACKAGE = "pipecat.audio.vad.data"
+    MODEL_NAME = "silero_vad.onnx"
+
+    def __init__(self, pool_size: Optional[int] = None):
+        self.pool_size = max(1, pool_size or settings.vad_session_pool_size)
+        self._sessions: List[onnxruntime.InferenceSession] = []
+        self._next_session = itertools.count()
+        self._lock = threading.Lock()
+        self.load_seconds: Optional[float] = None
+        self.analyzers_created = 0
+
+    @property
+    def loaded(self) -> bool:
+        return bool(self._sessions)
+
+    def _model_path(self) -> str:
+        return str(resources.files(self.MODEL_PACKAGE).joinpath(self.MODEL_NAME))
+
+    def _create_session(self, path: str) -> onnxruntime.InferenceSession:
+        # Same options pipecat uses: one thread per inference keeps many
+        # concurrent calls from oversubscribing the CPU
+        opts = onnxruntime.SessionOptions()
+        opts.inter_op_num_threads = 1
+        opts.intra_op_num_threads = 1
+        return onnxruntime.InferenceSession(path, providers=["CPUExecutionProvider"], sess_options=opts)
+
+    def load(self) -> None:
+        """Load the model into the session pool (no-op once loaded)"""
+        with self._lock:
+            if self._sessions:
+                return
+            started = time.perf_counter()
+            path = self._model_path()
+            self._sessions = [self._create_session(path) for _ in range(self.pool_size)]
+            self.load_seconds = time.perf_counter() - started
+        logger.info(f"Loaded Silero VAD into {self.pool_size} session(s) in {self.load_seconds * 1000:.0f} ms")
+
+    def create_analyzer(self, params: Optional[VADParams] = None) -> SharedSileroVADAnalyzer:
+        """Per-call VAD analyzer sharing a pooled session"""
+        if not self._sessions:
+            self.load()
+        session = self._sessions[next(self._next_session) % len(self._sessions)]
+        self.analyzers_created += 1
+        return SharedSileroVADAnalyzer(session, params=params)
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "loaded": self.loaded,
+            "sessions": len(self._sessions),
+            "load_ms": round(self.load_seconds * 1000, 1) if self.load_seconds is not None else None,
+            "analyzers_created": self.analyzers_created,
+        }
+
+
+# Process-wide instance used by every call pipeline
+vad_registry = VADModelRegistry()
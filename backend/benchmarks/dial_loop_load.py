@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+End-to-end load test of the group call dial -> webhook -> queue loop.
+
+Seeds a user, a group and N leads straight into the database the API uses,
+starts a group call through the API and polls queue-status until the
+campaign completes. Run it against an API whose Twilio client points at
+benchmarks/twilio_emulator.py (see that file for the full setup).
+
+    python benchmarks/dial_loop_load.py --leads 500 --lines 10 \\
+        --api-url http://127.0.0.1:8000 --emulator-url http://127.0.0.1:8099
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import uuid
+from typing import Tuple
+
+import httpx
+
+# Add the backend directory to the Python path so we can import the app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.auth import create_access_token, get_password_hash
+from app.database.database import SessionLocal
+from app.models.models import Group, Lead, User, lead_groups
+
+
+def seed(leads: int) -> Tuple[str, int]:
+    """Create a throwaway user and a group of `leads` leads; returns (username, group id)"""
+    db = SessionLocal()
+    try:
+        tag = uuid.uuid4().hex[:8]
+        user = User(
+            username=f"load_{tag}",
+            email=f"load_{tag}@example.com",
+            hashed_password=get_password_hash(tag),
+            full_name="Load test",
+        )
+        db.add(user)
+        db.flush()
+
+        group = Group(name=f"Load test {tag}", user_id=user.id)
+        db.add(group)
+        db.flush()
+
+        # Spread numbers over a few area codes / zones
+        area_codes = ["212", "312", "415", "720"]
+        db.bulk_insert_mappings(Lead, [
+            {
+                "name": f"Lead {i}",
+                "phone": f"+1{area_codes[i % len(area_codes)]}{i:07d}",
+                "priority": 1 + i % 5,
+                "user_id": user.id,
+            }
+            for i in range(leads)
+        ])
+        db.flush()
+
+        lead_ids = [row.id for row in db.query(Lead.id).filter(Lead.user_id == user.id).all()]
+        db.execute(lead_groups.insert(), [{"lead_id": lead_id, "group_id": group.id} for lead_id in lead_ids])
+        db.commit()
+        return user.username, group.id
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Drive a group call through the API and the Twilio emulator")
+    parser.add_argument("--api-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--emulator-url", default="http://127.0.0.1:8099")
+    parser.add_argument("--leads", type=int, default=200)
+    parser.add_argument("--lines", type=int, default=10, help="max_concurrent_calls for the group call")
+    parser.add_argument("--pacing-mode", default="fixed", choices=["fixed", "predictive"])
+    parser.add_argument("--max-attempts", type=int, default=1, help="Dial attempts per lead (1 disables retries)")
+    parser.add_argument("--timeout", type=float, default=1800.0)
+    args = parser.parse_args()
+
+    username, group_id = seed(args.leads)
+    token = create_access_token({"sub": username})
+    api = httpx.Client(base_url=args.api_url.rstrip("/") + "/api", headers={"Authorization": f"Bearer {token}"}, timeout=30.0)
+
+    group_call = api.post("/group-calls/", json={
+        "group_id": group_id,
+        "max_concurrent_calls": args.lines,
+        "pacing_mode": args.pacing_mode,
+        "max_attempts": args.max_attempts,
+        # Equal hours keep the calling window open all day
+        "calling_window_start_hour": 0,
+        "calling_window_end_hour": 0,
+    })
+    group_call.raise_for_status()
+    group_call_id = group_call.json()["id"]
+
+    started = time.perf_counter()
+    api.post(f"/group-calls/{group_call_id}/start").raise_for_status()
+
+    peak_active = 0
+    status = {}
+    while time.perf_counter() - started < args.timeout:
+        status = api.get(f"/group-calls/{group_call_id}/queue-status").json()
+        peak_active = max(peak_active, status.get("active_calls", 0))
+        if status.get("status") == "completed":
+            break
+        time.sleep(1.0)
+    elapsed = time.perf_counter() - started
+
+    result = {
+        "leads": args.leads,
+        "lines": args.lines,
+        "pacing_mode": args.pacing_mode,
+        "group_call_id": group_call_id,
+        "status": status.get("status"),
+        "elapsed_seconds": round(elapsed, 1),
+        "calls": status.get("total_calls"),
+        "calls_per_minute": round((status.get("total_calls") or 0) / elapsed * 60, 1) if elapsed else 0.0,
+        "peak_active_calls": peak_active,
+        "emulator": httpx.get(args.emulator_url.rstrip("/") + "/emulator/stats").json(),
+    }
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
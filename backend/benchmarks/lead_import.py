@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+CSV lead import: row-by-row (one SELECT and one ORM object per row) vs the
+vectorized LeadService.import_leads_from_stream.
+
+Generates a CSV of --rows leads in which a share of rows is invalid (missing
+name or phone, unparseable priority) or already exists for the user, seeds
+the existing leads, and imports the file once per mode, each for a fresh
+user against the database the API uses. Reported per mode: wall time, rows/s,
+SQL statements executed, imported count and error count, plus whether both
+modes produced exactly the same per-row errors.
+
+    python benchmarks/lead_import.py --rows 100000
+"""
+import argparse
+import io
+import json
+import os
+import random
+import sys
+import time
+import uuid
+from typing import Dict, List
+
+import pandas as pd
+from sqlalchemy import and_, event
+
+# Add the backend directory to the Python path so we can import the app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.auth import get_password_hash
+from app.core.config import settings
+from app.database.database import SessionLocal, engine
+from app.models.models import Lead, User
+from app.services.lead_service import LeadService
+
+
+def make_csv(rows: int, existing_share: float, invalid_share: float, seed: int):
+    """CSV bytes and the phones that should already exist for the user"""
+    rng = random.Random(seed)
+    records: List[Dict] = []
+    existing: List[str] = []
+    for i in range(rows):
+        # Formatted, so the row-by-row import (which lets pandas infer types)
+        # reads phones as text too instead of turning them into numbers
+        phone = f"+1 {200 + i % 700:03d}-{i:07d}"
+        record = {
+            "name": f"Lead {i}",
+            "phone": phone,
+            "email": f"lead{i}@example.com" if rng.random() < 0.8 else None,
+            "company": f"Company {i % 5000}",
+            "title": rng.choice(["CEO", "CTO", "Owner", None]),
+            "priority": rng.choice([1, 2, 3, 4, 5, None]),
+            "status": "pending",
+            "notes": None,
+        }
+        roll = rng.random()
+        if roll < invalid_share / 3:
+            record["name"] = None
+        elif roll < 2 * invalid_share / 3:
+            record["phone"] = None
+        elif roll < invalid_share:
+            record["priority"] = "high"
+        elif roll < invalid_share + existing_share:
+            existing.append(phone)
+        records.append(record)
+    return pd.DataFrame(records).to_csv(index=False).encode(), existing
+
+
+def seed_user(existing: List[str]) -> int:
+    db = SessionLocal()
+    try:
+        tag = uuid.uuid4().hex[:8]
+        user = User(username=f"import_{tag}", email=f"import_{tag}@example.com",
+                    hashed_password=get_password_hash(tag), full_name="Import benchmark")
+        db.add(user)
+        db.flush()
+        db.bulk_insert_mappings(Lead, [{"name": "Existing", "phone": phone, "user_id": user.id} for phone in existing])
+        db.commit()
+        return user.id
+    finally:
+        db.close()
+
+
+def import_row_by_row(db, content: bytes, user_id: int) -> Dict:
+    """The import as it was before vectorization (for comparison)"""
+    df = pd.read_csv(io.BytesIO(content))
+    imported_count = 0
+    errors = []
+    for index, row in df.iterrows():
+        try:
+            if pd.isna(row.get('name')) or pd.isna(row.get('phone')):
+                errors.append(f"Row {index + 1}: Missing required fields (name or phone)")
+                continue
+            existing_lead = db.query(Lead).filter(
+                and_(Lead.phone == str(row['phone']), Lead.user_id == user_id)
+            ).first()
+            if existing_lead:
+                errors.append(f"Row {index + 1}: Phone number {row['phone']} already exists for this user")
+                continue
+            lead_data = {
+                'name': str(row['name']),
+                'phone': str(row['phone']),
+                'email': str(row.get('email', '')) if not pd.isna(row.get('email')) else None,
+                'company': str(row.get('company', '')) if not pd.isna(row.get('company')) else None,
+                'title': str(row.get('title', '')) if not pd.isna(row.get('title')) else None,
+                'address': str(row.get('address', '')) if not pd.isna(row.get('address')) else None,
+                'notes': str(row.get('notes', '')) if not pd.isna(row.get('notes')) else None,
+                'priority': int(row.get('priority', 3)) if not pd.isna(row.get('priority')) else 3,
+                'status': str(row.get('status', 'pending')) if not pd.isna(row.get('status')) else 'pending',
+                'user_id': user_id
+            }
+            db.add(Lead(**lead_data))
+            imported_count += 1
+        except Exception as e:
+            errors.append(f"Row {index + 1}: {str(e)}")
+    db.commit()
+    return {'imported_count': imported_count, 'errors': errors}
+
+
+def run(mode: str, content: bytes, existing: List[str]) -> Dict:
+    user_id = seed_user(existing)
+    statements = [0]
+
+    def count(*args):
+        statements[0] += 1
+
+    event.listen(engine, "before_cursor_execute", count)
+    db = SessionLocal()
+    try:
+        started = time.perf_counter()
+        if mode == "row_by_row":
+            result = import_row_by_row(db, content, user_id)
+        else:
+            result = LeadService(db).import_leads_from_stream(io.BytesIO(content), user_id)
+        elapsed = time.perf_counter() - started
+    finally:
+        db.close()
+        event.remove(engine, "before_cursor_execute", count)
+
+    rows = len(pd.read_csv(io.BytesIO(content)))
+    return {
+        "seconds": round(elapsed, 2),
+        "rows_per_second": round(rows / elapsed),
+        "sql_statements": statements[0],
+        "imported_count": result["imported_count"],
+        "error_count": len(result["errors"]),
+        "errors": result["errors"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Row-by-row vs vectorized CSV lead import")
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--existing-share", type=float, default=0.05, help="Rows whose phone the user already has")
+    parser.add_argument("--invalid-share", type=float, default=0.03, help="Rows missing fields or with a bad priority")
+    parser.add_argument("--modes", nargs="+", default=["row_by_row", "vectorized"], choices=["row_by_row", "vectorized"])
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    content, existing = make_csv(args.rows, args.existing_share, args.invalid_share, args.seed)
+    # List every row error, so both modes' errors can be compared in full
+    settings.lead_import_max_errors = args.rows
+    results = {mode: run(mode, content, existing) for mode in args.modes}
+
+    report = {"rows": args.rows, "csv_mb": round(len(content) / 2**20, 1)}
+    if len(results) == 2:
+        report["same_errors"] = results["row_by_row"]["errors"] == results["vectorized"]["errors"]
+    for mode, result in results.items():
+        result.pop("errors")
+        report[mode] = result
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
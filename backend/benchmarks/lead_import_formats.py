@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Lead import from CSV vs Parquet vs Arrow IPC files of the same leads.
+
+Generates --rows leads as CSV (lead_import_memory.write_csv) and converts
+them to Parquet and to an Arrow IPC file. Each file is then read in a fresh
+child process twice: once only parsed into the frames the import works on
+(LeadService.read_import_chunks), once fully imported for a fresh user
+against the database the API uses (LeadService.import_leads_from_stream).
+Reported per format: file size, parse and import time, peak RSS of each
+child and its growth over the interpreter with the app imported, and
+imported / error counts, which should match across formats. Arrow files are
+memory-mapped, so their pages count towards RSS while being read.
+
+    python benchmarks/lead_import_formats.py --rows 1000000
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+
+# Add the backend directory to the Python path so we can import the app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lead_import_memory import max_rss_mb, write_csv
+
+FORMATS = ["csv", "parquet", "arrow"]
+
+
+def convert(csv_path: str, directory: str) -> dict:
+    """Parquet and Arrow copies of the CSV, with the same values as the CSV reader sees them"""
+    table = pa_csv.read_csv(csv_path, convert_options=pa_csv.ConvertOptions(
+        column_types={name: pa.string() for name in ["name", "phone", "title", "priority", "notes"]},
+        strings_can_be_null=True,
+    ))
+    paths = {"csv": csv_path}
+    paths["parquet"] = os.path.join(directory, "leads.parquet")
+    pq.write_table(table, paths["parquet"], row_group_size=100_000)
+    paths["arrow"] = os.path.join(directory, "leads.arrow")
+    with pa.ipc.new_file(paths["arrow"], table.schema) as writer:
+        writer.write_table(table, max_chunksize=100_000)
+    return paths
+
+
+def child(task: str, file_format: str, path: str) -> None:
+    from app.database.database import SessionLocal
+    from app.services.lead_service import LeadService
+    from lead_import import seed_user
+
+    user_id = seed_user([]) if task == "import" else None
+    baseline = max_rss_mb()
+    started = time.perf_counter()
+    with open(path, "rb") as f:
+        if task == "parse":
+            rows = sum(len(chunk) for chunk in LeadService.read_import_chunks(f, file_format))
+            result = {"rows": rows}
+        else:
+            db = SessionLocal()
+            try:
+                imported = LeadService(db).import_leads_from_stream(f, user_id, file_format)
+            finally:
+                db.close()
+            result = {"imported_count": imported["imported_count"], "errors_listed": len(imported["errors"])}
+    result["seconds"] = round(time.perf_counter() - started, 2)
+    result["peak_rss_mb"] = round(max_rss_mb(), 1)
+    result["rss_growth_mb"] = round(max_rss_mb() - baseline, 1)
+    print(json.dumps(result))
+
+
+def run_child(task: str, file_format: str, path: str) -> dict:
+    output = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", task, file_format, path],
+                            check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CSV vs Parquet vs Arrow lead import")
+    parser.add_argument("--rows", type=int, default=500000)
+    parser.add_argument("--formats", nargs="+", default=FORMATS, choices=FORMATS)
+    parser.add_argument("--skip-import", action="store_true", help="Only measure parsing")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--child", nargs=3, metavar=("TASK", "FORMAT", "PATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(*args.child)
+        return
+
+    report = {"rows": args.rows}
+    with tempfile.TemporaryDirectory() as directory:
+        csv_path = os.path.join(directory, "leads.csv")
+        write_csv(csv_path, args.rows, args.seed)
+        paths = convert(csv_path, directory)
+        for file_format in args.formats:
+            entry = {"file_mb": round(os.path.getsize(paths[file_format]) / 2**20, 1)}
+            entry["parse"] = run_child("parse", file_format, paths[file_format])
+            if not args.skip_import:
+                entry["import"] = run_child("import", file_format, paths[file_format])
+            report[file_format] = entry
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Peak memory of a CSV lead upload against file size.
+
+Writes CSV files of each --rows size to a temporary directory and imports
+every file once per mode, each in a fresh child process for a fresh user
+against the database the API uses:
+
+    in_memory  the whole upload read into bytes and imported as one chunk
+               (the upload before streaming)
+    streaming  the file read and committed in LEAD_IMPORT_CHUNK_ROWS chunks
+               (LeadService.import_leads_from_stream)
+
+Reported per file and mode: wall time, peak RSS of the child process, RSS
+growth over the interpreter with the app imported, and the imported and
+error counts.
+
+    python benchmarks/lead_import_memory.py --rows 100000 500000 2000000
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+# Add the backend directory to the Python path so we can import the app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def write_csv(path: str, rows: int, seed: int) -> None:
+    """Write `rows` leads, ~3% of them invalid, without holding them in memory"""
+    rng = random.Random(seed)
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["name", "phone", "email", "company", "title", "priority", "status", "notes"])
+        for i in range(rows):
+            roll = rng.random()
+            writer.writerow([
+                "" if roll < 0.01 else f"Lead {i}",
+                "" if 0.01 <= roll < 0.02 else f"+1{200 + i % 700:03d}{i:07d}",
+                f"lead{i}@example.com",
+                f"Company {i % 5000}",
+                rng.choice(["CEO", "CTO", "Owner", ""]),
+                "high" if 0.02 <= roll < 0.03 else rng.choice(["1", "2", "3", "4", "5", ""]),
+                "pending",
+                "Met at the trade show, asked for a follow-up call next quarter",
+            ])
+
+
+def max_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def child(mode: str, path: str) -> None:
+    from app.core.config import settings
+    from app.database.database import SessionLocal
+    from app.services.lead_service import LeadService
+    from lead_import import seed_user
+
+    user_id = seed_user([])
+    baseline = max_rss_mb()
+    db = SessionLocal()
+    try:
+        started = time.perf_counter()
+        if mode == "in_memory":
+            with open(path, "rb") as f:
+                content = io.BytesIO(f.read())
+            settings.lead_import_chunk_rows = sys.maxsize
+            settings.lead_import_max_errors = sys.maxsize
+            result = LeadService(db).import_leads_from_stream(content, user_id)
+        else:
+            with open(path, "rb") as f:
+                result = LeadService(db).import_leads_from_stream(f, user_id)
+        elapsed = time.perf_counter() - started
+    finally:
+        db.close()
+
+    peak = max_rss_mb()
+    print(json.dumps({
+        "seconds": round(elapsed, 2),
+        "peak_rss_mb": round(peak, 1),
+        "rss_growth_mb": round(peak - baseline, 1),
+        "imported_count": result["imported_count"],
+        "errors_listed": len(result["errors"]),
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Peak RSS of in-memory vs streaming CSV lead import")
+    parser.add_argument("--rows", type=int, nargs="+", default=[50000, 200000, 800000], help="File sizes in rows")
+    parser.add_argument("--modes", nargs="+", default=["in_memory", "streaming"], choices=["in_memory", "streaming"])
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--child", nargs=2, metavar=("MODE", "PATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(*args.child)
+        return
+
+    report = []
+    with tempfile.TemporaryDirectory() as directory:
+        for rows in args.rows:
+            path = os.path.join(directory, f"leads_{rows}.csv")
+            write_csv(path, rows, args.seed)
+            entry = {"rows": rows, "csv_mb": round(os.path.getsize(path) / 2**20, 1)}
+            for mode in args.modes:
+                output = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", mode, path],
+                                        check=True, capture_output=True, text=True).stdout
+                entry[mode] = json.loads(output.strip().splitlines()[-1])
+            report.append(entry)
+            os.remove(path)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Lead search: the old four-column ILIKE '%term%' filter vs lead_search.
+
+Seeds --leads leads for one user (kept between runs, so a 1M-lead database
+is only built once) and runs a mix of searches the Leads page sends (name
+and company words, two-word searches, email fragments, phone prefixes typed
+with or without formatting, digits from inside a number, misses) through the same count + first page the
+API returns. Two modes:
+
+    ilike    name/company/email/phone ILIKE '%term%' OR'ed, as get_leads
+             searched before
+    indexed  LeadService.get_leads with lead_search (trigram on PostgreSQL
+             with migration 0016, the basic backend on SQLite)
+
+Reported per search and mode: median and p95 latency in ms over --repeat
+runs, and the number of matching leads.
+
+    python benchmarks/lead_search.py --leads 1000000
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+import uuid
+from typing import Dict, List
+
+from sqlalchemy import or_, text
+
+# Add the backend directory to the Python path so we can import the app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.auth import get_password_hash
+from app.database.database import SessionLocal
+from app.models.models import Lead, User
+from app.services.lead_search import lead_search
+from app.services.lead_service import LeadService
+
+FIRST_NAMES = ["James", "Mary", "Robert", "Patricia", "John", "Jennifer", "Michael", "Linda", "David", "Elizabeth",
+               "William", "Barbara", "Richard", "Susan", "Joseph", "Jessica", "Thomas", "Sarah", "Carlos", "Mei"]
+LAST_NAMES = ["Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller", "Davis", "Rodriguez", "Martinez",
+              "Hernandez", "Lopez", "Gonzalez", "Wilson", "Anderson", "Thomas", "Taylor", "Moore", "Jackson", "Nguyen"]
+COMPANY_WORDS = ["Acme", "Globex", "Initech", "Umbrella", "Stark", "Wayne", "Hooli", "Vandelay", "Wonka", "Tyrell",
+                 "Cyberdyne", "Soylent", "Massive", "Dynamic", "Oceanic", "Pied", "Piper", "Gringotts", "Monarch", "Nakatomi"]
+AREA_CODES = ["212", "310", "415", "512", "617", "646", "702", "718", "805", "917"]
+
+SEARCHES = {
+    "first_name": "jennifer",
+    "last_name": "nguyen",
+    "full_name": "carlos martinez",
+    "company": "vandelay",
+    "name_fragment": "ander",
+    "email_fragment": "smith42",
+    "phone_area": "415",
+    "phone_prefix": "(415) 555-12",
+    "phone_e164": "+1415555123",
+    "phone_digits": "0123",
+    "miss": "zzyzx",
+}
+
+
+def seed(leads: int, seed_value: int) -> int:
+    """User with `leads` leads, reused when a previous run already built it"""
+    db = SessionLocal()
+    try:
+        username = f"search_bench_{leads}"
+        user = db.query(User).filter(User.username == username).first()
+        if user and db.query(Lead).filter(Lead.user_id == user.id).count() == leads:
+            return user.id
+        if user is None:
+            tag = uuid.uuid4().hex[:8]
+            user = User(username=username, email=f"{username}_{tag}@example.com",
+                        hashed_password=get_password_hash(tag), full_name="Search benchmark")
+            db.add(user)
+            db.commit()
+        db.query(Lead).filter(Lead.user_id == user.id).delete(synchronize_session=False)
+        db.commit()
+
+        rng = random.Random(seed_value)
+        batch = []
+        for i in range(leads):
+            first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+            batch.append({
+                "name": f"{first} {last}",
+                # Unique per lead: the multiplier is coprime with 10^7, so numbers scatter without repeating
+                "phone": f"+1{AREA_CODES[i % len(AREA_CODES)]}{(i // len(AREA_CODES)) * 7_919_011 % 10_000_000:07d}",
+                "email": f"{first.lower()}.{last.lower()}{i % 1000}@example.com" if rng.random() < 0.8 else None,
+                "company": f"{rng.choice(COMPANY_WORDS)} {rng.choice(COMPANY_WORDS)} {rng.choice(['Inc', 'LLC', 'Ltd'])}",
+                "priority": rng.randint(1, 5),
+                "status": "pending",
+                "user_id": user.id,
+            })
+            if len(batch) == 10_000:
+                db.bulk_insert_mappings(Lead, batch, render_nulls=True)
+                db.commit()
+                batch = []
+        if batch:
+            db.bulk_insert_mappings(Lead, batch, render_nulls=True)
+            db.commit()
+        db.execute(text("ANALYZE"))
+        db.commit()
+        return user.id
+    finally:
+        db.close()
+
+
+def ilike_search(db, user_id: int, search: str, limit: int) -> int:
+    """get_leads as it searched before lead_search"""
+    query = db.query(Lead).filter(Lead.user_id == user_id).filter(or_(
+        Lead.name.ilike(f"%{search}%"),
+        Lead.company.ilike(f"%{search}%"),
+        Lead.email.ilike(f"%{search}%"),
+        Lead.phone.ilike(f"%{search}%")
+    ))
+    total = query.count()
+    query.offset(0).limit(limit).all()
+    return total
+
+
+def indexed_search(db, user_id: int, search: str, limit: int) -> int:
+    return LeadService(db).get_leads(user_id, skip=0, limit=limit, search=search)["total"]
+
+
+def measure(mode: str, user_id: int, search: str, repeat: int, limit: int) -> Dict:
+    search_fn = ilike_search if mode == "ilike" else indexed_search
+    timings: List[float] = []
+    db = SessionLocal()
+    try:
+        total = search_fn(db, user_id, search, limit)  # Warm the page cache
+        for _ in range(repeat):
+            started = time.perf_counter()
+            search_fn(db, user_id, search, limit)
+            timings.append((time.perf_counter() - started) * 1000)
+    finally:
+        db.close()
+    timings.sort()
+    return {
+        "p50_ms": round(statistics.median(timings), 1),
+        "p95_ms": round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 1),
+        "matches": total,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ILIKE vs indexed lead search")
+    parser.add_argument("--leads", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per search and mode")
+    parser.add_argument("--limit", type=int, default=100, help="Page size, as the Leads page requests")
+    parser.add_argument("--modes", nargs="+", default=["ilike", "indexed"], choices=["ilike", "indexed"])
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    user_id = seed(args.leads, args.seed)
+    report = {
+        "leads": args.leads,
+        "backend": type(lead_search.backend).__name__,
+        "seed_seconds": round(time.perf_counter() - started, 1),
+        "searches": {},
+    }
+    for name, search in SEARCHES.items():
+        report["searches"][name] = {"search": search}
+        for mode in args.modes:
+            report["searches"][name][mode] = measure(mode, user_id, search, args.repeat, args.limit)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
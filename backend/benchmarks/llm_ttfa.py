@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Time to first audio of the Gemini Live session, cold vs pre-warmed.
+
+Runs the LLM half of the call pipeline (context aggregator -> Gemini Live ->
+first-audio probe) the way run_bot does and measures from the moment the
+media stream would connect to the first audio frame the model returns:
+
+    cold  the session is created and connected when the stream connects
+          (behaviour without the pre-warm pool)
+    warm  the session was opened --ring-seconds earlier, while the phone
+          was ringing, and the pipeline attaches to it
+
+Needs GEMINI_API_KEY (talks to the real Live API).
+
+    python benchmarks/llm_ttfa.py --runs 5 --ring-seconds 4
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+
+# Add the backend directory to the Python path so we can import the app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+async def measure(mode: str, ring_seconds: float, timeout: float) -> float:
+    from pipecat.pipeline.pipeline import Pipeline
+    from pipecat.pipeline.runner import PipelineRunner
+    from pipecat.pipeline.task import PipelineParams, PipelineTask
+    from pipecat.processors.aggregators.openai_llm_context import OpenAILLMContext
+
+    from app.services.bot_service import TimeToFirstAudio, create_llm_service, get_system_instruction
+
+    instruction = get_system_instruction(lead_info={"name": "Alex", "company": "Example Co"}, purpose="general")
+
+    llm = None
+    if mode == "warm":
+        llm = create_llm_service(instruction)
+        if not await llm.prewarm():
+            raise SystemExit("Could not open a Gemini Live session (check GEMINI_API_KEY)")
+        await asyncio.sleep(ring_seconds)
+
+    # The stream connects now
+    connected_at = time.perf_counter()
+    llm = llm or create_llm_service(instruction)
+    first_audio = asyncio.get_running_loop().create_future()
+
+    def on_first_audio(seconds):
+        if not first_audio.done():
+            first_audio.set_result(seconds)
+
+    context = OpenAILLMContext([{"role": "user", "content": "Hello Alex, this is AispireLabs. How are you today?"}])
+    aggregator = llm.create_context_aggregator(context)
+    task = PipelineTask(
+        Pipeline([aggregator.user(), llm, TimeToFirstAudio(connected_at, on_first_audio), aggregator.assistant()]),
+        params=PipelineParams(allow_interruptions=True),
+    )
+    await task.queue_frames([aggregator.user().get_context_frame()])
+    runner = asyncio.create_task(PipelineRunner(handle_sigint=False).run(task))
+    try:
+        return await asyncio.wait_for(first_audio, timeout)
+    finally:
+        await task.cancel()
+        await runner
+
+
+async def run(args):
+    results = {}
+    for mode in args.modes:
+        samples = [await measure(mode, args.ring_seconds, args.timeout) * 1000 for _ in range(args.runs)]
+        samples.sort()
+        results[mode] = {
+            "runs": len(samples),
+            "ttfa_p50_ms": round(statistics.median(samples)),
+            "ttfa_min_ms": round(samples[0]),
+            "ttfa_max_ms": round(samples[-1]),
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gemini Live time to first audio, cold vs pre-warmed")
+    parser.add_argument("--runs", type=int, default=5, help="Calls per mode")
+    parser.add_argument("--ring-seconds", type=float, default=4.0, help="How long before answer the warm session opens")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Give up waiting for audio after this long (s)")
+    parser.add_argument("--modes", nargs="+", default=["cold", "warm"], choices=["cold", "warm"])
+    args = parser.parse_args()
+
+    if not os.getenv("GEMINI_API_KEY"):
+        raise SystemExit("Set GEMINI_API_KEY to measure against the Gemini Live API")
+
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
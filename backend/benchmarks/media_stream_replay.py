@@ -0,0 +1,482 @@
+#!/usr/bin/env python3
+"""
+Replay Twilio media streams into the /api/ws bot pipeline.
+
+Starts the websocket router in a child process with the speech-to-speech LLM
+swapped for a fake one (answers every user turn with a fixed amount of audio
+after a simulated model delay, no network), then opens N concurrent streams
+that behave like Twilio: a `connected` and `start` event followed by 20 ms
+mu-law `media` frames in real time and a final `stop`.
+
+Input audio is either synthetic (speech-like bursts separated by silence so
+the VAD produces user turns) or a recording of Twilio messages, one JSON
+message per line, of which only the `media` payloads are replayed.
+
+Reported per stream:
+
+    turn latency   end of a user utterance -> first bot audio frame back
+                   (includes the VAD stop delay and --llm-delay)
+    frame jitter   how much later than its predecessor's audio ran out each
+                   bot audio frame arrived within a reply; tens of ms are
+                   audible as choppy audio
+
+and for the server process: event-loop lag, CPU and RSS.
+
+    python benchmarks/media_stream_replay.py --streams 200 --seconds 30
+    python benchmarks/media_stream_replay.py --streams 50 --recording call.jsonl
+"""
+import argparse
+import asyncio
+import base64
+import json
+import os
+import resource
+import socket
+import subprocess
+import sys
+import time
+import uuid
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+import numpy as np
+
+# Add the backend directory to the Python path so we can import the app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+FRAME_SECONDS = 0.02
+SAMPLE_RATE = 8000
+FRAME_BYTES = int(SAMPLE_RATE * FRAME_SECONDS)  # mu-law: one byte per sample
+# Frames quieter than this (mean absolute 16-bit amplitude) count as silence
+SILENCE_LEVEL = 300
+
+
+# ---------------------------------------------------------------------------
+# Audio
+# ---------------------------------------------------------------------------
+
+def ulaw_encode(pcm: np.ndarray) -> bytes:
+    """G.711 mu-law encode 16-bit PCM"""
+    samples = pcm.astype(np.int32) >> 2  # 14-bit, as in the G.711 reference
+    sign = np.where(samples < 0, 0x80, 0)
+    magnitude = np.minimum(np.abs(samples), 8158) + 0x21
+    exponent = np.floor(np.log2(magnitude)).astype(np.int32) - 5
+    mantissa = (magnitude >> (exponent + 1)) & 0x0F
+    return (~(sign | (exponent << 4) | mantissa) & 0xFF).astype(np.uint8).tobytes()
+
+
+def ulaw_decode(data: bytes) -> np.ndarray:
+    """G.711 mu-law decode to 16-bit PCM"""
+    codes = ~np.frombuffer(data, dtype=np.uint8).astype(np.int32) & 0xFF
+    exponent = (codes >> 4) & 0x07
+    magnitude = (((codes & 0x0F) << 3) + 0x84 << exponent) - 0x84
+    return np.where(codes & 0x80, -magnitude, magnitude).astype(np.int16)
+
+
+def synthetic_frames(seconds: float, talk: float, pause: float) -> List[str]:
+    """Base64 mu-law frames of alternating voiced bursts and near-silence"""
+    rng = np.random.default_rng(7)
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    # A wobbling fundamental with a few harmonics reads as voice to Silero
+    pitch = 140 + 25 * np.sin(2 * np.pi * 3 * t)
+    phase = 2 * np.pi * np.cumsum(pitch) / SAMPLE_RATE
+    voice = sum(np.sin(k * phase) / k for k in range(1, 6))
+    syllables = 0.6 + 0.4 * np.sin(2 * np.pi * 4 * t) ** 2
+    talking = (t % (talk + pause)) < talk
+    pcm = np.where(talking, voice * syllables * 6000, 0) + rng.normal(0, 40, t.size)
+    audio = ulaw_encode(np.clip(pcm, -32768, 32767))
+    return [
+        base64.b64encode(audio[i:i + FRAME_BYTES]).decode()
+        for i in range(0, len(audio) - FRAME_BYTES + 1, FRAME_BYTES)
+    ]
+
+
+def recorded_frames(path: str) -> List[str]:
+    """Media payloads from a recording of Twilio stream messages"""
+    frames = []
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            message = json.loads(line)
+            if message.get("event") == "media" and message["media"].get("track", "inbound") == "inbound":
+                frames.append(message["media"]["payload"])
+    if not frames:
+        raise SystemExit(f"No inbound media frames in {path}")
+    return frames
+
+
+def voiced(frames: List[str]) -> List[bool]:
+    """Per-frame speech flag used to find where each user utterance ends"""
+    return [
+        float(np.abs(ulaw_decode(base64.b64decode(payload)).astype(np.int32)).mean()) > SILENCE_LEVEL
+        for payload in frames
+    ]
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return round(ordered[min(len(ordered) - 1, int(len(ordered) * pct))], 2)
+
+
+# ---------------------------------------------------------------------------
+# Server side (child process)
+# ---------------------------------------------------------------------------
+
+def install_fake_llm(llm_delay: float, reply_seconds: float):
+    """Swap the speech-to-speech LLM used by run_bot for an offline fake"""
+    from pipecat.frames.frames import (
+        StartInterruptionFrame,
+        TTSAudioRawFrame,
+        TTSStartedFrame,
+        TTSStoppedFrame,
+        UserStoppedSpeakingFrame,
+    )
+    from pipecat.processors.aggregators.llm_response import (
+        LLMAssistantContextAggregator,
+        LLMUserContextAggregator,
+    )
+    from pipecat.processors.aggregators.openai_llm_context import OpenAILLMContextFrame
+    from pipecat.processors.frame_processor import FrameDirection
+    from pipecat.services.llm_service import LLMService
+
+    from app.services import bot_service
+
+    sample_rate = 24000  # what Gemini Live returns
+    chunk = int(sample_rate * FRAME_SECONDS) * 2
+    t = np.arange(int(reply_seconds * sample_rate)) / sample_rate
+    reply = (np.sin(2 * np.pi * 220 * t) * 4000).astype(np.int16).tobytes()
+    reply_chunks = [reply[i:i + chunk] for i in range(0, len(reply), chunk)]
+
+    class FakeContextAggregatorPair:
+        def __init__(self, context):
+            self._user = LLMUserContextAggregator(context)
+            self._assistant = LLMAssistantContextAggregator(context)
+
+        def user(self):
+            return self._user
+
+        def assistant(self):
+            return self._assistant
+
+    class FakeLiveLLMService(LLMService):
+        """Consumes user audio and answers each finished user turn"""
+
+        def __init__(self, **kwargs):
+            super().__init__(**kwargs)
+            self._reply_task = None
+
+        def create_context_aggregator(self, context, **kwargs):
+            return FakeContextAggregatorPair(context)
+
+        async def process_frame(self, frame, direction):
+            await super().process_frame(frame, direction)
+
+            if isinstance(frame, UserStoppedSpeakingFrame):
+                await self._cancel_reply()
+                self._reply_task = self.create_task(self._reply())
+                await self.push_frame(frame, direction)
+            elif isinstance(frame, StartInterruptionFrame):
+                await self._cancel_reply()
+                await self.push_frame(frame, direction)
+            elif isinstance(frame, OpenAILLMContextFrame):
+                pass  # the greeting context; the model would take it from here
+            elif direction == FrameDirection.UPSTREAM or not hasattr(frame, "audio"):
+                await self.push_frame(frame, direction)
+            # User audio is consumed, like the Live API does
+
+        async def stop(self, frame):
+            await super().stop(frame)
+            await self._cancel_reply()
+
+        async def cancel(self, frame):
+            await super().cancel(frame)
+            await self._cancel_reply()
+
+        async def _cancel_reply(self):
+            if self._reply_task:
+                await self.cancel_task(self._reply_task)
+                self._reply_task = None
+
+        async def _reply(self):
+            await asyncio.sleep(llm_delay)
+            await self.push_frame(TTSStartedFrame())
+            for audio in reply_chunks:
+                await self.push_frame(TTSAudioRawFrame(audio=audio, sample_rate=sample_rate, num_channels=1))
+            await self.push_frame(TTSStoppedFrame())
+            self._reply_task = None
+
+    bot_service.create_llm_service = lambda system_instruction: FakeLiveLLMService()
+
+
+def serve(args):
+    import uvicorn
+    from fastapi import FastAPI
+
+    install_fake_llm(args.llm_delay, args.reply_seconds)
+    from app.api import websocket
+
+    lags = deque(maxlen=200_000)
+    tick = 0.01
+
+    async def monitor():
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(tick)
+            lags.append(time.perf_counter() - started - tick)
+
+    @asynccontextmanager
+    async def lifespan(app):
+        task = asyncio.create_task(monitor())
+        yield
+        task.cancel()
+
+    app = FastAPI(lifespan=lifespan)
+    app.include_router(websocket.router, prefix="/api")
+
+    @app.post("/harness/reset")
+    async def reset():
+        lags.clear()
+        return {"ok": True}
+
+    @app.get("/harness/stats")
+    async def stats():
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        with open("/proc/self/statm") as f:
+            rss_pages = int(f.read().split()[1])
+        lags_ms = [lag * 1000 for lag in lags]
+        return {
+            "cpu_seconds": usage.ru_utime + usage.ru_stime,
+            "rss_mb": round(rss_pages * os.sysconf("SC_PAGE_SIZE") / 2**20, 1),
+            "max_rss_mb": round(usage.ru_maxrss / 1024, 1),
+            "loop_lag_p50_ms": percentile(lags_ms, 0.5),
+            "loop_lag_p99_ms": percentile(lags_ms, 0.99),
+            "loop_lag_max_ms": round(max(lags_ms), 2) if lags_ms else None,
+            "tasks": len(asyncio.all_tasks()),
+        }
+
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning", ws_max_size=2**20)
+
+
+# ---------------------------------------------------------------------------
+# Driver side
+# ---------------------------------------------------------------------------
+
+async def replay(index: int, url: str, frames: List[str], speech: List[bool],
+                 drain: float, results: List[Dict]):
+    """One simulated Twilio call; records turn latencies and reply frame jitter"""
+    import websockets
+
+    loop = asyncio.get_running_loop()
+    stream_sid = f"MZ{uuid.uuid4().hex}"
+    call_sid = f"CA{uuid.uuid4().hex}"
+    last_speech_sent: Optional[float] = None
+    turn_latencies: List[float] = []
+    frame_jitter: List[float] = []
+    received = 0
+    result = {"stream": index, "ok": False}
+
+    async def receive(ws):
+        nonlocal received
+        previous = None
+        previous_ms = 0.0
+        async for raw in ws:
+            message = json.loads(raw)
+            if message.get("event") != "media":
+                continue
+            now = loop.time()
+            received += 1
+            if previous is None or now - previous > 0.25:
+                # First frame of a reply
+                if last_speech_sent is not None:
+                    turn_latencies.append((now - last_speech_sent) * 1000)
+            else:
+                frame_jitter.append(max(0.0, (now - previous) * 1000 - previous_ms))
+            previous = now
+            previous_ms = len(base64.b64decode(message["media"]["payload"])) / SAMPLE_RATE * 1000
+
+    try:
+        async with websockets.connect(url, max_size=2**20, open_timeout=30) as ws:
+            await ws.send(json.dumps({"event": "connected", "protocol": "Call", "version": "1.0.0"}))
+            await ws.send(json.dumps({
+                "event": "start",
+                "sequenceNumber": "1",
+                "streamSid": stream_sid,
+                "start": {
+                    "streamSid": stream_sid,
+                    "callSid": call_sid,
+                    "accountSid": "AC00000000000000000000000000000000",
+                    "tracks": ["inbound"],
+                    "customParameters": {},
+                    "mediaFormat": {"encoding": "audio/x-mulaw", "sampleRate": SAMPLE_RATE, "channels": 1},
+                },
+            }))
+            receiver = asyncio.create_task(receive(ws))
+
+            started = loop.time()
+            late = 0.0
+            for n, payload in enumerate(frames):
+                delay = started + n * FRAME_SECONDS - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                else:
+                    late = max(late, -delay)
+                await ws.send(json.dumps({
+                    "event": "media",
+                    "sequenceNumber": str(n + 2),
+                    "streamSid": stream_sid,
+                    "media": {"track": "inbound", "chunk": str(n + 1), "timestamp": str(n * 20), "payload": payload},
+                }))
+                if speech[n]:
+                    last_speech_sent = loop.time()
+
+            await asyncio.sleep(drain)
+            await ws.send(json.dumps({
+                "event": "stop",
+                "sequenceNumber": str(len(frames) + 2),
+                "streamSid": stream_sid,
+                "stop": {"accountSid": "AC00000000000000000000000000000000", "callSid": call_sid},
+            }))
+            receiver.cancel()
+        result.update({
+            "ok": True,
+            "frames_received": received,
+            "send_late_max_ms": round(late * 1000, 2),
+            "turns": len(turn_latencies),
+            "turn_latency_p50_ms": percentile(turn_latencies, 0.5),
+            "turn_latency_max_ms": percentile(turn_latencies, 1.0),
+            "frame_jitter_p99_ms": percentile(frame_jitter, 0.99),
+            "frame_jitter_max_ms": percentile(frame_jitter, 1.0),
+        })
+        result["_turns"] = turn_latencies
+        result["_jitter"] = frame_jitter
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    results.append(result)
+
+
+async def drive(args, base_url: str) -> Dict:
+    frames = recorded_frames(args.recording) if args.recording else synthetic_frames(
+        args.seconds, args.talk_seconds, args.pause_seconds)
+    speech = voiced(frames)
+    url = base_url.replace("http", "ws", 1) + "/api/ws"
+
+    samples = []
+    stats_timeouts = 0
+    results: List[Dict] = []
+    async with httpx.AsyncClient(base_url=base_url, timeout=30.0) as harness:
+        await harness.post("/harness/reset")
+        before = (await harness.get("/harness/stats")).json()
+        started = time.perf_counter()
+
+        streams = []
+        for i in range(args.streams):
+            streams.append(asyncio.create_task(replay(i, url, frames, speech, args.drain_seconds, results)))
+            if args.ramp_seconds:
+                await asyncio.sleep(args.ramp_seconds / args.streams)
+
+        pending = set(streams)
+        while pending:
+            done, pending = await asyncio.wait(pending, timeout=1.0)
+            try:
+                samples.append((await harness.get("/harness/stats", timeout=5.0)).json())
+            except httpx.TimeoutException:
+                # A server too busy to answer is itself a result
+                stats_timeouts += 1
+
+        elapsed = time.perf_counter() - started
+        after = (await harness.get("/harness/stats")).json()
+
+    ok = [r for r in results if r["ok"]]
+    turns = [latency for r in ok for latency in r.pop("_turns")]
+    jitter = [value for r in ok for value in r.pop("_jitter")]
+    return {
+        "streams": args.streams,
+        "streams_ok": len(ok),
+        "audio_seconds_per_stream": round(len(frames) * FRAME_SECONDS, 1),
+        "wall_seconds": round(elapsed, 1),
+        "turns": len(turns),
+        "turn_latency_p50_ms": percentile(turns, 0.5),
+        "turn_latency_p99_ms": percentile(turns, 0.99),
+        "worst_stream_turn_latency_ms": max((r["turn_latency_max_ms"] or 0 for r in ok), default=None),
+        "frame_jitter_p50_ms": percentile(jitter, 0.5),
+        "frame_jitter_p99_ms": percentile(jitter, 0.99),
+        "frame_jitter_max_ms": percentile(jitter, 1.0),
+        "client_send_late_max_ms": max((r["send_late_max_ms"] for r in ok), default=None),
+        "server": {
+            "cpu_percent": round((after["cpu_seconds"] - before["cpu_seconds"]) / elapsed * 100, 1),
+            "rss_mb_before": before["rss_mb"],
+            "rss_mb_peak": max(s["rss_mb"] for s in samples + [after]),
+            "rss_mb_per_stream": round((max(s["rss_mb"] for s in samples + [after]) - before["rss_mb"]) / args.streams, 2),
+            "loop_lag_p50_ms": after["loop_lag_p50_ms"],
+            "loop_lag_p99_ms": after["loop_lag_p99_ms"],
+            "loop_lag_max_ms": after["loop_lag_max_ms"],
+            "peak_tasks": max(s["tasks"] for s in samples + [after]),
+            "stats_timeouts": stats_timeouts,
+        },
+        "errors": sorted({r["error"] for r in results if not r["ok"]}),
+        "per_stream": sorted(results, key=lambda r: r["stream"]) if args.per_stream else None,
+    }
+
+
+def start_server(args) -> Tuple[subprocess.Popen, str]:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    command = [sys.executable, os.path.abspath(__file__), "--serve", "--port", str(port),
+               "--llm-delay", str(args.llm_delay), "--reply-seconds", str(args.reply_seconds)]
+    server = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=None if args.server_logs else subprocess.DEVNULL)
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        if server.poll() is not None:
+            raise SystemExit("Harness server exited during startup (rerun with --server-logs)")
+        try:
+            httpx.get(base_url + "/harness/stats", timeout=1.0)
+            return server, base_url
+        except httpx.HTTPError:
+            time.sleep(0.5)
+    server.kill()
+    raise SystemExit("Harness server did not start")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay Twilio media streams into the bot pipeline")
+    parser.add_argument("--streams", type=int, default=50, help="Concurrent streams")
+    parser.add_argument("--seconds", type=float, default=20.0, help="Synthetic audio per stream (s)")
+    parser.add_argument("--talk-seconds", type=float, default=1.5, help="Synthetic utterance length (s)")
+    parser.add_argument("--pause-seconds", type=float, default=2.5, help="Synthetic silence between utterances (s)")
+    parser.add_argument("--recording", help="JSON-lines Twilio messages to replay instead of synthetic audio")
+    parser.add_argument("--ramp-seconds", type=float, default=5.0, help="Spread stream starts over this long")
+    parser.add_argument("--drain-seconds", type=float, default=3.0, help="Wait for the last reply before `stop`")
+    parser.add_argument("--llm-delay", type=float, default=0.3, help="Fake LLM time to first audio (s)")
+    parser.add_argument("--reply-seconds", type=float, default=1.0, help="Fake LLM reply length (s)")
+    parser.add_argument("--per-stream", action="store_true", help="Include every stream in the report")
+    parser.add_argument("--server-logs", action="store_true", help="Show the harness server's stderr")
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, default=0, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args)
+        return
+
+    server, base_url = start_server(args)
+    try:
+        report = asyncio.run(drive(args, base_url))
+    finally:
+        server.terminate()
+        try:
+            server.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            server.kill()
+    print(json.dumps({k: v for k, v in report.items() if v is not None}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Event-loop latency while dialing through Twilio.
+
+Starts a local stand-in for the Twilio REST API (answers Calls.json after a
+simulated delay), points TwilioService at it and fires N concurrent dials in
+three ways:
+
+    blocking  initiate_call awaited straight from a coroutine (old behaviour)
+    thread    initiate_call in asyncio.to_thread
+    async     initiate_call_async on the pooled httpx client
+
+A ticker task measures how late the event loop wakes up while the dials run;
+that lag is what every live media stream on the worker would feel.
+
+    python benchmarks/twilio_dial_latency.py --dials 50 --api-latency 0.2
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Add the backend directory to the Python path so we can import the app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class StandInTwilioHandler(BaseHTTPRequestHandler):
+    """Just enough of the Twilio REST API for TwilioService"""
+
+    protocol_version = "HTTP/1.1"  # keep-alive, like api.twilio.com
+    api_latency = 0.2
+    connections = set()
+
+    def do_GET(self):
+        # Account fetch done when TwilioService starts
+        self._reply({"sid": os.environ["TWILIO_ACCOUNT_SID"], "status": "active"})
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        time.sleep(self.api_latency)
+        self._reply({"sid": f"CA{uuid.uuid4().hex}", "status": "queued"}, status=201)
+
+    def _reply(self, payload, status=200):
+        StandInTwilioHandler.connections.add(self.client_address)
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StandInTwilioServer(ThreadingHTTPServer):
+    # The default listen backlog of 5 drops connections when every dial connects at once
+    request_queue_size = 128
+    daemon_threads = True
+
+
+def start_stand_in(api_latency):
+    StandInTwilioHandler.api_latency = api_latency
+    server = StandInTwilioServer(("127.0.0.1", 0), StandInTwilioHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+async def measure(mode, service, dials, tick):
+    """Run the dials while sampling event-loop lag every `tick` seconds"""
+    lags = []
+    done = asyncio.Event()
+
+    async def ticker():
+        while not done.is_set():
+            started = time.perf_counter()
+            await asyncio.sleep(tick)
+            lags.append(time.perf_counter() - started - tick)
+
+    async def dial(i):
+        number = f"+1415555{i:04d}"
+        if mode == "blocking":
+            return service.initiate_call(number, i)
+        if mode == "thread":
+            return await asyncio.to_thread(service.initiate_call, number, i)
+        return await service.initiate_call_async(number, i)
+
+    StandInTwilioHandler.connections = set()
+    ticker_task = asyncio.create_task(ticker())
+    await asyncio.sleep(tick * 2)
+
+    started = time.perf_counter()
+    sids = await asyncio.gather(*(dial(i) for i in range(dials)))
+    elapsed = time.perf_counter() - started
+
+    done.set()
+    await ticker_task
+
+    lags_ms = sorted(lag * 1000 for lag in lags) or [0.0]
+    return {
+        "mode": mode,
+        "dials": len(sids),
+        "wall_seconds": round(elapsed, 3),
+        "dials_per_second": round(len(sids) / elapsed, 1),
+        "loop_lag_p50_ms": round(statistics.median(lags_ms), 2),
+        "loop_lag_p99_ms": round(lags_ms[min(len(lags_ms) - 1, int(len(lags_ms) * 0.99))], 2),
+        "loop_lag_max_ms": round(lags_ms[-1], 2),
+        "client_connections": len(StandInTwilioHandler.connections),
+    }
+
+
+async def run(args):
+    from app.services.twilio_service import TwilioService
+
+    service = TwilioService()
+    results = []
+    for mode in args.modes:
+        results.append(await measure(mode, service, args.dials, args.tick))
+    await service.aclose()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Event-loop latency under concurrent Twilio dials")
+    parser.add_argument("--dials", type=int, default=50, help="Concurrent dials per mode")
+    parser.add_argument("--api-latency", type=float, default=0.2, help="Stand-in API response time (s)")
+    parser.add_argument("--tick", type=float, default=0.01, help="Event-loop lag sampling interval (s)")
+    parser.add_argument("--modes", nargs="+", default=["blocking", "thread", "async"],
+                        choices=["blocking", "thread", "async"])
+    args = parser.parse_args()
+
+    server = start_stand_in(args.api_latency)
+
+    # Point the app at the stand-in and keep the rate limiter out of the way
+    os.environ.setdefault("TWILIO_ACCOUNT_SID", "AC00000000000000000000000000000000")
+    os.environ.setdefault("TWILIO_AUTH_TOKEN", "benchmark")
+    os.environ.setdefault("TWILIO_PHONE_NUMBER", "+15550000000")
+    os.environ["TWILIO_API_BASE_URL"] = f"http://127.0.0.1:{server.server_address[1]}"
+    os.environ["DIAL_RATE_LIMIT_BACKEND"] = "local"
+    for name in ("TWILIO_ACCOUNT_CPS", "TWILIO_NUMBER_CPS", "TWILIO_ACCOUNT_BURST", "TWILIO_NUMBER_BURST"):
+        os.environ[name] = str(args.dials * 100)
+    os.environ["TWILIO_HTTP_MAX_CONNECTIONS"] = str(args.dials)
+
+    try:
+        results = asyncio.run(run(args))
+    finally:
+        server.shutdown()
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
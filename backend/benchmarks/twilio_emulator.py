@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Twilio REST API and its status callbacks.
+
+Implements the endpoints TwilioService uses (account fetch, calls.create,
+calls(sid).fetch) and plays each created call through a status-callback
+sequence (initiated -> ringing -> in-progress -> completed, or busy /
+no-answer / failed) posted back to the call's StatusCallback URL, so the whole
+dial -> webhook -> queue loop runs on one box without live Twilio.
+
+    # 1. emulator (calls last ~1s instead of ~90s with --time-scale 0.01)
+    python benchmarks/twilio_emulator.py --port 8099 --time-scale 0.01 \\
+        --answer-rate 0.4 --busy-rate 0.2 --failed-rate 0.05
+
+    # 2. API pointed at the emulator, callbacks coming back to it
+    TWILIO_API_BASE_URL=http://127.0.0.1:8099 WEBHOOK_BASE_URL=http://127.0.0.1:8000 \\
+        uvicorn main:app --port 8000
+
+    # 3. drive a group call through it
+    python benchmarks/dial_loop_load.py --api-url http://127.0.0.1:8000 \\
+        --emulator-url http://127.0.0.1:8099 --leads 500
+
+Any TWILIO_ACCOUNT_SID / TWILIO_AUTH_TOKEN is accepted. Callbacks carry an
+X-Twilio-Signature computed with --auth-token.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import random
+import time
+import uuid
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from typing import Dict, Optional
+from urllib.parse import urlsplit, urlunsplit
+
+import httpx
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse
+from twilio.request_validator import RequestValidator
+
+logger = logging.getLogger("twilio_emulator")
+
+API_VERSION = "2010-04-01"
+TERMINAL_STATUSES = ["completed", "busy", "no-answer", "failed", "canceled"]
+
+
+class CallScenario:
+    """Outcome mix and timings for emulated calls (seconds are call time, before scaling)"""
+
+    def __init__(self, answer_rate: float = 0.4, busy_rate: float = 0.15, failed_rate: float = 0.05,
+                 ring_seconds: float = 8.0, mean_duration: float = 90.0, time_scale: float = 1.0,
+                 seed: Optional[int] = None):
+        self.answer_rate = answer_rate
+        self.busy_rate = busy_rate
+        self.failed_rate = failed_rate
+        self.ring_seconds = ring_seconds
+        self.mean_duration = mean_duration
+        self.time_scale = time_scale
+        self.rng = random.Random(seed)
+
+    def pick_outcome(self):
+        """Final status plus ring and talk time; whatever isn't answered/busy/failed is no-answer"""
+        roll = self.rng.random()
+        ring = max(1.0, self.rng.gauss(self.ring_seconds, self.ring_seconds / 4))
+        if roll < self.failed_rate:
+            return "failed", 0.0, 0
+        roll -= self.failed_rate
+        if roll < self.busy_rate:
+            return "busy", min(ring, 3.0), 0
+        roll -= self.busy_rate
+        if roll < self.answer_rate:
+            return "completed", ring, max(1, int(self.rng.expovariate(1 / self.mean_duration)))
+        return "no-answer", 30.0, 0
+
+
+class TwilioEmulator:
+    """In-memory calls plus the tasks that play their callback sequences"""
+
+    def __init__(self, scenario: CallScenario, auth_token: str, callback_base_url: Optional[str] = None,
+                 fetch_twiml: bool = False, api_latency: float = 0.0):
+        self.scenario = scenario
+        self.validator = RequestValidator(auth_token)
+        self.callback_base_url = callback_base_url
+        self.fetch_twiml = fetch_twiml
+        self.api_latency = api_latency
+        self.calls: Dict[str, Dict] = {}
+        self._tasks = set()
+        self._http: Optional[httpx.AsyncClient] = None
+        self.started_at = time.time()
+        self.stats = {
+            "calls_created": 0,
+            "callbacks_sent": 0,
+            "callbacks_failed": 0,
+            "callback_latency_total": 0.0,
+            "in_flight": 0,
+            "max_in_flight": 0,
+            "outcomes": {},
+        }
+
+    @property
+    def http(self) -> httpx.AsyncClient:
+        if self._http is None:
+            self._http = httpx.AsyncClient(timeout=10.0, limits=httpx.Limits(max_connections=100))
+        return self._http
+
+    def create_call(self, account_sid: str, form) -> Dict:
+        now = datetime.now(timezone.utc)
+        sid = f"CA{uuid.uuid4().hex}"
+        final_status, ring, duration = self.scenario.pick_outcome()
+        call = {
+            "sid": sid,
+            "account_sid": account_sid,
+            "to": form.get("To"),
+            "from": form.get("From"),
+            "url": form.get("Url"),
+            "status_callback": self._rebase(form.get("StatusCallback")),
+            "status_callback_events": form.getlist("StatusCallbackEvent") or ["completed"],
+            "status": "queued",
+            "final_status": final_status,
+            "ring_seconds": ring,
+            "duration": duration,
+            "sequence": 0,
+            "date_created": now,
+            "start_time": None,
+            "end_time": None,
+        }
+        self.calls[sid] = call
+        self.stats["calls_created"] += 1
+        self._track_in_flight(1)
+
+        task = asyncio.create_task(self._play(call))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return call
+
+    def to_resource(self, call: Dict) -> Dict:
+        """Call resource JSON in the shape the twilio library parses"""
+        return {
+            "sid": call["sid"],
+            "account_sid": call["account_sid"],
+            "to": call["to"],
+            "from": call["from"],
+            "status": call["status"],
+            "direction": "outbound-api",
+            "api_version": API_VERSION,
+            "duration": str(call["duration"]) if call["status"] == "completed" else None,
+            "date_created": format_datetime(call["date_created"]),
+            "date_updated": format_datetime(datetime.now(timezone.utc)),
+            "start_time": format_datetime(call["start_time"]) if call["start_time"] else None,
+            "end_time": format_datetime(call["end_time"]) if call["end_time"] else None,
+            "price": None,
+            "price_unit": "USD",
+            "uri": f"/{API_VERSION}/Accounts/{call['account_sid']}/Calls/{call['sid']}.json",
+        }
+
+    def get_stats(self) -> Dict:
+        stats = dict(self.stats)
+        sent = stats.pop("callback_latency_total")
+        stats["callback_latency_avg_ms"] = round(sent / stats["callbacks_sent"] * 1000, 2) if stats["callbacks_sent"] else 0.0
+        stats["uptime_seconds"] = round(time.time() - self.started_at, 1)
+        return stats
+
+    async def close(self) -> None:
+        for task in list(self._tasks):
+            task.cancel()
+        if self._http is not None:
+            await self._http.aclose()
+
+    async def _play(self, call: Dict) -> None:
+        scale = self.scenario.time_scale
+        try:
+            await asyncio.sleep(0.05 * scale)
+            await self._transition(call, "initiated", "initiated")
+
+            if call["final_status"] == "failed":
+                await self._finish(call)
+                return
+
+            await asyncio.sleep(1.0 * scale)
+            await self._transition(call, "ringing", "ringing")
+            await asyncio.sleep(call["ring_seconds"] * scale)
+
+            if call["final_status"] == "completed":
+                call["start_time"] = datetime.now(timezone.utc)
+                await self._transition(call, "in-progress", "answered")
+                if self.fetch_twiml and call["url"]:
+                    await self._post(call["url"], self._callback_params(call))
+                await asyncio.sleep(call["duration"] * scale)
+
+            await self._finish(call)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Call {call['sid']} playback failed: {e}")
+
+    async def _finish(self, call: Dict) -> None:
+        call["end_time"] = datetime.now(timezone.utc)
+        outcome = call["final_status"]
+        self.stats["outcomes"][outcome] = self.stats["outcomes"].get(outcome, 0) + 1
+        self._track_in_flight(-1)
+        # Twilio always reports the terminal status when a callback URL is set
+        await self._transition(call, outcome, None)
+
+    async def _transition(self, call: Dict, status: str, event: Optional[str]) -> None:
+        call["status"] = status
+        if not call["status_callback"]:
+            return
+        if event is not None and event not in call["status_callback_events"]:
+            return
+        call["sequence"] += 1
+        params = self._callback_params(call)
+        params["SequenceNumber"] = str(call["sequence"] - 1)
+        params["CallbackSource"] = "call-progress-events"
+        params["Timestamp"] = format_datetime(datetime.now(timezone.utc))
+        if status in TERMINAL_STATUSES:
+            params["CallDuration"] = str(call["duration"])
+            params["Duration"] = str((call["duration"] + 59) // 60)
+        await self._post(call["status_callback"], params)
+
+    def _callback_params(self, call: Dict) -> Dict[str, str]:
+        return {
+            "CallSid": call["sid"],
+            "AccountSid": call["account_sid"],
+            "From": call["from"] or "",
+            "To": call["to"] or "",
+            "CallStatus": call["status"],
+            "Direction": "outbound-api",
+            "ApiVersion": API_VERSION,
+        }
+
+    async def _post(self, url: str, params: Dict[str, str]) -> None:
+        headers = {"X-Twilio-Signature": self.validator.compute_signature(url, params)}
+        started = time.perf_counter()
+        try:
+            response = await self.http.post(url, data=params, headers=headers)
+            response.raise_for_status()
+            self.stats["callbacks_sent"] += 1
+            self.stats["callback_latency_total"] += time.perf_counter() - started
+        except Exception as e:
+            self.stats["callbacks_failed"] += 1
+            logger.warning(f"Callback to {url} failed: {e}")
+
+    def _rebase(self, url: Optional[str]) -> Optional[str]:
+        """Send callbacks to --callback-base-url instead of the public webhook host"""
+        if not url or not self.callback_base_url:
+            return url
+        base = urlsplit(self.callback_base_url)
+        parts = urlsplit(url)
+        return urlunsplit((base.scheme, base.netloc, parts.path, parts.query, parts.fragment))
+
+    def _track_in_flight(self, delta: int) -> None:
+        self.stats["in_flight"] += delta
+        self.stats["max_in_flight"] = max(self.stats["max_in_flight"], self.stats["in_flight"])
+
+
+def create_app(emulator: TwilioEmulator) -> FastAPI:
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        yield
+        await emulator.close()
+
+    app = FastAPI(title="Twilio emulator", lifespan=lifespan)
+    prefix = f"/{API_VERSION}/Accounts/{{account_sid}}"
+
+    @app.get(prefix + ".json")
+    async def fetch_account(account_sid: str):
+        return {"sid": account_sid, "friendly_name": "Emulated account", "status": "active", "type": "Full"}
+
+    @app.post(prefix + "/Calls.json")
+    async def create_call(account_sid: str, request: Request):
+        form = await request.form()
+        if not form.get("To") or not form.get("From"):
+            return JSONResponse(status_code=400, content={"code": 21201, "message": "To and From are required", "status": 400})
+        if emulator.api_latency:
+            await asyncio.sleep(emulator.api_latency)
+        call = emulator.create_call(account_sid, form)
+        return JSONResponse(status_code=201, content=emulator.to_resource(call))
+
+    @app.get(prefix + "/Calls/{call_sid}.json")
+    async def fetch_call(account_sid: str, call_sid: str):
+        call = emulator.calls.get(call_sid)
+        if not call:
+            raise HTTPException(status_code=404, detail="Call not found")
+        return emulator.to_resource(call)
+
+    @app.get("/emulator/stats")
+    async def stats():
+        return emulator.get_stats()
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local Twilio REST + status callback emulator")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--auth-token", default=os.getenv("TWILIO_AUTH_TOKEN", "emulator"),
+                        help="Token used to sign callbacks")
+    parser.add_argument("--callback-base-url", help="Override scheme/host of StatusCallback URLs")
+    parser.add_argument("--answer-rate", type=float, default=0.4)
+    parser.add_argument("--busy-rate", type=float, default=0.15)
+    parser.add_argument("--failed-rate", type=float, default=0.05)
+    parser.add_argument("--ring-seconds", type=float, default=8.0)
+    parser.add_argument("--mean-duration", type=float, default=90.0)
+    parser.add_argument("--time-scale", type=float, default=1.0, help="Multiply every delay, e.g. 0.01")
+    parser.add_argument("--api-latency", type=float, default=0.0, help="Delay before calls.create answers (s)")
+    parser.add_argument("--fetch-twiml", action="store_true", help="POST to the call Url when answered")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    import uvicorn
+
+    scenario = CallScenario(
+        answer_rate=args.answer_rate,
+        busy_rate=args.busy_rate,
+        failed_rate=args.failed_rate,
+        ring_seconds=args.ring_seconds,
+        mean_duration=args.mean_duration,
+        time_scale=args.time_scale,
+        seed=args.seed,
+    )
+    emulator = TwilioEmulator(
+        scenario,
+        auth_token=args.auth_token,
+        callback_base_url=args.callback_base_url,
+        fetch_twiml=args.fetch_twiml,
+        api_latency=args.api_latency,
+    )
+    uvicorn.run(create_app(emulator), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+Response time of the TwiML webhook under concurrent Twilio requests.
+
+Serves the webhook router in a child process and fires N concurrent
+`POST /api/webhook/` requests (form-encoded CallSid, like Twilio) at it. Every
+call SID has a cached call context, so the numbers cover form parsing,
+parameter signing and TwiML rendering, not the database. Two modes, each in a
+fresh server process:
+
+    per_request  the template is opened, read and parsed on every request
+                 (behaviour before the template engine)
+    compiled     twiml_engine: compiled once at startup, rendered from memory
+
+Reported: requests/s, latency percentiles, server CPU per request and
+event-loop lag. --read-delay-ms adds a blocking sleep to each per_request
+read to model slow or contended storage (network volumes, container
+overlay filesystems under load).
+
+    python benchmarks/twiml_webhook_load.py --requests 20000 --concurrency 50
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import socket
+import subprocess
+import sys
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+# Add the backend directory to the Python path so we can import the app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def call_sid(index: int) -> str:
+    return f"CA{index:032x}"
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return round(ordered[min(len(ordered) - 1, int(len(ordered) * pct))], 2)
+
+
+# ---------------------------------------------------------------------------
+# Server side (child process)
+# ---------------------------------------------------------------------------
+
+def install_per_request_rendering(read_delay: float):
+    """Swap the engine's render for the old open/read/parse-per-request path"""
+    from string import Template
+
+    from app.services import twiml_service
+
+    def render(name, **values):
+        with open(os.path.join(twiml_service.twiml_engine.directory, name)) as f:
+            if read_delay:
+                time.sleep(read_delay)
+            template = Template(f.read())
+        return template.substitute(**values)
+
+    twiml_service.twiml_engine.render = render
+
+
+def serve(args):
+    import uvicorn
+    from fastapi import FastAPI
+
+    from app.api import webhooks
+    from app.services.call_context_cache import call_context_cache
+    from app.services.twiml_service import twiml_engine
+
+    if args.serve == "per_request":
+        install_per_request_rendering(args.read_delay_ms / 1000)
+
+    # Cached contexts for every SID the driver sends, as if just dialed
+    for i in range(args.calls):
+        context = {
+            "call_id": i + 1,
+            "lead_info": {"id": i + 1, "name": f"Lead {i}", "company": "Example Co"},
+            "purpose": "general",
+            "custom_prompt": None,
+            "additional_notes": None,
+            "system_instruction": "",
+        }
+        call_context_cache.backend.set(call_sid(i), context, 3600)
+
+    lags = deque(maxlen=200_000)
+    tick = 0.01
+
+    async def monitor():
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(tick)
+            lags.append(time.perf_counter() - started - tick)
+
+    @asynccontextmanager
+    async def lifespan(app):
+        if args.serve == "compiled":
+            await asyncio.to_thread(twiml_engine.load)
+        task = asyncio.create_task(monitor())
+        yield
+        task.cancel()
+
+    app = FastAPI(lifespan=lifespan)
+    app.include_router(webhooks.router, prefix="/api")
+
+    @app.post("/harness/reset")
+    async def reset():
+        lags.clear()
+        return {"ok": True}
+
+    @app.get("/harness/stats")
+    async def stats():
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        lags_ms = [lag * 1000 for lag in lags]
+        return {
+            "cpu_seconds": usage.ru_utime + usage.ru_stime,
+            "loop_lag_p50_ms": percentile(lags_ms, 0.5),
+            "loop_lag_p99_ms": percentile(lags_ms, 0.99),
+            "loop_lag_max_ms": round(max(lags_ms), 2) if lags_ms else None,
+        }
+
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning")
+
+
+# ---------------------------------------------------------------------------
+# Driver side
+# ---------------------------------------------------------------------------
+
+async def drive(args, base_url: str) -> Dict:
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30.0) as client:
+        async def post(index: int) -> float:
+            started = time.perf_counter()
+            response = await client.post("/api/webhook/", data={"CallSid": call_sid(index % args.calls)})
+            response.raise_for_status()
+            if b"<Parameter" not in response.content:
+                raise RuntimeError("TwiML without stream parameters")
+            return (time.perf_counter() - started) * 1000
+
+        async def worker(indices: range, latencies: List[float], errors: List[str]):
+            for index in indices:
+                try:
+                    latencies.append(await post(index))
+                except Exception as e:
+                    errors.append(type(e).__name__ + ": " + str(e))
+
+        async def run(total: int) -> Tuple[List[float], List[str], float]:
+            latencies: List[float] = []
+            errors: List[str] = []
+            started = time.perf_counter()
+            await asyncio.gather(*(
+                worker(range(w, total, args.concurrency), latencies, errors)
+                for w in range(args.concurrency)
+            ))
+            return latencies, errors, time.perf_counter() - started
+
+        await run(min(args.requests, args.concurrency * 20))  # Warm up connections and code paths
+        await client.post("/harness/reset")
+        before = (await client.get("/harness/stats")).json()
+        latencies, errors, elapsed = await run(args.requests)
+        after = (await client.get("/harness/stats")).json()
+
+    return {
+        "requests": len(latencies),
+        "errors": len(errors),
+        "error_samples": sorted(set(errors))[:5],
+        "requests_per_second": round(len(latencies) / elapsed, 1),
+        "latency_p50_ms": percentile(latencies, 0.5),
+        "latency_p95_ms": percentile(latencies, 0.95),
+        "latency_p99_ms": percentile(latencies, 0.99),
+        "latency_max_ms": round(max(latencies), 2) if latencies else None,
+        "server_cpu_us_per_request": round((after["cpu_seconds"] - before["cpu_seconds"]) / max(len(latencies), 1) * 1e6, 1),
+        "loop_lag_p99_ms": after["loop_lag_p99_ms"],
+        "loop_lag_max_ms": after["loop_lag_max_ms"],
+    }
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def spawn(name: str, command: List[str], probe_url: str, env: Dict[str, str], logs: bool) -> subprocess.Popen:
+    process = subprocess.Popen(command, env=env, stdout=subprocess.DEVNULL,
+                               stderr=None if logs else subprocess.DEVNULL)
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise SystemExit(f"{name} exited during startup (rerun with --server-logs)")
+        try:
+            httpx.get(probe_url, timeout=1.0)
+            return process
+        except httpx.HTTPError:
+            time.sleep(0.5)
+    process.kill()
+    raise SystemExit(f"{name} did not start")
+
+
+def stop(process: subprocess.Popen) -> None:
+    process.terminate()
+    try:
+        process.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+def start_server(args, mode: str, twilio_api_base_url: str) -> Tuple[subprocess.Popen, str]:
+    port = free_port()
+    command = [sys.executable, os.path.abspath(__file__), "--serve", mode, "--port", str(port),
+               "--calls", str(args.calls), "--read-delay-ms", str(args.read_delay_ms)]
+    # Contexts are seeded in process; keep the cache off the database
+    env = dict(os.environ, CALL_CONTEXT_CACHE_BACKEND="local", LLM_PREWARM_ENABLED="false",
+               TWILIO_API_BASE_URL=twilio_api_base_url)
+    # The webhook router builds a Twilio client on import (one account fetch)
+    env.setdefault("TWILIO_ACCOUNT_SID", "AC" + "0" * 32)
+    env.setdefault("TWILIO_AUTH_TOKEN", "benchmark")
+    env.setdefault("TWILIO_PHONE_NUMBER", "+15005550006")
+    base_url = f"http://127.0.0.1:{port}"
+    return spawn("Webhook server", command, base_url + "/harness/stats", env, args.server_logs), base_url
+
+
+def main():
+    parser = argparse.ArgumentParser(description="TwiML webhook response time under concurrent load")
+    parser.add_argument("--requests", type=int, default=10000, help="Requests per mode")
+    parser.add_argument("--concurrency", type=int, default=50, help="Requests in flight")
+    parser.add_argument("--calls", type=int, default=1000, help="Distinct call SIDs")
+    parser.add_argument("--read-delay-ms", type=float, default=0.0, help="Extra blocking delay per per_request read")
+    parser.add_argument("--modes", nargs="+", default=["per_request", "compiled"], choices=["per_request", "compiled"])
+    parser.add_argument("--server-logs", action="store_true", help="Show the webhook server's stderr")
+    parser.add_argument("--serve", choices=["per_request", "compiled"], help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, default=0, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args)
+        return
+
+    # TwilioService fetches the account on import; answer it locally
+    emulator = None
+    twilio_api_base_url = os.getenv("TWILIO_API_BASE_URL")
+    if not twilio_api_base_url:
+        port = free_port()
+        twilio_api_base_url = f"http://127.0.0.1:{port}"
+        emulator = spawn(
+            "Twilio emulator",
+            [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "twilio_emulator.py"),
+             "--port", str(port)],
+            twilio_api_base_url + "/emulator/stats", dict(os.environ), args.server_logs,
+        )
+
+    results = {}
+    try:
+        for mode in args.modes:
+            server, base_url = start_server(args, mode, twilio_api_base_url)
+            try:
+                results[mode] = asyncio.run(drive(args, base_url))
+            finally:
+                stop(server)
+    finally:
+        if emulator:
+            stop(emulator)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Call-setup time and memory of the Silero VAD, per-call model vs shared registry.
+
+For each concurrency level a fresh process sets up N calls' VAD analyzers the
+way run_bot does and keeps them alive, then feeds every analyzer a second of
+audio. Two modes:
+
+    per_call  SileroVADAnalyzer() per call (loads the ONNX model every time)
+    shared    vad_registry.create_analyzer() (model loaded once at startup)
+
+Reported: setup time per call, RSS growth per call, inference time, and a
+check that analyzers sharing a session still keep their own state.
+
+    python benchmarks/vad_call_setup.py --calls 1 10 100
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+# Add the backend directory to the Python path so we can import the app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def rss_mb() -> float:
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+
+
+def speech_like(seconds: float, sample_rate: int, seed: int) -> bytes:
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    phase = 2 * np.pi * np.cumsum(140 + 25 * np.sin(2 * np.pi * 3 * t)) / sample_rate
+    voice = sum(np.sin(k * phase) / k for k in range(1, 6)) * (t % 1.0 < 0.6)
+    return (voice * 6000 + rng.normal(0, 40, t.size)).astype(np.int16).tobytes()
+
+
+def confidences(analyzer, audio: bytes):
+    step = analyzer.num_frames_required() * 2
+    return [float(analyzer.voice_confidence(audio[i:i + step])) for i in range(0, len(audio) - step + 1, step)]
+
+
+def child(mode: str, calls: int, sample_rate: int) -> dict:
+    import logging
+
+    from loguru import logger as loguru_logger
+
+    loguru_logger.remove()
+    logging.disable(logging.INFO)
+
+    from pipecat.audio.vad.silero import SileroVADAnalyzer
+
+    from app.services.vad_service import vad_registry
+
+    baseline = rss_mb()
+    startup_ms = None
+    if mode == "shared":
+        started = time.perf_counter()
+        vad_registry.load()
+        startup_ms = (time.perf_counter() - started) * 1000
+    after_startup = rss_mb()
+
+    setup_ms = []
+    analyzers = []
+    for _ in range(calls):
+        started = time.perf_counter()
+        analyzer = SileroVADAnalyzer() if mode == "per_call" else vad_registry.create_analyzer()
+        analyzer.set_sample_rate(sample_rate)
+        setup_ms.append((time.perf_counter() - started) * 1000)
+        analyzers.append(analyzer)
+    after_setup = rss_mb()
+
+    audio = speech_like(1.0, sample_rate, seed=1)
+    started = time.perf_counter()
+    for analyzer in analyzers:
+        confidences(analyzer, audio)
+    inference_ms = (time.perf_counter() - started) * 1000
+
+    setup_ms.sort()
+    return {
+        "mode": mode,
+        "calls": calls,
+        "startup_ms": round(startup_ms, 1) if startup_ms is not None else None,
+        "setup_ms_p50": round(setup_ms[len(setup_ms) // 2], 3),
+        "setup_ms_max": round(setup_ms[-1], 3),
+        "setup_ms_total": round(sum(setup_ms), 1),
+        "rss_mb_startup": round(after_startup - baseline, 1),
+        "rss_mb_calls": round(after_setup - after_startup, 1),
+        "rss_mb_per_call": round((after_setup - after_startup) / calls, 3),
+        "inference_ms_per_call_second": round(inference_ms / calls, 2),
+    }
+
+
+def isolation_check(sample_rate: int) -> bool:
+    """Two analyzers on one session, interleaved, must match two independent models"""
+    from pipecat.audio.vad.silero import SileroVADAnalyzer
+
+    from app.services.vad_service import VADModelRegistry
+
+    registry = VADModelRegistry(pool_size=1)
+    audio = [speech_like(2.0, sample_rate, seed=s) for s in (1, 2)]
+
+    expected = []
+    for clip in audio:
+        analyzer = SileroVADAnalyzer()
+        analyzer.set_sample_rate(sample_rate)
+        expected.append(confidences(analyzer, clip))
+
+    shared = [registry.create_analyzer(), registry.create_analyzer()]
+    for analyzer in shared:
+        analyzer.set_sample_rate(sample_rate)
+    step = shared[0].num_frames_required() * 2
+    got = [[], []]
+    for i in range(0, len(audio[0]) - step + 1, step):
+        for n in (0, 1):
+            got[n].append(float(shared[n].voice_confidence(audio[n][i:i + step])))
+
+    return all(abs(a - b) < 1e-5 for n in (0, 1) for a, b in zip(expected[n], got[n]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Silero VAD call-setup time and memory")
+    parser.add_argument("--calls", type=int, nargs="+", default=[1, 10, 100], help="Concurrent calls to set up")
+    parser.add_argument("--modes", nargs="+", default=["per_call", "shared"], choices=["per_call", "shared"])
+    parser.add_argument("--sample-rate", type=int, default=16000, choices=[8000, 16000])
+    parser.add_argument("--child", nargs=2, metavar=("MODE", "CALLS"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(child(args.child[0], int(args.child[1]), args.sample_rate)))
+        return
+
+    results = []
+    for calls in args.calls:
+        for mode in args.modes:
+            # A fresh process per run so RSS numbers are not polluted
+            output = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--child", mode, str(calls),
+                 "--sample-rate", str(args.sample_rate)],
+                check=True, capture_output=True, text=True,
+            ).stdout
+            results.append(json.loads(output.strip().splitlines()[-1]))
+
+    print(json.dumps({"results": results, "shared_state_isolated": isolation_check(args.sample_rate)}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
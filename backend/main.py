@@ -2,14 +2,22 @@ from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from contextlib import asynccontextmanager
+import asyncio
 import logging
 import sys
 
 # Import configuration and database
 from app.core.config import settings
+from app.services.dialer_service import dialer_service
+from app.services.vad_service import vad_registry
+from app.services.llm_session_pool import llm_session_pool
+from app.services.twiml_service import twiml_engine
+from app.services.call_status_ingestor import call_status_ingestor
+from app.services.transcript_writer import transcript_writer
+from app.services.lead_import_service import lead_import_workers
 
 # Import API routers
-from app.api import leads, ai, stats, health, websocket, auth, calls, webhooks, groups, group_calls
+from app.api import leads, lead_imports, ai, stats, health, websocket, auth, calls, webhooks, groups, group_calls
 
 # Configure logging
 logging.basicConfig(
@@ -30,10 +38,40 @@ async def lifespan(app: FastAPI):
     logger.info("Starting AI Cold Caller Backend...")
     logger.info("Database migrations should be run manually using: python manage_db.py migrate")
     
+    try:
+        await asyncio.to_thread(twiml_engine.load)
+    except Exception as e:
+        logger.error(f"Failed to load TwiML templates: {str(e)}")
+    twiml_engine.start_watching()
+    
+    if settings.vad_preload_on_startup:
+        try:
+            await asyncio.to_thread(vad_registry.load)
+        except Exception as e:
+            logger.error(f"Failed to preload Silero VAD model: {str(e)}")
+    
+    if settings.dialer_resume_on_startup:
+        try:
+            await dialer_service.resume_active()
+        except Exception as e:
+            logger.error(f"Failed to resume group call dialers: {str(e)}")
+    dialer_service.start_discovery()
+    
+    # Pick up queued or interrupted lead import jobs
+    lead_import_workers.start()
+    
     yield
     
     # Shutdown
     logger.info("Shutting down AI Cold Caller Backend...")
+    # Stop dialing first so no new calls are placed, then write queued status
+    # callbacks (refills are ignored once the dialer is closed)
+    await dialer_service.shutdown()
+    await call_status_ingestor.shutdown()
+    await llm_session_pool.shutdown()
+    await transcript_writer.shutdown()
+    await lead_import_workers.shutdown()
+    await twiml_engine.stop()
 
 # Create FastAPI app
 app = FastAPI(
@@ -70,6 +108,7 @@ async def global_exception_handler(request: Request, exc: Exception):
 app.include_router(auth.router, prefix="/api")
 app.include_router(health.router, prefix="/api")
 app.include_router(leads.router, prefix="/api")
+app.include_router(lead_imports.router, prefix="/api")
 app.include_router(calls.router, prefix="/api")
 app.include_router(groups.router, prefix="/api")
 app.include_router(group_calls.router, prefix="/api")
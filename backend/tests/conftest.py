@@ -0,0 +1,50 @@
+import os
+import tempfile
+
+# Point the app at a throwaway SQLite database before anything imports settings
+_db_dir = tempfile.mkdtemp(prefix="ai_caller_tests_")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_db_dir, 'test.db')}"
+
+import pytest
+
+from app.database.database import Base, SessionLocal, engine
+from app.models.models import Group, GroupCall, Lead, User
+
+
+@pytest.fixture
+def db():
+    """A session on freshly created tables, dropped again after the test"""
+    Base.metadata.create_all(bind=engine)
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture
+def user(db):
+    user = User(username="tester", email="tester@example.com", hashed_password="x")
+    db.add(user)
+    db.commit()
+    return user
+
+
+@pytest.fixture
+def make_group_call(db, user):
+    """Build a running group call over new leads: make_group_call(priorities=[...])"""
+    def make(priorities=(3,), **fields):
+        group = Group(name="Group", user_id=user.id)
+        db.add(group)
+        for index, priority in enumerate(priorities):
+            lead = Lead(name=f"Lead {index}", phone=f"+1415555{index:04d}", user_id=user.id, priority=priority)
+            db.add(lead)
+            group.leads.append(lead)
+        db.commit()
+        group_call = GroupCall(group_id=group.id, user_id=user.id, status="in_progress",
+                               current_lead_index=0, completed_calls=0, **fields)
+        db.add(group_call)
+        db.commit()
+        return group_call
+    return make
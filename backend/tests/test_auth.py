@@ -0,0 +1,23 @@
+import asyncio
+
+import pytest
+from pydantic import ValidationError
+
+from app.api.auth import update_current_user
+from app.core.config import settings
+from app.models.models import User
+from app.schemas.schemas import UserUpdate
+
+
+@pytest.mark.parametrize("limit", [0, 21])
+def test_line_limit_must_be_within_the_dialer_ceiling(limit, monkeypatch):
+    monkeypatch.setattr(settings, "dialer_max_concurrent_calls", 20)
+    with pytest.raises(ValidationError):
+        UserUpdate(max_concurrent_calls=limit)
+
+
+def test_user_sets_their_own_line_limit(db, user):
+    updated = asyncio.run(update_current_user(UserUpdate(max_concurrent_calls=5), db, user))
+    db.expire_all()
+    assert updated.max_concurrent_calls == db.get(User, user.id).max_concurrent_calls == 5
+    assert db.get(User, user.id).email == "tester@example.com"
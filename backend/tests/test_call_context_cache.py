@@ -0,0 +1,28 @@
+import asyncio
+
+from app.models.models import Call, Lead
+from app.services.call_context_cache import CallContextCache, DatabaseContextBackend
+
+
+def test_database_backed_contexts_are_also_kept_in_process(db, user):
+    lead = Lead(name="Ann", phone="+14155550001", user_id=user.id)
+    db.add(lead)
+    db.commit()
+    call = Call(call_sid="CA1", lead_id=lead.id, user_id=user.id, phone_number=lead.phone)
+    db.add(call)
+    db.commit()
+
+    dialing_worker = CallContextCache(DatabaseContextBackend())
+    dialing_worker.remember(call, db)
+    assert dialing_worker.local.get("CA1")["lead_info"]["name"] == "Ann"
+
+    # Another worker reads the context from the database once, then in process
+    stream_worker = CallContextCache(DatabaseContextBackend())
+    assert stream_worker.get("CA1")["call_id"] == call.id
+    stream_worker.backend.get = None
+    assert asyncio.run(stream_worker.get_async("CA1"))["call_id"] == call.id
+    assert (stream_worker.hits, stream_worker.misses) == (2, 0)
+
+    dialing_worker.forget(["CA1"])
+    assert dialing_worker.local.get("CA1") is None
+    assert dialing_worker.backend.get("CA1") is None
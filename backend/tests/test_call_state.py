@@ -0,0 +1,64 @@
+import pytest
+
+from app.services.call_state import NO_SEQUENCE, CallStateTracker, advances, statuses_before
+
+
+@pytest.mark.parametrize("current, new", [
+    (None, "ringing"),
+    ("initiated", "ringing"),
+    ("queued", "in-progress"),
+    ("ringing", "answered"),
+    ("in-progress", "completed"),
+    ("ringing", "no-answer"),
+])
+def test_forward_transitions(current, new):
+    assert advances(current, new)
+
+
+@pytest.mark.parametrize("current, new", [
+    ("ringing", "ringing"),
+    ("in-progress", "ringing"),
+    ("completed", "in-progress"),
+    ("busy", "completed"),  # The first terminal status is final
+    ("completed", "failed"),
+    ("ringing", "unknown-status"),
+])
+def test_backward_or_unknown_transitions(current, new):
+    assert not advances(current, new)
+
+
+def test_statuses_before():
+    assert set(statuses_before("in-progress")) == {"queued", "initiated", "ringing"}
+    assert statuses_before("queued") == []
+
+
+def test_tracker_skips_duplicates():
+    tracker = CallStateTracker(max_entries=10)
+    assert tracker.check(("CA1", "ringing", 1)) is None
+    assert tracker.check(("CA1", "ringing", 1)) == "duplicate"
+    # Another delivery of the same status with its own sequence number is new
+    assert tracker.check(("CA1", "ringing", 2)) is None
+
+
+def test_tracker_skips_events_behind_the_known_status():
+    tracker = CallStateTracker(max_entries=10)
+    tracker.observe("CA1", "in-progress")
+    assert tracker.check(("CA1", "ringing", NO_SEQUENCE)) == "stale"
+    assert tracker.check(("CA1", "completed", NO_SEQUENCE)) is None
+
+
+def test_tracker_forget_lets_a_redelivery_through():
+    tracker = CallStateTracker(max_entries=10)
+    key = ("CA1", "completed", 4)
+    tracker.check(key)
+    tracker.forget(key)
+    assert tracker.check(key) is None
+
+
+def test_tracker_is_bounded():
+    tracker = CallStateTracker(max_entries=2)
+    for sid in ("CA1", "CA2", "CA3"):
+        tracker.check((sid, "ringing", NO_SEQUENCE))
+    # CA1 fell out of the LRU, so it is no longer recognised as a duplicate
+    assert tracker.check(("CA1", "ringing", NO_SEQUENCE)) is None
+    assert tracker.check(("CA3", "ringing", NO_SEQUENCE)) == "duplicate"
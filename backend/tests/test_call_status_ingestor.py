@@ -0,0 +1,111 @@
+import asyncio
+
+import pytest
+
+from app.core.config import settings
+from app.models.models import Call, CallStatusEventEntry
+from app.services.call_status_ingestor import CallStatusIngestor
+
+
+@pytest.fixture
+def call(db, user):
+    call = Call(call_sid="CA1", user_id=user.id, phone_number="+14155550000", status="initiated")
+    db.add(call)
+    db.commit()
+    return call
+
+
+def fail_write(*args):
+    raise RuntimeError("database unavailable")
+
+
+def run(coroutine_function):
+    """Run a test body against a fresh ingestor, shutting its writer down after"""
+    async def main():
+        ingestor = CallStatusIngestor()
+        try:
+            return await coroutine_function(ingestor)
+        finally:
+            await ingestor.shutdown()
+    return asyncio.run(main())
+
+
+def test_events_are_coalesced_to_the_most_advanced(db, call):
+    async def body(ingestor):
+        assert ingestor.submit("CA1", "ringing")
+        assert ingestor.submit("CA1", "completed", duration=42)
+        # Arrived late: still accepted, but merged into the queued completed event
+        assert ingestor.submit("CA1", "in-progress")
+        assert ingestor.stats()["pending"] == 1
+        assert await ingestor.flush() == 1
+        return ingestor.counters
+
+    counters = run(body)
+    assert counters["coalesced"] == 2
+    db.refresh(call)
+    assert (call.status, call.outcome, call.duration) == ("completed", "completed", 42)
+    assert db.query(CallStatusEventEntry).filter(CallStatusEventEntry.call_sid == "CA1").count() == 1
+
+
+def test_duplicate_and_stale_events_are_dropped_on_arrival(db, call):
+    async def body(ingestor):
+        assert ingestor.submit("CA1", "in-progress", sequence_number=2)
+        await ingestor.flush()
+        assert not ingestor.submit("CA1", "in-progress", sequence_number=2)
+        assert not ingestor.submit("CA1", "ringing", sequence_number=1)
+        return ingestor.counters
+
+    counters = run(body)
+    assert (counters["duplicate"], counters["stale"]) == (1, 1)
+    db.refresh(call)
+    assert call.status == "in-progress"
+
+
+def test_unknown_call_is_dropped(db, call):
+    async def body(ingestor):
+        ingestor.submit("CA2", "completed")
+        await ingestor.flush()
+        return ingestor.counters
+
+    assert run(body)["dropped"] == 1
+
+
+def test_failed_write_is_retried_with_backoff(db, call, monkeypatch):
+    monkeypatch.setattr(settings, "call_status_write_backoff_seconds", 60.0)
+
+    async def body(ingestor):
+        write = ingestor._apply
+        monkeypatch.setattr(ingestor, "_apply", fail_write)
+        ingestor.submit("CA1", "completed", duration=5)
+        assert await ingestor.flush() == 0
+        # Kept, but not due again until its backoff has passed
+        assert ingestor.stats()["pending"] == 1
+        assert await ingestor.flush() == 0
+
+        monkeypatch.setattr(ingestor, "_apply", write)
+        ingestor._pending["CA1"].retry_at = 0.0
+        assert await ingestor.flush() == 1
+        return ingestor.counters
+
+    counters = run(body)
+    assert counters["requeued"] == 1
+    assert counters["failed"] == 0
+    db.refresh(call)
+    assert call.status == "completed"
+
+
+def test_event_given_up_on_can_be_redelivered(db, call, monkeypatch):
+    monkeypatch.setattr(settings, "call_status_write_max_attempts", 2)
+    monkeypatch.setattr(settings, "call_status_write_backoff_seconds", 0.0)
+
+    async def body(ingestor):
+        monkeypatch.setattr(ingestor, "_apply", fail_write)
+        ingestor.submit("CA1", "completed", sequence_number=3)
+        await ingestor.flush()
+        await ingestor.flush()
+        assert ingestor.stats()["pending"] == 0
+        assert ingestor.counters["failed"] == 1
+        # No longer remembered as seen, so Twilio's retry of it is accepted
+        return ingestor.submit("CA1", "completed", sequence_number=3)
+
+    assert run(body)
@@ -0,0 +1,187 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.models.models import Call, DialQueueEntry, Lead
+from app.services.dial_queue_service import DialQueueService
+from app.services.lead_service import LeadService
+
+
+@pytest.fixture
+def queue(db):
+    return DialQueueService(db)
+
+
+def dial(db, queue, group_call, status):
+    """Claim the next entry and record a call for it that ended with `status`"""
+    entry = queue.claim_next(group_call.id, "worker-1")
+    call = Call(lead_id=entry.lead_id, user_id=group_call.user_id, phone_number=entry.phone_number,
+                status=status, group_call_id=group_call.id)
+    db.add(call)
+    db.flush()
+    entry.call_id = call.id
+    db.commit()
+    return entry, call
+
+
+def test_enqueue_skips_leads_already_queued(db, queue, make_group_call):
+    group_call = make_group_call(priorities=[3, 3])
+    assert queue.enqueue_group_call(group_call) == 2
+    assert queue.enqueue_group_call(group_call) == 0
+    assert (group_call.total_leads, queue.pending_count(group_call.id)) == (2, 2)
+
+
+def test_lead_added_to_a_running_group_call_is_dialed(db, queue, make_group_call):
+    group_call = make_group_call(priorities=[3, 3])
+    queue.enqueue_group_call(group_call)
+    lead = Lead(name="Late", phone="+14155559999", user_id=group_call.user_id)
+    db.add(lead)
+    group_call.group.leads.append(lead)
+    db.flush()
+    queue.sync_group_membership(group_call.group_id, added_lead_ids=[lead.id])
+    db.commit()
+
+    assert (group_call.last_lead_id, group_call.total_leads, queue.pending_count(group_call.id)) == (lead.id, 3, 3)
+    claimed = []
+    while (entry := queue.claim_next(group_call.id, "worker-1")) is not None:
+        claimed.append(entry.lead_id)
+        db.commit()
+    assert lead.id in claimed
+
+
+def test_claims_by_priority_then_queue_order(db, queue, make_group_call):
+    group_call = make_group_call(priorities=[1, 5, 3, 5])
+    assert queue.enqueue_group_call(group_call) == 4
+
+    claimed = []
+    while (entry := queue.claim_next(group_call.id, "worker-1")) is not None:
+        claimed.append(entry.lead_id)
+        assert (entry.status, entry.attempts, entry.claimed_by) == ("dialed", 1, "worker-1")
+        db.commit()
+
+    lead_ids = sorted(claimed)
+    assert claimed == [lead_ids[1], lead_ids[3], lead_ids[2], lead_ids[0]]
+    assert queue.pending_count(group_call.id) == 0
+
+
+def test_claims_only_open_time_zones(db, queue, make_group_call):
+    group_call = make_group_call(priorities=[3])
+    queue.enqueue_group_call(group_call)
+    assert queue.claim_next(group_call.id, "worker-1", time_zones=["Europe/Paris"]) is None
+    # Parked until its zone opens, but still waiting to be dialed
+    entry = db.query(DialQueueEntry).one()
+    assert entry.status == "parked"
+    assert queue.pending_count(group_call.id) == 1
+    assert queue.claim_next(group_call.id, "worker-1", time_zones=["America/Los_Angeles"]) is entry
+
+
+def test_parked_entries_are_released_when_windows_are_disabled(db, queue, make_group_call):
+    group_call = make_group_call(priorities=[3])
+    queue.enqueue_group_call(group_call)
+    queue.park_closed_zones(group_call.id, [])
+    db.commit()
+    assert queue.claim_next(group_call.id, "worker-1", time_zones=[]) is None
+    assert queue.claim_next(group_call.id, "worker-1") is not None
+
+
+def test_busy_call_is_retried_with_exponential_backoff(db, queue, make_group_call):
+    group_call = make_group_call(priorities=[3], max_attempts=3, retry_backoff_seconds=600)
+    queue.enqueue_group_call(group_call)
+
+    entry, call = dial(db, queue, group_call, "busy")
+    retry_at = queue.schedule_retry(call, group_call)
+    db.commit()
+    delay = (retry_at - datetime.utcnow()).total_seconds()
+    assert entry.status == "scheduled"
+    assert 600 * 0.9 - 5 <= delay <= 600 * 1.1
+
+    # Not due yet: nothing to claim, but it still counts as waiting
+    assert queue.claim_next(group_call.id, "worker-1") is None
+    assert queue.pending_count(group_call.id) == 1
+
+    entry.next_attempt_at = datetime.utcnow() - timedelta(seconds=1)
+    db.commit()
+    entry, call = dial(db, queue, group_call, "no-answer")
+    assert entry.attempts == 2
+    delay = (queue.schedule_retry(call, group_call) - datetime.utcnow()).total_seconds()
+    assert 1200 * 0.9 - 5 <= delay <= 1200 * 1.1
+
+
+def test_no_retry_after_the_last_attempt(db, queue, make_group_call):
+    group_call = make_group_call(priorities=[3], max_attempts=1)
+    queue.enqueue_group_call(group_call)
+    entry, call = dial(db, queue, group_call, "busy")
+    assert queue.schedule_retry(call, group_call) is None
+    assert entry.status == "dialed"
+
+
+def test_only_busy_no_answer_or_transient_errors_are_retried(db, queue, make_group_call):
+    group_call = make_group_call(priorities=[3, 3], max_attempts=3)
+    queue.enqueue_group_call(group_call)
+
+    _, completed = dial(db, queue, group_call, "completed")
+    assert queue.schedule_retry(completed, group_call) is None
+
+    entry, failed = dial(db, queue, group_call, "failed")
+    assert queue.schedule_retry(failed, group_call) is None
+    assert queue.schedule_retry(failed, group_call, transient_error=True) is not None
+    assert entry.status == "scheduled"
+
+
+def test_finished_count_skips_entries_waiting_for_a_retry(db, queue, make_group_call, monkeypatch):
+    monkeypatch.setattr(settings, "retry_max_attempts", 3)
+    group_call = make_group_call(priorities=[3, 3, 3])
+    queue.enqueue_group_call(group_call)
+
+    dial(db, queue, group_call, "completed")
+    _, busy = dial(db, queue, group_call, "busy")
+    queue.schedule_retry(busy, group_call)
+    dial(db, queue, group_call, "in-progress")
+    db.commit()
+
+    assert queue.finished_count(group_call.id) == 1
+
+
+def test_stale_claim_without_a_call_sid_goes_back_to_pending(db, queue, make_group_call):
+    group_call = make_group_call(priorities=[3, 3])
+    queue.enqueue_group_call(group_call)
+    stale, orphan = dial(db, queue, group_call, "initiated")
+    placed, live = dial(db, queue, group_call, "initiated")
+    live.call_sid = "CA1"
+    db.commit()
+
+    later = datetime.utcnow() + timedelta(seconds=settings.dial_queue_claim_timeout_seconds + 1)
+    assert queue.reclaim_stale_claims(now=later) == 1
+    db.commit()
+    db.expire_all()
+    assert (stale.status, stale.attempts, stale.call_id, stale.claimed_by) == ("pending", 0, None, None)
+    assert orphan.status == "failed"
+    assert (placed.status, live.status) == ("dialed", "initiated")
+
+
+def test_deleting_a_queued_lead_drops_its_entries(db, queue, make_group_call):
+    db.execute(text("PRAGMA foreign_keys = ON"))
+    group_call = make_group_call(priorities=[3, 3])
+    queue.enqueue_group_call(group_call)
+    lead_id = min(lead.id for lead in group_call.group.leads)
+
+    assert LeadService(db).delete_lead(lead_id, group_call.user_id)
+    assert db.query(DialQueueEntry).filter(DialQueueEntry.lead_id == lead_id).count() == 0
+    assert queue.pending_count(group_call.id) == 1
+
+
+def test_group_call_started_before_the_queue_skips_dialed_leads(db, queue, make_group_call):
+    group_call = make_group_call(priorities=[3, 3, 3])
+    first_lead_id = min(lead.id for lead in group_call.group.leads)
+    call = Call(lead_id=first_lead_id, user_id=group_call.user_id, phone_number="+14155550000",
+                status="completed", group_call_id=group_call.id)
+    db.add(call)
+    group_call.current_lead_index = 1
+    db.commit()
+
+    assert queue.enqueue_group_call(group_call) == 2
+    entry = db.query(DialQueueEntry).filter(DialQueueEntry.lead_id == first_lead_id).one()
+    assert (entry.status, entry.call_id) == ("dialed", call.id)
+    assert (group_call.total_leads, queue.pending_count(group_call.id), queue.finished_count(group_call.id)) == (3, 2, 1)
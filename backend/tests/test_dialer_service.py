@@ -0,0 +1,143 @@
+import asyncio
+import threading
+
+import pytest
+
+from app.core.config import settings
+from app.database.database import SessionLocal
+from app.models.models import DialQueueEntry, GroupCall
+from app.services import dialer_service as dialer_module
+from app.services.dial_queue_service import DialQueueService
+from app.services.dialer_service import DialerService
+
+
+class FakeTwilioService:
+    def __init__(self, error=None):
+        self.error = error
+        self.delay = 0
+        self.dialed = []
+
+    async def initiate_call_async(self, phone_number, lead_id):
+        self.dialed.append(lead_id)
+        await asyncio.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return f"CA{lead_id}"
+
+    async def aclose(self):
+        pass
+
+
+@pytest.fixture
+def dialer(monkeypatch):
+    monkeypatch.setattr(settings, "calling_window_enabled", False)
+    dialer = DialerService()
+    dialer._twilio_service = FakeTwilioService()
+    return dialer
+
+
+def test_failed_bookkeeping_leaves_the_call_live(db, dialer, make_group_call, monkeypatch):
+    group_call = make_group_call(priorities=[3])
+    DialQueueService(db).enqueue_group_call(group_call)
+
+    async def fail_remember(call, db):
+        raise RuntimeError("cache unavailable")
+    monkeypatch.setattr(dialer_module.call_context_cache, "remember_async", fail_remember)
+
+    call = asyncio.run(dialer.dial_next_lead(group_call, db))
+    db.expire_all()
+    entry = db.query(DialQueueEntry).one()
+    assert (call.status, call.call_sid) == ("initiated", f"CA{entry.lead_id}")
+    assert entry.status == "dialed"
+    assert db.get(GroupCall, group_call.id).completed_calls == 0
+
+
+def test_failed_dial_is_counted_as_finished(db, dialer, make_group_call):
+    group_call = make_group_call(priorities=[3])
+    DialQueueService(db).enqueue_group_call(group_call)
+    dialer._twilio_service.error = ValueError("Invalid 'To' phone number")
+
+    call = asyncio.run(dialer.dial_next_lead(group_call, db))
+    db.expire_all()
+    assert call.status == "failed"
+    assert db.query(DialQueueEntry).one().status == "failed"
+    assert db.get(GroupCall, group_call.id).completed_calls == 1
+
+
+def test_slow_dial_is_not_reclaimed_as_stale(db, dialer, make_group_call, monkeypatch):
+    monkeypatch.setattr(settings, "dial_queue_claim_timeout_seconds", 0.3)
+    group_call = make_group_call(priorities=[3])
+    DialQueueService(db).enqueue_group_call(group_call)
+    # Stands in for a dial held up by the rate limiter well past the claim timeout
+    dialer._twilio_service.delay = 1.0
+
+    def reclaim():
+        session = SessionLocal()
+        try:
+            reclaimed = DialQueueService(session).reclaim_stale_claims()
+            session.commit()
+            return reclaimed
+        finally:
+            session.close()
+
+    async def main():
+        dialing = asyncio.create_task(dialer.dial_next_lead(group_call, db))
+        await asyncio.sleep(0.7)
+        return await asyncio.to_thread(reclaim), await dialing
+
+    reclaimed, call = asyncio.run(main())
+    db.expire_all()
+    entry = db.query(DialQueueEntry).one()
+    assert reclaimed == 0
+    assert (call.status, call.call_sid) == ("initiated", f"CA{entry.lead_id}")
+    assert entry.status == "dialed"
+
+
+def test_twilio_client_is_built_once_off_the_event_loop(db, dialer, make_group_call, monkeypatch):
+    group_call = make_group_call(priorities=[3, 3])
+    DialQueueService(db).enqueue_group_call(group_call)
+    built_on = []
+
+    def build():
+        # The real constructor makes a blocking credential check
+        built_on.append(threading.current_thread())
+        return FakeTwilioService()
+    monkeypatch.setattr(dialer_module, "TwilioService", build)
+    dialer._twilio_service = None
+
+    async def main():
+        return await asyncio.gather(*(dialer.dial_next_lead(group_call, db) for _ in range(2)))
+
+    calls = asyncio.run(main())
+    assert [call.status for call in calls] == ["initiated", "initiated"]
+    assert len(built_on) == 1 and built_on[0] is not threading.main_thread()
+    assert len(dialer._twilio_service.dialed) == 2
+
+
+def test_shutdown_cancels_refills_and_ignores_later_ones(dialer, monkeypatch):
+    async def slow_fill(group_call_id):
+        await asyncio.sleep(60)
+    monkeypatch.setattr(dialer, "fill_slots", slow_fill)
+
+    async def main():
+        dialer.on_call_finished(1)
+        task, = dialer._one_shot_tasks
+        await asyncio.sleep(0)
+        await dialer.shutdown()
+        assert task.cancelled()
+
+        dialer.on_call_finished(1)
+        dialer.start(1)
+        assert not dialer._one_shot_tasks and not dialer._tasks
+    asyncio.run(main())
+
+
+def test_manual_dial_respects_the_line_limit(db, dialer, make_group_call):
+    group_call = make_group_call(priorities=[3, 3], max_concurrent_calls=1)
+    group_call.status = "paused"
+    DialQueueService(db).enqueue_group_call(group_call)
+
+    assert asyncio.run(dialer.dial_manually(group_call.id, db)) is not None
+    assert asyncio.run(dialer.dial_manually(group_call.id, db)) is None
+    assert len(dialer._twilio_service.dialed) == 1
+    assert DialQueueService(db).pending_count(group_call.id) == 1
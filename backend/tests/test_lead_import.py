@@ -0,0 +1,278 @@
+import asyncio
+import io
+import os
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+from fastapi import UploadFile
+
+from app.api.leads import upload_leads_csv
+from app.core.config import settings
+from app.database.database import SessionLocal
+from app.models.models import Lead, LeadImportJob, User
+from app.services.lead_import_service import LeadImportJobService, LeadImportWorkerPool, lead_import_workers
+from app.services.lead_service import ImportedPhones, LeadService
+
+CSV = """name,phone,email,priority
+Ann,415-555-0001,ann@example.com,5
+,415-555-0002,,
+Bob,415-555-0009,,
+Cat,415-555-0003,,high
+Eve,415-555-0004,,2
+"""
+
+# Word for word what the original row-by-row import reported for CSV, rows numbered from 1
+EXPECTED_ERRORS = [
+    "Row 2: Missing required fields (name or phone)",
+    "Row 3: Phone number 415-555-0009 already exists for this user",
+    "Row 4: invalid literal for int() with base 10: 'high'",
+]
+
+
+@pytest.fixture
+def existing_lead(db, user):
+    lead = Lead(name="Existing", phone="415-555-0009", user_id=user.id)
+    db.add(lead)
+    db.commit()
+    return lead
+
+
+def import_csv(db, user, content):
+    return LeadService(db).import_leads_from_stream(io.BytesIO(content.encode()), user.id)
+
+
+def test_import_reports_row_errors(db, user, existing_lead):
+    result = import_csv(db, user, CSV)
+    assert result == {"imported_count": 2, "errors": EXPECTED_ERRORS}
+
+    leads = {lead.phone: lead for lead in db.query(Lead).filter(Lead.user_id == user.id)}
+    assert (leads["415-555-0001"].name, leads["415-555-0001"].priority) == ("Ann", 5)
+    assert (leads["415-555-0004"].status, leads["415-555-0004"].email) == ("pending", None)
+
+
+@pytest.mark.parametrize("chunk_rows", [1, 2, 4])
+def test_errors_do_not_depend_on_chunk_size(db, user, existing_lead, monkeypatch, chunk_rows):
+    monkeypatch.setattr(settings, "lead_import_chunk_rows", chunk_rows)
+    assert import_csv(db, user, CSV) == {"imported_count": 2, "errors": EXPECTED_ERRORS}
+
+
+def test_error_list_is_capped(db, user, existing_lead, monkeypatch):
+    monkeypatch.setattr(settings, "lead_import_max_errors", 2)
+    result = import_csv(db, user, CSV)
+    assert result["errors"] == EXPECTED_ERRORS[:2] + ["... and 1 more rows with errors"]
+
+
+@pytest.mark.parametrize("chunk_rows", [1, 10])
+def test_phone_repeated_in_the_file(db, user, monkeypatch, chunk_rows):
+    monkeypatch.setattr(settings, "lead_import_chunk_rows", chunk_rows)
+    result = import_csv(db, user, "name,phone\nAnn,415-555-0001\nBob,415-555-0002\nDan,415-555-0001\n")
+    assert result == {
+        "imported_count": 2,
+        "errors": ["Row 3: Phone number 415-555-0001 appears more than once in this file"],
+    }
+
+
+def test_lead_created_during_the_import_already_exists(db, user):
+    service = LeadService(db)
+    imported = ImportedPhones(service.highest_lead_id())
+    chunks = service.read_import_chunks(io.BytesIO(b"name,phone\nAnn,415-555-0001\nBob,415-555-0002\n"))
+    # Added through the API after the import started, so above its watermark
+    db.add(Lead(name="Bob", phone="415-555-0002", user_id=user.id))
+    db.commit()
+
+    assert service.import_chunk(next(iter(chunks)), user.id, 1, imported) == (
+        1, ["Row 2: Phone number 415-555-0002 already exists for this user"]
+    )
+
+
+def test_phone_keeps_its_exact_form(db, user):
+    import_csv(db, user, "name,phone\nAnn,0044207946000\nBob,14155550001\n")
+    assert sorted(phone for phone, in db.query(Lead.phone)) == ["0044207946000", "14155550001"]
+
+
+def test_upload_is_queued_as_an_import_job(db, user, monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "lead_import_upload_dir", str(tmp_path))
+    notified = []
+    monkeypatch.setattr(lead_import_workers, "notify", lambda: notified.append(True))
+
+    upload = UploadFile(file=io.BytesIO(CSV.encode()), filename="leads.csv")
+    job = asyncio.run(upload_leads_csv(upload, db, user))
+
+    stored = db.get(LeadImportJob, job["id"])
+    assert (job["status"], job["filename"], notified) == ("queued", "leads.csv", [True])
+    assert open(stored.file_path).read() == CSV
+    assert db.query(Lead).count() == 0
+
+
+LEAD_FIELDS = ['name', 'phone', 'email', 'company', 'title', 'address', 'notes', 'priority', 'status']
+
+
+def write_table(table, file_format):
+    file = io.BytesIO()
+    if file_format == 'parquet':
+        pq.write_table(table, file)
+    else:
+        with pa.ipc.new_file(file, table.schema) as writer:
+            writer.write_table(table)
+    file.seek(0)
+    return file
+
+
+@pytest.mark.parametrize("file_format", ["parquet", "arrow"])
+def test_exported_leads_import_back_field_for_field(db, user, monkeypatch, file_format):
+    monkeypatch.setattr(settings, "lead_import_batch_size", 2)
+    monkeypatch.setattr(settings, "lead_import_chunk_rows", 2)
+    db.add_all([
+        Lead(name="Ann", phone="+14155550001", email="ann@example.com", company="Acme", title="CTO",
+             address="1 Main St", notes="Call after 5", priority=5, status="contacted", user_id=user.id),
+        Lead(name="Bob", phone="004420794600", priority=1, user_id=user.id),
+        Lead(name="Cat", phone="4155550003", user_id=user.id),
+    ])
+    other = User(username="other", email="other@example.com", hashed_password="x")
+    db.add(other)
+    db.commit()
+
+    service = LeadService(db)
+    exported = io.BytesIO()
+    assert service.export_leads(user.id, exported, file_format) == 3
+    exported.seek(0)
+    assert service.import_leads_from_stream(exported, other.id, file_format) == {"imported_count": 3, "errors": []}
+
+    def fields(user_id):
+        leads = db.query(Lead).filter(Lead.user_id == user_id).order_by(Lead.id)
+        return [[getattr(lead, name) for name in LEAD_FIELDS] for lead in leads]
+    assert fields(other.id) == fields(user.id)
+
+    # Importing the same file again finds every lead already there
+    exported.seek(0)
+    assert service.import_leads_from_stream(exported, other.id, file_format) == {"imported_count": 0, "errors": [
+        "Row 1: Phone number +14155550001 already exists for this user",
+        "Row 2: Phone number 004420794600 already exists for this user",
+        "Row 3: Phone number 4155550003 already exists for this user",
+    ]}
+
+
+@pytest.mark.parametrize("file_format", ["parquet", "arrow"])
+def test_columns_are_mapped_by_name_and_numbers_read_as_text(db, user, monkeypatch, file_format):
+    monkeypatch.setattr(settings, "lead_import_chunk_rows", 1)
+    table = pa.table({
+        'source': ['web', 'fair', 'web'],
+        'phone': [14155550001.0, 14155550002.0, 14155550001.0],
+        'priority': [2, 4, 3],
+        'name': ['Ann', 'Bob', 'Dan'],
+    })
+    result = LeadService(db).import_leads_from_stream(write_table(table, file_format), user.id, file_format)
+    assert result == {
+        "imported_count": 2,
+        "errors": ["Row 3: Phone number 14155550001 appears more than once in this file"],
+    }
+    leads = db.query(Lead).order_by(Lead.id).all()
+    assert [(lead.name, lead.phone, lead.priority) for lead in leads] == [
+        ("Ann", "14155550001", 2), ("Bob", "14155550002", 4)
+    ]
+
+
+SIX_LEADS = "name,phone\n" + "".join(f"Lead {index},415-555-010{index}\n" for index in range(6))
+
+
+@pytest.fixture
+def queued_job(db, user, monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "lead_import_upload_dir", str(tmp_path))
+    monkeypatch.setattr(settings, "lead_import_chunk_rows", 2)
+    return LeadImportJobService(db).create_job(io.BytesIO(SIX_LEADS.encode()), "leads.csv", user.id)
+
+
+def before_chunk(monkeypatch, number, hook):
+    """Run `hook` once, just before the worker imports chunk `number` (from 1)"""
+    import_chunk = LeadService.import_chunk
+    calls = []
+
+    def wrapped(self, *args):
+        calls.append(True)
+        if len(calls) == number:
+            hook()
+        return import_chunk(self, *args)
+    monkeypatch.setattr(LeadService, "import_chunk", wrapped)
+
+
+def test_worker_imports_a_claimed_job(db, queued_job):
+    pool = LeadImportWorkerPool()
+    assert pool._claim("host:1:0") == queued_job.id
+    pool._process(queued_job.id, "host:1:0")
+
+    db.refresh(queued_job)
+    assert (queued_job.status, queued_job.rows_processed, queued_job.rows_imported) == ("completed", 6, 6)
+    assert (queued_job.claimed_by, pool.running_jobs) == (None, set())
+    assert db.query(Lead).count() == 6
+    assert not os.path.exists(queued_job.file_path)
+
+
+def test_other_workers_of_a_process_cannot_write_to_a_claimed_job(db, queued_job):
+    pool = LeadImportWorkerPool()
+    pool._claim("host:1:0")
+    pool._process(queued_job.id, "host:1:1")
+
+    db.refresh(queued_job)
+    assert (queued_job.status, queued_job.claimed_by, queued_job.rows_processed) == ("running", "host:1:0", 0)
+    assert db.query(Lead).count() == 0
+
+
+def test_canceled_job_stops_at_its_next_chunk_and_resumes_from_it(db, user, queued_job, monkeypatch):
+    def cancel():
+        session = SessionLocal()
+        try:
+            LeadImportJobService(session).cancel_job(queued_job.id, user.id)
+        finally:
+            session.close()
+    before_chunk(monkeypatch, 2, cancel)
+
+    pool = LeadImportWorkerPool()
+    pool._claim("host:1:0")
+    pool._process(queued_job.id, "host:1:0")
+    db.refresh(queued_job)
+    assert (queued_job.status, queued_job.rows_processed, db.query(Lead).count()) == ("canceled", 2, 2)
+
+    LeadImportJobService(db).resume_job(queued_job.id, user.id)
+    pool._claim("host:2:0")
+    pool._process(queued_job.id, "host:2:0")
+    db.refresh(queued_job)
+    assert (queued_job.status, queued_job.rows_processed, queued_job.rows_imported) == ("completed", 6, 6)
+    assert (queued_job.error_count, db.query(Lead).count()) == (0, 6)
+
+
+def test_released_job_is_finished_by_another_worker(db, queued_job, monkeypatch):
+    stopping = LeadImportWorkerPool()
+    before_chunk(monkeypatch, 2, stopping._stopping.set)
+    stopping._claim("host:1:0")
+    stopping._process(queued_job.id, "host:1:0")
+    db.refresh(queued_job)
+    # Chunk 2 was already under way when the pool began stopping
+    assert (queued_job.status, queued_job.claimed_by, queued_job.rows_processed) == ("queued", None, 4)
+    assert stopping.counters["released"] == 1
+
+    monkeypatch.setattr(settings, "lead_import_chunk_rows", 3)
+    pool = LeadImportWorkerPool()
+    assert pool._claim("host:2:0") == queued_job.id
+    pool._process(queued_job.id, "host:2:0")
+    db.refresh(queued_job)
+    assert (queued_job.status, queued_job.rows_imported, queued_job.error_count) == ("completed", 6, 0)
+    assert db.query(Lead).count() == 6
+
+
+def test_heartbeat_keeps_a_slow_job_from_being_taken_over(db, queued_job, monkeypatch):
+    monkeypatch.setattr(settings, "lead_import_stale_seconds", 0.3)
+    pool = LeadImportWorkerPool()
+    pool._claim("host:1:0")
+
+    async def main():
+        heartbeat = asyncio.create_task(pool._heartbeat(queued_job.id, "host:1:0"))
+        # Nothing is imported meanwhile, as during one slow chunk
+        await asyncio.sleep(0.5)
+        claimed = await asyncio.to_thread(LeadImportWorkerPool()._claim, "host:2:0")
+        heartbeat.cancel()
+        return claimed
+
+    assert asyncio.run(main()) is None
+    db.refresh(queued_job)
+    assert (queued_job.status, queued_job.claimed_by) == ("running", "host:1:0")
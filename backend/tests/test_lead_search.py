@@ -0,0 +1,76 @@
+import pytest
+
+from app.models.models import Lead
+from app.services.lead_search import BasicLeadSearch, LeadSearch, phone_digits
+
+
+@pytest.fixture
+def leads(db, user):
+    rows = [
+        ("Ann Archer", "+1 (415) 555-0101", "Acme Corp", "ann@acme.com"),
+        ("Bob Baker", "4155550202", "Globex", "bob@globex.com"),
+        ("Cat Cole", "212-415-5550", "Acme Labs", None),
+        ("Dan 100% Dean", "+44 20 7946 0958", None, "dan@example.co.uk"),
+    ]
+    for name, phone, company, email in rows:
+        db.add(Lead(name=name, phone=phone, company=company, email=email, user_id=user.id))
+    db.commit()
+    return rows
+
+
+def search(db, user, text):
+    query = db.query(Lead).filter(Lead.user_id == user.id)
+    return [lead.name for lead in LeadSearch(BasicLeadSearch()).apply(query, text).all()]
+
+
+@pytest.mark.parametrize("text, digits", [
+    ("(415) 555-01", "41555501"),
+    ("+1 415", "1415"),
+    ("415", "415"),
+    ("41", None),
+    ("ann", None),
+    ("415 ann", None),
+])
+def test_phone_digits(text, digits):
+    assert phone_digits(text) == digits
+
+
+def test_phone_matches_anywhere_with_prefixes_first(db, user, leads):
+    # Prefix hits (with or without the +1) come before numbers merely containing the digits
+    assert search(db, user, "415") == ["Ann Archer", "Bob Baker", "Cat Cole"]
+
+
+def test_phone_with_country_code_finds_numbers_stored_without_it(db, user, leads):
+    assert search(db, user, "+1 415-555-0202") == ["Bob Baker"]
+    assert search(db, user, "555 0101") == ["Ann Archer"]
+
+
+def test_text_matches_every_word_in_any_field(db, user, leads):
+    assert search(db, user, "acme") == ["Ann Archer", "Cat Cole"]
+    assert search(db, user, "ACME cole") == ["Cat Cole"]
+    assert search(db, user, "globex.com") == ["Bob Baker"]
+
+
+def test_searches_with_digits_also_match_text(db, user, leads):
+    db.add(Lead(name="Jo Doe", phone="+1 212 555 0303", company="Route66 Diner", email="jdoe123@mail.com",
+                user_id=user.id))
+    db.add(Lead(name="Kim Kerr", phone="+1 646 555 0505", company="Studio 415", user_id=user.id))
+    db.commit()
+    assert search(db, user, "route66") == ["Jo Doe"]
+    assert search(db, user, "jdoe123@") == ["Jo Doe"]
+    assert search(db, user, "123") == ["Jo Doe"]
+    # Phone matches first, then leads with the digits in their text
+    assert search(db, user, "415") == ["Ann Archer", "Bob Baker", "Cat Cole", "Kim Kerr"]
+
+
+def test_like_wildcards_are_literal(db, user, leads):
+    assert search(db, user, "100%") == ["Dan 100% Dean"]
+    assert search(db, user, "a_c") == []
+
+
+def test_blank_search_leaves_the_query_alone(db, user, leads):
+    assert len(search(db, user, "   ")) == len(leads)
+
+
+def test_sqlite_uses_the_basic_backend():
+    assert isinstance(LeadSearch().backend, BasicLeadSearch)
@@ -0,0 +1,29 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app.core.config import settings
+from app.services.pacing_service import PacingSimulator
+
+HISTORY = [SimpleNamespace(status="completed", duration=30), SimpleNamespace(status="no-answer", duration=0)] * 20
+
+
+@pytest.mark.parametrize("mode", ["fixed", "predictive"])
+def test_replays_every_call(mode):
+    result = PacingSimulator(HISTORY, capacity=2).run(mode=mode)
+    assert (result["dialed"], result["answered"]) == (40, 20)
+
+
+def test_rejects_zero_capacity():
+    with pytest.raises(ValueError):
+        PacingSimulator(HISTORY, capacity=0)
+
+
+def test_rejects_zero_fixed_lines():
+    with pytest.raises(ValueError):
+        PacingSimulator(HISTORY, capacity=2).run(mode="fixed", fixed_lines=0)
+
+
+def test_stops_when_the_policy_never_dials(monkeypatch):
+    monkeypatch.setattr(settings, "pacing_max_dial_ratio", 0)
+    assert PacingSimulator(HISTORY, capacity=2).run(mode="predictive")["dialed"] == 0
@@ -0,0 +1,111 @@
+import asyncio
+
+import pytest
+
+from app.core.config import settings
+from app.services import rate_limiter
+from app.services.rate_limiter import DatabaseBucketBackend, DialRateLimiter, LocalBucketBackend, RateLimitTimeout
+
+
+class FakeClock:
+    """Stands in for the time module; sleeping only moves the clock forward"""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.slept = []
+        self.on_sleep = None
+
+    def time(self):
+        return self.now
+
+    monotonic = time
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+        if self.on_sleep:
+            self.on_sleep()
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limiter, "time", clock)
+
+    async def sleep(seconds):
+        clock.sleep(seconds)
+    monkeypatch.setattr(rate_limiter.asyncio, "sleep", sleep)
+    monkeypatch.setattr(settings, "twilio_account_cps", 1.0)
+    monkeypatch.setattr(settings, "twilio_account_burst", 1)
+    monkeypatch.setattr(settings, "twilio_number_cps", 2.0)
+    monkeypatch.setattr(settings, "twilio_number_burst", 1)
+    return clock
+
+
+def test_bucket_refills_at_its_rate(clock):
+    bucket = LocalBucketBackend()
+    specs = [("number:+14155550000", 2.0, 1)]
+    assert bucket.try_consume(specs) == 0
+    assert bucket.try_consume(specs) == pytest.approx(0.5)
+    clock.now += 0.25
+    assert bucket.try_consume(specs) == pytest.approx(0.25)
+    clock.now += 0.25
+    assert bucket.try_consume(specs) == 0
+
+
+def test_burst_is_spent_at_once_and_refills_only_up_to_its_size(clock):
+    bucket = LocalBucketBackend()
+    specs = [("account:AC1", 1.0, 3)]
+    assert [bucket.try_consume(specs) for _ in range(4)] == [0, 0, 0, pytest.approx(1.0)]
+    clock.now += 60
+    assert [bucket.try_consume(specs) for _ in range(4)] == [0, 0, 0, pytest.approx(1.0)]
+
+
+def test_slowest_bucket_decides_the_wait(clock):
+    bucket = LocalBucketBackend()
+    specs = [("account:AC1", 1.0, 1), ("number:+14155550000", 4.0, 1)]
+    assert bucket.try_consume(specs) == 0
+    assert bucket.try_consume(specs) == pytest.approx(1.0)
+
+
+def test_dials_over_the_limit_wait_their_turn(clock):
+    limiter = DialRateLimiter(LocalBucketBackend())
+
+    async def main():
+        return [await limiter.acquire("AC1", "+14155550000") for _ in range(3)]
+
+    assert asyncio.run(main()) == [0, pytest.approx(1.0), pytest.approx(1.0)]
+    assert limiter.acquire_blocking("AC1", "+14155550000") == pytest.approx(1.0)
+    metrics = limiter.get_metrics()
+    assert (metrics["acquired_total"], metrics["delayed_total"], metrics["waiting"]) == (4, 3, 0)
+    assert metrics["wait_seconds_total"] == pytest.approx(3.0)
+
+
+def test_dial_gives_up_after_the_max_wait(clock, monkeypatch):
+    monkeypatch.setattr(settings, "dial_rate_limit_max_wait_seconds", 2.5)
+    limiter = DialRateLimiter(LocalBucketBackend())
+    specs = limiter.bucket_specs("AC1", "+14155550000")
+    # Another dialer takes every token that frees up while this one sleeps
+    clock.on_sleep = lambda: limiter.backend.try_consume(specs)
+
+    async def main():
+        await limiter.acquire("AC1", "+14155550000")
+        await limiter.acquire("AC1", "+14155550000")
+
+    with pytest.raises(RateLimitTimeout):
+        asyncio.run(main())
+    assert clock.slept == [pytest.approx(1.0)] * 3
+    assert (limiter.get_metrics()["timeouts_total"], limiter.get_metrics()["waiting"]) == (1, 0)
+
+
+def test_database_buckets_are_shared_between_processes(db, clock):
+    first, second = DatabaseBucketBackend(), DatabaseBucketBackend()
+    specs = DialRateLimiter(first).bucket_specs("AC1", "+14155550000")
+
+    assert first.try_consume(specs) == 0
+    assert second.try_consume(specs) == pytest.approx(1.0)
+    clock.now += 0.5
+    assert first.snapshot() == {"account:AC1": 0.5, "number:+14155550000": 1.0}
+    clock.now += 0.5
+    assert second.try_consume(specs) == 0
+    assert first.try_consume(specs) == pytest.approx(1.0)
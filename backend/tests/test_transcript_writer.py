@@ -0,0 +1,93 @@
+import asyncio
+
+import pytest
+
+from app.core.config import settings
+from app.models.models import Call, ConversationMessage
+from app.services.transcript_writer import TranscriptWriter
+
+
+@pytest.fixture
+def calls(db, user):
+    calls = [Call(call_sid=f"CA{index}", user_id=user.id, phone_number="+14155550000") for index in range(2)]
+    db.add_all(calls)
+    db.commit()
+    return [call.id for call in calls]
+
+
+def run(coroutine_function):
+    """Run a test body against a fresh writer, shutting it down after"""
+    async def main():
+        writer = TranscriptWriter()
+        try:
+            return await coroutine_function(writer)
+        finally:
+            await writer.shutdown()
+    return asyncio.run(main())
+
+
+def contents(db, call_id):
+    db.expire_all()
+    return [message.content for message in db.query(ConversationMessage).filter(
+        ConversationMessage.call_id == call_id
+    ).order_by(ConversationMessage.id)]
+
+
+def test_lines_are_written_in_one_batch_once_enough_are_waiting(db, calls, monkeypatch):
+    monkeypatch.setattr(settings, "transcript_flush_interval_seconds", 60)
+    monkeypatch.setattr(settings, "transcript_flush_batch_size", 3)
+
+    async def body(writer):
+        writer.add(calls[0], "assistant", "Hello")
+        writer.add(calls[1], "assistant", "Hi")
+        await asyncio.sleep(0.05)
+        assert writer.stats()["written"] == 0
+
+        writer.add(calls[0], "user", "Who is this?")
+        for _ in range(50):
+            if writer.stats()["written"]:
+                break
+            await asyncio.sleep(0.01)
+        assert (writer.stats()["written"], writer.stats()["batches"], writer.stats()["pending"]) == (3, 1, 0)
+    run(body)
+    assert contents(db, calls[0]) == ["Hello", "Who is this?"]
+    assert contents(db, calls[1]) == ["Hi"]
+
+
+def test_ending_a_call_flushes_only_that_call(db, calls, monkeypatch):
+    monkeypatch.setattr(settings, "transcript_flush_interval_seconds", 60)
+
+    async def body(writer):
+        writer.add(calls[0], "assistant", "Goodbye")
+        writer.add(calls[1], "assistant", "Hi")
+        await writer.close_call(calls[0])
+        assert contents(db, calls[0]) == ["Goodbye"]
+        assert contents(db, calls[1]) == []
+        assert writer.stats()["pending"] == 1
+    run(body)
+    assert contents(db, calls[1]) == ["Hi"]
+
+
+def test_a_bad_line_only_holds_back_its_own_call(db, calls, monkeypatch):
+    monkeypatch.setattr(settings, "transcript_flush_interval_seconds", 60)
+    monkeypatch.setattr(settings, "transcript_write_max_attempts", 2)
+
+    async def body(writer):
+        writer.add(calls[0], "assistant", "Hello")
+        writer.add(calls[0], "user", None)
+        writer.add(calls[1], "assistant", "Hi")
+        assert await writer.flush() == 1
+        assert contents(db, calls[1]) == ["Hi"]
+
+        # Retried ahead of lines that arrived since
+        writer.add(calls[0], "assistant", "Are you there?")
+        assert [row["content"] for row in writer._buffers[calls[0]]] == ["Hello", None, "Are you there?"]
+
+        # Given up on after the last attempt; the call's later lines still go through
+        assert await writer.flush() == 0
+        writer.add(calls[0], "assistant", "Goodbye")
+        assert await writer.flush() == 1
+        stats = writer.stats()
+        assert (stats["failed"], stats["dropped"], stats["pending"]) == (2, 3, 0)
+    run(body)
+    assert contents(db, calls[0]) == ["Goodbye"]
@@ -0,0 +1,29 @@
+import asyncio
+
+import httpx
+import pytest
+from twilio.base.exceptions import TwilioRestException
+
+from app.services.rate_limiter import RateLimitTimeout
+from app.services.twilio_service import is_transient_error
+
+
+@pytest.mark.parametrize("error", [
+    TwilioRestException(429, "/Calls"),
+    TwilioRestException(503, "/Calls"),
+    httpx.ConnectTimeout("timed out"),
+    httpx.ConnectError("connection refused"),
+    asyncio.TimeoutError(),
+    RateLimitTimeout("waited too long for a dial token"),
+])
+def test_transient_errors(error):
+    assert is_transient_error(error)
+
+
+@pytest.mark.parametrize("error", [
+    TwilioRestException(400, "/Calls", "Invalid 'To' phone number"),
+    TwilioRestException(401, "/Calls"),
+    ValueError("Missing Twilio credentials"),
+])
+def test_permanent_errors(error):
+    assert not is_transient_error(error)
@@ -0,0 +1,28 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("pipecat.audio.vad.silero")
+
+from pipecat.audio.vad.silero import SileroVADAnalyzer
+
+from app.services.vad_service import VADModelRegistry
+
+
+@pytest.mark.parametrize("sample_rate", [8000, 16000])
+def test_shared_analyzer_matches_pipecats(sample_rate, monkeypatch):
+    # Freeze the clock so both analyzers reset their state at the same frames
+    monkeypatch.setattr("time.time", lambda: 1000.0)
+    t = np.arange(sample_rate * 2) / sample_rate
+    tone = np.sin(2 * np.pi * 220 * t) * (t % 1 < 0.5) * 8000
+    audio = (tone + np.random.default_rng(1).normal(0, 300, t.size)).astype(np.int16)
+
+    reference = SileroVADAnalyzer()
+    shared = VADModelRegistry(pool_size=1).create_analyzer()
+    for analyzer in (reference, shared):
+        analyzer.set_sample_rate(sample_rate)
+
+    frames = shared.num_frames_required()
+    assert frames == reference.num_frames_required()
+    for start in range(0, audio.size - frames, frames):
+        chunk = audio[start:start + frames].tobytes()
+        assert shared.voice_confidence(chunk) == pytest.approx(float(reference.voice_confidence(chunk)[0]))
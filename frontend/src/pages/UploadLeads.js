@@ -1,6 +1,6 @@
-import React, { useState } from 'react';
+import React, { useRef, useState } from 'react';
 import { useNavigate } from 'react-router-dom';
-import { useMutation, useQueryClient } from 'react-query';
+import { useMutation, useQuery, useQueryClient } from 'react-query';
 import { 
   Upload, 
   FileText, 
@@ -12,20 +12,24 @@ import {
 import { apiService } from '../services/api';
 import toast from 'react-hot-toast';
 
+const FINISHED_IMPORT_STATUSES = ['completed', 'failed', 'canceled'];
+
 const UploadLeads = () => {
   const navigate = useNavigate();
   const queryClient = useQueryClient();
   const [selectedFile, setSelectedFile] = useState(null);
   const [dragActive, setDragActive] = useState(false);
+  const [importJobId, setImportJobId] = useState(null);
+  const announcedJobId = useRef(null);
 
   const uploadMutation = useMutation(
     (file) => apiService.uploadLeads(file),
     {
-      onSuccess: (data) => {
-        toast.success(`Successfully imported ${data.imported_count} leads`);
-        queryClient.invalidateQueries('leads');
-        queryClient.invalidateQueries('recent-leads');
-        navigate('/leads');
+      onSuccess: (response) => {
+        // The import runs in the background; follow its job until it finishes
+        toast.success(`Import of ${response.data.filename} started`);
+        setImportJobId(response.data.id);
+        setSelectedFile(null);
       },
       onError: (error) => {
         toast.error('Failed to upload leads');
@@ -33,6 +37,30 @@ const UploadLeads = () => {
     }
   );
 
+  const { data: importJob } = useQuery(
+    ['lead-import', importJobId],
+    () => apiService.getLeadImport(importJobId).then((response) => response.data),
+    {
+      enabled: importJobId !== null,
+      refetchInterval: (job) => (job && FINISHED_IMPORT_STATUSES.includes(job.status) ? false : 2000),
+      onSuccess: (job) => {
+        if (!FINISHED_IMPORT_STATUSES.includes(job.status) || announcedJobId.current === job.id) {
+          return;
+        }
+        announcedJobId.current = job.id;
+        if (job.status === 'completed') {
+          toast.success(`Imported ${job.rows_imported} leads from ${job.filename}` +
+            (job.error_count ? ` (${job.error_count} rows with errors)` : ''));
+        } else {
+          toast.error(`Import of ${job.filename} ${job.status}`);
+        }
+        queryClient.invalidateQueries('leads');
+        queryClient.invalidateQueries('recent-leads');
+      }
+    }
+  );
+  const importFinished = importJob && FINISHED_IMPORT_STATUSES.includes(importJob.status);
+
   const handleDrag = (e) => {
     e.preventDefault();
     e.stopPropagation();
@@ -205,6 +233,63 @@ Jane Smith,+1234567891,jane@example.com,Another Corp,Director,456 Oak Ave,More n
         </div>
       </div>
 
+      {/* Import progress */}
+      {importJob && (
+        <div className="card">
+          <div className="card-header">
+            <h3 className="text-lg font-semibold text-gray-900 flex items-center">
+              {!importFinished ? (
+                <div className="loading-spinner mr-2"></div>
+              ) : importJob.status === 'completed' ? (
+                <CheckCircle className="h-5 w-5 mr-2 text-success-600" />
+              ) : (
+                <AlertCircle className="h-5 w-5 mr-2 text-danger-600" />
+              )}
+              Import of {importJob.filename}: {importJob.status}
+            </h3>
+          </div>
+          <div className="card-body">
+            <div className="space-y-4">
+              <div className="grid grid-cols-3 gap-4">
+                <div>
+                  <p className="text-sm text-gray-600">Rows processed</p>
+                  <p className="text-lg font-semibold text-gray-900">{importJob.rows_processed}</p>
+                </div>
+                <div>
+                  <p className="text-sm text-gray-600">Leads imported</p>
+                  <p className="text-lg font-semibold text-gray-900">{importJob.rows_imported}</p>
+                </div>
+                <div>
+                  <p className="text-sm text-gray-600">Rows with errors</p>
+                  <p className="text-lg font-semibold text-gray-900">{importJob.error_count}</p>
+                </div>
+              </div>
+              {importJob.failure && (
+                <p className="text-sm text-danger-600">{importJob.failure}</p>
+              )}
+              {importJob.errors.length > 0 && (
+                <div className="bg-gray-50 p-4 rounded-lg">
+                  <h4 className="font-semibold text-gray-900 mb-2">Row errors:</h4>
+                  <ul className="list-disc list-inside space-y-1 text-sm text-gray-600 max-h-64 overflow-y-auto">
+                    {importJob.errors.map((error, index) => (
+                      <li key={index}>{error}</li>
+                    ))}
+                  </ul>
+                </div>
+              )}
+              {importFinished && (
+                <button
+                  onClick={() => navigate('/leads')}
+                  className="btn btn-primary"
+                >
+                  View Leads
+                </button>
+              )}
+            </div>
+          </div>
+        </div>
+      )}
+
       {/* Instructions */}
       <div className="card">
         <div className="card-header">
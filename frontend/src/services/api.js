@@ -96,6 +96,7 @@ export const uploadLeads = (file) => {
     },
   });
 };
+export const getLeadImport = (id) => api.get(`/lead-imports/${id}`);
 
 // Export
 export const exportLeads = () => api.get('/export/leads', { responseType: 'blob' });
@@ -161,6 +162,7 @@ export const apiService = {
   
   // File upload
   uploadLeads,
+  getLeadImport,
   
   // Export
   exportLeads,